@@ -1,29 +1,44 @@
 import logging
-from logging.handlers import RotatingFileHandler
-from flask import Flask, jsonify, session
+from flask import Flask, jsonify, request, request_finished, session
 from flask_cors import CORS
 from whitenoise import WhiteNoise
 from werkzeug.middleware.proxy_fix import ProxyFix
+import time
 import uuid
 
-import threading
+from . import metrics
 from .config import Config
-from .database import init_db
-from .services import run_websocket_in_background
+from .database import init_db, release_supabase_client
+from .json_codec import FastJSONProvider
+from .error_log import BACKUP_COUNT, LOG_FILE, LOG_FORMAT, PositionedFileHandler, error_log_buffer
+from .profiler import init_request_profiling
+from .session_store import create_session_interface
+from .services import health_prober, ingest_supervisor
 
 def create_app(config_class=Config):
     """Create and configure an instance of the Flask application."""
     app = Flask(__name__)
     app.config.from_object(config_class)
     app.config['SESSION_COOKIE_NAME'] = 'session_id'
+    app.json = FastJSONProvider(app)
+    if app.config.get('SESSION_BACKEND', 'cookie') != 'cookie':
+        app.session_interface = create_session_interface(app.config)
 
     # --- Logging ---
-    log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    log_handler = RotatingFileHandler('app_errors.log', maxBytes=1024 * 1024, backupCount=5)
+    log_formatter = logging.Formatter(LOG_FORMAT)
+    log_handler = PositionedFileHandler(LOG_FILE, maxBytes=1024 * 1024, backupCount=BACKUP_COUNT)
     log_handler.setFormatter(log_formatter)
     log_handler.setLevel(logging.ERROR)
     app.logger.addHandler(log_handler)
-    app.logger.setLevel(logging.ERROR)
+    # The newest records are also kept in memory, so log readers rarely need the files
+    error_log_buffer.setFormatter(log_formatter)
+    error_log_buffer.setLevel(logging.ERROR)
+    # After the file handler, whose record positions it keeps
+    app.logger.removeHandler(error_log_buffer)
+    app.logger.addHandler(error_log_buffer)
+    # The module loggers (backend.services, ...) inherit this level, and Flask's default
+    # handler writes what passes it to stderr; the handlers above keep only errors
+    app.logger.setLevel(app.config.get('LOG_LEVEL', 'INFO'))
 
     # --- Middleware ---
     app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
@@ -31,6 +46,18 @@ def create_app(config_class=Config):
     # WhiteNoise will automatically serve files from the folder set in app.static_folder
     app.wsgi_app = WhiteNoise(app.wsgi_app)
 
+    # --- Metrics ---
+    if app.config.get('METRICS_ENABLED'):
+        @app.before_request
+        def start_request_timer():
+            request.environ['metrics.started'] = time.perf_counter()
+
+        # Sent after the session is saved, so Set-Cookie sizes are final
+        request_finished.connect(metrics.observe_request, app)
+
+    # --- Profiling (admin opt-in, see profiler.py) ---
+    init_request_profiling(app)
+
     # --- Session ID Management ---
     @app.before_request
     def ensure_session_id():
@@ -40,6 +67,7 @@ def create_app(config_class=Config):
     # --- Database ---
     with app.app_context():
         init_db()
+    app.teardown_request(release_supabase_client)
 
     # --- Blueprints ---
     from .auth import auth_bp
@@ -51,11 +79,14 @@ def create_app(config_class=Config):
     app.register_blueprint(api_bp)
     app.register_blueprint(status_bp)
     app.register_blueprint(admin_bp)
+    if app.config.get('METRICS_ENABLED'):
+        app.register_blueprint(metrics.metrics_bp)
 
     # --- Background Services ---
+    # Idempotent: gunicorn's post_worker_init may already have started ingestion for this process.
     if app.config.get("ENV") != "development":
-        websocket_thread = threading.Thread(target=run_websocket_in_background, daemon=True)
-        websocket_thread.start()
+        ingest_supervisor.start()
+        health_prober.start()
 
     # --- Error Handlers ---
     @app.errorhandler(404)
@@ -1,8 +1,16 @@
-from flask import Blueprint, jsonify, request, current_app
+import os
+
+from flask import Blueprint, jsonify, request, current_app, send_file
 from datetime import datetime, timezone
 from .database import supabase_admin
+from .permissions import permission_cache
+from .admin_settings import settings_cache
 from .auth_utils import require_admin
 from .config import Config
+from .error_log import parse_level, recent_log_records
+from .profiler import list_profiles, profile_path, profile_thread, profiling_switch
+from .services import ingest_supervisor
+from .table_browser import BROWSABLE_TABLES, fetch_table_page
 
 admin_bp = Blueprint('admin_bp', __name__)
 
@@ -25,6 +33,7 @@ def save_admin_settings():
             'settings': new_settings,
             'updated_at': datetime.now(timezone.utc).isoformat()
         }).eq('id', 1).execute()
+        settings_cache.invalidate()
         return jsonify({"success": True, "settings": new_settings})
     except Exception as e:
         current_app.logger.error(f"Failed to save admin settings: {e}", exc_info=True)
@@ -33,18 +42,14 @@ def save_admin_settings():
 @admin_bp.route('/api/admin/table/<table>')
 @require_admin
 def get_table_data(table):
-    allowed_tables = ['clearance_generations', 'flight_plans_received', 'discord_users', 'page_visits', 'user_sessions', 'admin_activities']
-    if table not in allowed_tables:
+    if table not in BROWSABLE_TABLES:
         return jsonify({"error": "Table not found or not permitted"}), 404
 
     try:
-        offset = int(request.args.get('offset', 0))
         page_size = int(request.args.get('pageSize', 25))
-
-        count_res = supabase_admin.table(table).select('id', count='exact').execute()
-        data_res = supabase_admin.table(table).select('*').order('created_at', desc=True).range(offset, offset + page_size - 1).execute()
-
-        return jsonify({"data": data_res.data, "totalCount": count_res.count})
+        return jsonify(fetch_table_page(supabase_admin, table, page_size, cursor=request.args.get('cursor')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Failed to load table '{table}': {e}", exc_info=True)
         return jsonify({"error": f"Failed to load data for {table}"}), 500
@@ -75,6 +80,7 @@ def add_admin_user():
         new_roles = list(set(current_roles + roles))
 
         supabase_admin.table('discord_users').update({'is_admin': True, 'roles': new_roles}).eq('id', user_res.data['id']).execute()
+        permission_cache.invalidate(user_res.data['id'])
         return jsonify({"success": True})
     except Exception as e:
         current_app.logger.error(f"Failed to add admin user: {e}", exc_info=True)
@@ -89,6 +95,7 @@ def remove_admin_user(user_id):
             return jsonify({"error": "This admin user cannot be removed."}), 403
 
         supabase_admin.table('discord_users').update({'is_admin': False, 'roles': []}).eq('id', user_id).execute()
+        permission_cache.invalidate(user_id)
         return jsonify({"success": True})
     except Exception as e:
         current_app.logger.error(f"Failed to remove admin user: {e}", exc_info=True)
@@ -98,14 +105,86 @@ def remove_admin_user(user_id):
 @require_admin
 def get_debug_logs():
     try:
-        log_entries = []
-        with open('app_errors.log', 'r') as f:
-            for i, line in enumerate(reversed(f.readlines()[-100:])):
-                parts = line.split(' - ')
-                if len(parts) >= 3:
-                    log_entries.append({"id": i, "timestamp": parts[0], "level": parts[1].lower(), "message": " - ".join(parts[2:]).strip()})
-        return jsonify({"logs": log_entries})
-    except FileNotFoundError:
-        return jsonify({"logs": []})
+        limit = int(request.args.get('limit', 100))
+    except ValueError:
+        return jsonify({"error": "'limit' must be an integer"}), 400
+    # Below 1 a page could never fill, so every rotated file would be scanned
+    limit = max(1, min(limit, 1000))
+    try:
+        min_level = parse_level(request.args.get('level', 'all'))
+        records, next_cursor = recent_log_records(limit, min_level, cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+    log_entries = [
+        {"id": i, "timestamp": record["timestamp"], "level": record["level"], "message": record["message"], "details": record["details"]}
+        for i, record in enumerate(records)
+    ]
+    return jsonify({"logs": log_entries, "nextCursor": next_cursor})
+
+@admin_bp.route('/api/admin/debug-logs')
+@require_admin
+def get_database_logs():
+    """The newest 100 rows that log_to_db() wrote to the debug_logs table, optionally of one level."""
+    try:
+        level = request.args.get('level', 'all')
+        query = supabase_admin.from_('debug_logs').select('*').order('timestamp', desc=True).limit(100)
+        if level != 'all':
+            query = query.eq('level', level)
+        response = query.execute()
+        return jsonify({"logs": response.data or []})
+    except Exception as e:
+        current_app.logger.error(f"Failed to fetch debug logs: {e}", exc_info=True)
+        return jsonify({"error": "Failed to fetch logs", "details": str(e)}), 500
+
+@admin_bp.route('/api/admin/profiling', methods=['GET'])
+@require_admin
+def get_profiling():
+    return jsonify({"switch": profiling_switch.state(), "profiles": list_profiles()})
+
+@admin_bp.route('/api/admin/profiling', methods=['POST'])
+@require_admin
+def set_profiling():
+    data = request.json or {}
+    if not data.get('enabled', True):
+        profiling_switch.disable()
+        return jsonify({"switch": None})
+
+    endpoints = data.get('endpoints') or []
+    try:
+        sample_rate = float(data.get('sampleRate', 1.0))
+        seconds = int(data.get('seconds', 300))
+    except (TypeError, ValueError):
+        return jsonify({"error": "sampleRate and seconds must be numbers"}), 400
+    if not isinstance(endpoints, list) or not 0 < sample_rate <= 1 or not 0 < seconds <= 3600:
+        return jsonify({"error": "endpoints must be a list, sampleRate in (0, 1] and seconds in (0, 3600]"}), 400
+    return jsonify({"switch": profiling_switch.enable(endpoints, sample_rate, seconds)})
+
+@admin_bp.route('/api/admin/profiling/ingest', methods=['POST'])
+@require_admin
+def profile_ingest_loop():
+    data = request.json or {}
+    try:
+        seconds = int(data.get('seconds', 30))
+    except (TypeError, ValueError):
+        return jsonify({"error": "seconds must be a number"}), 400
+    if not 0 < seconds <= 600:
+        return jsonify({"error": "seconds must be in (0, 600]"}), 400
+
+    thread_id = ingest_supervisor.ingest_thread_id()
+    if thread_id is None:
+        # In shared mode the WebSocket client runs in the separate ingester process
+        return jsonify({"error": "The ingest loop does not run in this worker"}), 409
+    if not profile_thread('ingest', thread_id, seconds):
+        return jsonify({"error": "The ingest loop is already being profiled"}), 409
+    return jsonify({"success": True, "seconds": seconds, "pid": os.getpid()})
+
+@admin_bp.route('/api/admin/profiling/<name>', methods=['GET'])
+@require_admin
+def download_profile(name):
+    path = profile_path(name)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return send_file(path, mimetype='text/plain', as_attachment=True, download_name=name)
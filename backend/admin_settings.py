@@ -0,0 +1,88 @@
+"""
+The admin_settings row, which every page load reads through /api/settings.
+
+Each worker keeps the settings as a pre-encoded payload (with its ETag) under a version
+number. Saving the settings bumps the version in the worker that saved them and, through
+a ChangeSignal file, in every other worker on the host within a second. The row is also
+re-read every SETTINGS_CACHE_TTL seconds, to pick up edits made outside the app.
+"""
+
+import threading
+import time
+
+from . import database
+from .caching import ChangeSignal
+from .config import Config
+from .encoded_responses import EncodedPayload
+
+
+def load_settings():
+    # Read at call time: init_db() creates the client after this module may be imported
+    response = database.supabase_admin.from_('admin_settings').select('settings').eq('id', 1).execute()
+    return response.data[0].get('settings', {}) if response.data else {}
+
+
+class SettingsCache:
+    """
+    Holds the EncodedPayload of `loader()` for up to `ttl` seconds. A load that overlaps
+    an invalidate() is not kept, so a save is never hidden by a read that started before it.
+    """
+
+    def __init__(self, loader, ttl, signal_path=None, check_interval=1.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.version = 0
+        self._entry = None  # (payload, loaded_at, version)
+        self._last_good = None
+        self._lock = threading.Lock()
+        # Only one load at a time; the others wait for it rather than all querying the database
+        self._load_lock = threading.Lock()
+        self._signal = ChangeSignal(signal_path, check_interval) if signal_path else None
+
+    def _fresh_entry(self):
+        entry = self._entry
+        if entry is not None and entry[2] == self.version and time.time() - entry[1] < self.ttl:
+            return entry
+        return None
+
+    def get(self):
+        """
+        Returns the settings as an EncodedPayload. If loading them fails, the last good
+        payload is returned; with none, the error is raised.
+        """
+        if self._signal is not None and self._signal.changed():
+            self._bump()
+        entry = self._fresh_entry()
+        if entry is not None:
+            return entry[0]
+
+        with self._load_lock:
+            entry = self._fresh_entry()
+            if entry is not None:
+                return entry[0]
+            version = self.version
+            try:
+                payload = EncodedPayload(self.loader())
+            except Exception:
+                if self._last_good is None:
+                    raise
+                return self._last_good
+            with self._lock:
+                self._last_good = payload
+                if version == self.version:
+                    self._entry = (payload, time.time(), version)
+            return payload
+
+    def _bump(self):
+        with self._lock:
+            self.version += 1
+            self._entry = None
+
+    def invalidate(self):
+        """Drops the cached settings here and signals the other workers to do the same."""
+        self._bump()
+        if self._signal is not None:
+            self._signal.notify(self.version)
+
+
+settings_cache = SettingsCache(load_settings, Config.SETTINGS_CACHE_TTL, signal_path=Config.SETTINGS_SIGNAL_PATH)
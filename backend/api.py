@@ -1,7 +1,17 @@
-from flask import Blueprint, jsonify, request, session, current_app
-from .database import get_supabase_client, supabase_admin, log_to_db
-from .services import external_api_service, flight_plans_cache
+import math
+import time
+from flask import Blueprint, Response, jsonify, request, session, current_app, stream_with_context
+from . import json_codec
+from .admin_settings import settings_cache
+from .config import Config
+from .database import get_supabase_client, supabase_admin, log_to_db, write_behind
+from .encoded_responses import EncodedPayload, PayloadCache, not_modified, send_payload
+from .flight_plan_store import plan_matches
+from .services import external_api_service, flight_plans_cache, flight_plan_broadcaster
 from .auth_utils import require_auth
+from .permissions import is_admin, permission_cache
+from .caching import CachedResource
+from .table_browser import BROWSABLE_TABLES, fetch_table_page
 
 api_bp = Blueprint('api_bp', __name__)
 
@@ -13,32 +23,144 @@ def health_check():
         "flight_plan_cache_size": len(flight_plans_cache)
     })
 
+# Pre-encoded response bodies for the hot read endpoints, rebuilt only when the data changes
+controllers_payloads = PayloadCache(max_entries=2)
+atis_payloads = PayloadCache(max_entries=2)
+flight_plan_payloads = PayloadCache()
+
+def send_external_api_result(result, payloads):
+    # Keyed on `source` too, since live and cached responses differ only in that field
+    payload = payloads.get(result["lastUpdated"], result["source"], lambda: EncodedPayload(result))
+    return send_payload(payload)
+
 @api_bp.route('/api/controllers')
 def get_controllers():
     try:
-        return jsonify(external_api_service.get_controllers())
+        return send_external_api_result(external_api_service.get_controllers(), controllers_payloads)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @api_bp.route('/api/atis')
 def get_atis():
     try:
-        return jsonify(external_api_service.get_atis())
+        return send_external_api_result(external_api_service.get_atis(), atis_payloads)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def parse_flight_plan_filters(args):
+    """Builds FlightPlanStore.query() filters from the request's query string."""
+    filters = {name: args.get(name) for name in ('departure', 'arrival', 'airport', 'callsign') if args.get(name)}
+    if args.get('since'):
+        try:
+            filters['since'] = float(args['since'])
+        except ValueError:
+            raise ValueError("'since' must be a Unix timestamp")
+        # float() also accepts nan and inf, which the store cannot bucket
+        if not math.isfinite(filters['since']):
+            raise ValueError("'since' must be a Unix timestamp")
+    if args.get('limit'):
+        try:
+            filters['limit'] = int(args['limit'])
+        except ValueError:
+            raise ValueError("'limit' must be an integer")
+        if filters['limit'] < 1:
+            raise ValueError("'limit' must be positive")
+    return filters
+
 @api_bp.route('/api/flight-plans')
 def get_flight_plans():
+    """
+    Returns the live flight plans, optionally filtered (see parse_flight_plan_filters).
+
+    Responses carry an ETag derived from the store's sequence number, so an unchanged
+    store answers If-None-Match with 304. With `since_seq` (and the `epoch` it came
+    from), only the plans inserted, updated or removed since then are returned; `limit`
+    is refused there, since a truncated delta would leave the client behind its `seq`.
+    """
     if flight_plans_cache:
-        return jsonify(list(flight_plans_cache))
+        try:
+            filters = parse_flight_plan_filters(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        try:
+            since_seq = int(request.args['since_seq']) if request.args.get('since_seq') else None
+        except ValueError:
+            return jsonify({"error": "'since_seq' must be an integer"}), 400
+        if since_seq is not None and 'limit' in filters:
+            return jsonify({"error": "'limit' cannot be combined with 'since_seq'"}), 400
+
+        flight_plans_cache.expire()
+        epoch, seq = flight_plans_cache.epoch, flight_plans_cache.version
+        etag = f"{epoch}-{seq}"
+        response = not_modified(etag)
+        if response is not None:
+            return response
+
+        if since_seq is not None and request.args.get('epoch', epoch) != epoch:
+            since_seq = -1
+
+        def build_payload():
+            if since_seq is None:
+                return EncodedPayload(flight_plans_cache.query(**filters), etag=etag)
+            changes = flight_plans_cache.changes_since(since_seq)
+            return EncodedPayload({
+                "epoch": epoch,
+                "seq": changes["seq"],
+                "full": changes["full"],
+                "upserts": [fp for fp in changes["upserts"] if plan_matches(fp, **filters)],
+                "removed": [dict(zip(('callsign', 'departing', 'arriving'), key)) for key in changes["removed"]],
+            }, etag=etag)
+
+        # Pollers tend to send identical queries, so each variant is encoded once per store version
+        variant = (since_seq, tuple(sorted(filters.items())))
+        response = send_payload(flight_plan_payloads.get((epoch, seq), variant, build_payload))
+        response.headers['X-Flight-Plan-Epoch'] = epoch
+        response.headers['X-Flight-Plan-Seq'] = str(seq)
+        return response
     try:
         supabase = get_supabase_client()
-        response = supabase.from_('flight_plans_received').select("*").order('created_at', desc=True).limit(20).execute()
+        response = supabase.from_('flight_plans_received').select("*").order('updated_at', desc=True).limit(20).execute()
         return jsonify(response.data or [])
     except Exception as e:
         current_app.logger.error(f"Failed to fetch flight plans from Supabase: {e}", exc_info=True)
         return jsonify({"error": "Failed to fetch flight plans from database", "details": str(e)}), 500
 
+@api_bp.route('/api/flight-plans/stream')
+def stream_flight_plans():
+    """
+    Server-Sent Events stream of new and updated flight plans, optionally limited to one airport.
+    Only plans published while the stream is open are sent, and it is closed after
+    FLIGHT_PLAN_STREAM_MAX_AGE. Clients must catch up from /api/flight-plans?since_seq=...
+    each time the stream (re)opens, and reload on a `resync` event.
+    """
+    if not Config.FLIGHT_PLAN_STREAM_ENABLED:
+        return jsonify({"error": "Flight plan streaming is disabled"}), 503
+
+    subscription = flight_plan_broadcaster.subscribe(airport=request.args.get('airport'))
+    if subscription is None:
+        return jsonify({"error": "Too many open flight plan streams"}), 503
+
+    def generate():
+        deadline = time.time() + Config.FLIGHT_PLAN_STREAM_MAX_AGE
+        try:
+            yield "retry: 5000\n\n"
+            while time.time() < deadline:
+                flight_plan = subscription.get(timeout=Config.FLIGHT_PLAN_STREAM_KEEPALIVE)
+                if subscription.dropped:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                if flight_plan is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: flight_plan\ndata: {json_codec.dumps(flight_plan)}\n\n"
+        finally:
+            flight_plan_broadcaster.unsubscribe(subscription)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
 @api_bp.route('/api/leaderboard')
 def get_leaderboard():
     try:
@@ -85,7 +207,6 @@ def save_user_settings():
 @api_bp.route('/api/clearance-generated', methods=['POST'])
 def track_clearance_generation():
     try:
-        supabase = get_supabase_client()
         data = request.json
 
         # Create a dictionary with only the essential data
@@ -96,7 +217,9 @@ def track_clearance_generation():
             "clearance_text": data.get('clearance_text')
         }
 
-        supabase.from_('clearance_generations').insert(clearance_data).execute()
+        # Inserted in the background by the write-behind queue
+        if not write_behind.enqueue('clearance_generations', clearance_data):
+            return jsonify({"success": False, "error": "Server busy, clearance not recorded"}), 503
 
         log_to_db('info', f"Clearance generated for {clearance_data.get('callsign')}", data={'user': clearance_data.get('discord_username')})
         return jsonify({"success": True})
@@ -112,7 +235,7 @@ def track_clearance_generation():
 @api_bp.route('/api/admin/users', methods=['GET'])
 @require_auth
 def get_admin_users():
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
     try:
         response = supabase_admin.rpc('get_admin_users').execute()
@@ -124,7 +247,7 @@ def get_admin_users():
 @api_bp.route('/api/admin/users', methods=['POST'])
 @require_auth
 def add_admin_user():
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
     try:
         data = request.json
@@ -138,6 +261,8 @@ def add_admin_user():
             'p_roles': roles
         }).execute()
 
+        # The RPC resolves the username itself, so every user's cached permissions are dropped
+        permission_cache.invalidate()
         result = response.data[0]
         log_to_db('info', f"Admin access granted to {username}", data={'granted_by': session.get('user', {}).get('username'), 'result': result['message']})
         return jsonify(result)
@@ -150,7 +275,7 @@ def add_admin_user():
 @api_bp.route('/api/admin/users/<uuid:user_id>', methods=['DELETE'])
 @require_auth
 def remove_admin_user(user_id):
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
 
     if str(user_id) == session.get('user', {}).get('id'):
@@ -158,6 +283,7 @@ def remove_admin_user(user_id):
 
     try:
         response = supabase_admin.rpc('remove_admin_user', {'p_user_id': str(user_id)}).execute()
+        permission_cache.invalidate(str(user_id))
 
         result = response.data[0]
         log_to_db('warn', f"Admin access removed for user ID {user_id}", data={'removed_by': session.get('user', {}).get('username')})
@@ -171,19 +297,18 @@ def remove_admin_user(user_id):
 @api_bp.route('/api/settings', methods=['GET'])
 def get_public_settings():
     try:
-        response = supabase_admin.from_('admin_settings').select('settings').eq('id', 1).execute()
-        if response.data:
-            return jsonify(response.data[0].get('settings', {}))
-        else:
-            return jsonify({})
+        response = send_payload(settings_cache.get())
     except Exception as e:
         current_app.logger.error(f"Failed to fetch public settings: {e}", exc_info=True)
         return jsonify({})
+    # Let browsers keep the settings but revalidate them (a 304 with the ETag) on every load
+    response.cache_control.no_cache = True
+    return response
 
 @api_bp.route('/api/admin/settings', methods=['GET'])
 @require_auth
 def get_admin_settings():
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
     try:
         response = supabase_admin.from_('admin_settings').select('settings').eq('id', 1).execute()
@@ -198,7 +323,7 @@ def get_admin_settings():
 @api_bp.route('/api/admin/settings', methods=['POST'])
 @require_auth
 def save_admin_settings():
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
     try:
         new_settings = request.json
@@ -207,6 +332,7 @@ def save_admin_settings():
             'settings': new_settings,
         }).execute()
 
+        settings_cache.invalidate()
         log_to_db('info', "Admin settings saved", data={'saved_by': session.get('user', {}).get('username')})
 
         if response.data:
@@ -217,28 +343,30 @@ def save_admin_settings():
         current_app.logger.error(f"Failed to save admin settings: {e}", exc_info=True)
         return jsonify({"error": "Failed to save settings", "details": str(e)}), 500
 
+def _load_analytics_snapshot():
+    # Totals and 30 days of daily counts for the dashboard, in one round trip
+    return supabase_admin.rpc('get_analytics_snapshot', {}).execute().data or {}
+
+# Shared by the analytics and charts endpoints; invalidated by ?refresh=true and by a reset
+analytics_snapshot = CachedResource(_load_analytics_snapshot, Config.ANALYTICS_CACHE_TTL, name='analytics-snapshot')
+
 @api_bp.route('/api/admin/analytics', methods=['GET'])
 @require_auth
 def get_admin_analytics():
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
     try:
-        # Fetch total counts
-        total_visits_res = supabase_admin.from_('page_visits').select('id', count='exact').execute()
-        total_clearances_res = supabase_admin.from_('clearance_generations').select('id', count='exact').execute()
-        total_flight_plans_res = supabase_admin.from_('flight_plans_received').select('id', count='exact').execute()
-
-        # Use the optimized SQL function for daily visits
-        daily_visits_res = supabase_admin.rpc('get_daily_counts', {'table_name': 'page_visits'}).execute()
-
-        # Format daily visits data for the frontend
-        daily_visits_dict = {item['date']: item['count'] for item in daily_visits_res.data} if daily_visits_res.data else {}
+        if request.args.get('refresh', 'false').lower() == 'true':
+            analytics_snapshot.invalidate()
+        snapshot, fetched_at, _ = analytics_snapshot.get()
 
         analytics_data = {
-            "totalVisits": total_visits_res.count or 0,
-            "clearancesGenerated": total_clearances_res.count or 0,
-            "flightPlansReceived": total_flight_plans_res.count or 0,
-            "dailyVisits": daily_visits_dict,
+            "totalVisits": snapshot.get('totalVisits') or 0,
+            "clearancesGenerated": snapshot.get('clearancesGenerated') or 0,
+            "flightPlansReceived": snapshot.get('flightPlansReceived') or 0,
+            # Format daily visits data for the frontend
+            "dailyVisits": {item['date']: item['count'] for item in snapshot.get('dailyVisits') or []},
+            "lastUpdated": fetched_at,
         }
         return jsonify(analytics_data)
     except Exception as e:
@@ -248,49 +376,30 @@ def get_admin_analytics():
 @api_bp.route('/api/admin/charts', methods=['GET'])
 @require_auth
 def get_chart_data():
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
     try:
-        # Use the new SQL function for efficient data aggregation
-        daily_visits_res = supabase_admin.rpc('get_daily_counts', {'table_name': 'page_visits'}).execute()
-        daily_clearances_res = supabase_admin.rpc('get_daily_counts', {'table_name': 'clearance_generations'}).execute()
+        snapshot, fetched_at, _ = analytics_snapshot.get()
 
         chart_data = {
-            "daily_visits": daily_visits_res.data or [],
-            "daily_clearances": daily_clearances_res.data or []
+            "daily_visits": snapshot.get('dailyVisits') or [],
+            "daily_clearances": snapshot.get('dailyClearances') or [],
+            "lastUpdated": fetched_at,
         }
         return jsonify(chart_data)
     except Exception as e:
         current_app.logger.error(f"Failed to fetch chart data: {e}", exc_info=True)
         return jsonify({"error": "Failed to fetch chart data", "details": str(e)}), 500
 
-@api_bp.route('/api/admin/logs', methods=['GET'])
-@require_auth
-def get_debug_logs():
-    if not session.get('user', {}).get('is_admin'):
-        return jsonify({"error": "Unauthorized"}), 403
-    try:
-        level = request.args.get('level', 'all')
-        query = supabase_admin.from_('debug_logs').select('*').order('timestamp', desc=True).limit(100)
-
-        if level != 'all':
-            query = query.eq('level', level)
-
-        response = query.execute()
-
-        return jsonify({"logs": response.data or []})
-    except Exception as e:
-        current_app.logger.error(f"Failed to fetch debug logs: {e}", exc_info=True)
-        return jsonify({"error": "Failed to fetch logs", "details": str(e)}), 500
-
 @api_bp.route('/api/admin/analytics/reset', methods=['POST'])
 @require_auth
 def reset_analytics_data():
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
     try:
         supabase_admin.from_('page_visits').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
         supabase_admin.from_('clearance_generations').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
+        analytics_snapshot.invalidate()
         return jsonify({"success": True, "message": "Analytics data has been reset."})
     except Exception as e:
         current_app.logger.error(f"Failed to reset analytics data: {e}", exc_info=True)
@@ -299,7 +408,7 @@ def reset_analytics_data():
 @api_bp.route('/api/admin/current-users', methods=['GET'])
 @require_auth
 def get_current_users():
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
     try:
         from datetime import datetime, timedelta
@@ -322,34 +431,21 @@ def get_current_users():
 @api_bp.route('/api/admin/tables/<string:table_name>', methods=['GET'])
 @require_auth
 def get_table_data(table_name):
-    if not session.get('user', {}).get('is_admin'):
+    if not is_admin():
         return jsonify({"error": "Unauthorized"}), 403
 
-    ALLOWED_TABLES = [
-        'page_visits', 'clearance_generations', 'flight_plans_received',
-        'user_sessions', 'discord_users', 'admin_activities'
-    ]
-    if table_name not in ALLOWED_TABLES:
+    if table_name not in BROWSABLE_TABLES:
         return jsonify({"error": "Table not found or access denied"}), 404
 
     try:
         limit = int(request.args.get('limit', 25))
-        offset = int(request.args.get('offset', 0))
-
-        # Get total count
-        count_res = supabase_admin.from_(table_name).select('id', count='exact').execute()
-        total_count = count_res.count if count_res.count is not None else 0
-
-        # Get paginated data
-        data_res = supabase_admin.from_(table_name).select('*').order('created_at', desc=True).range(offset, offset + limit - 1).execute()
-
-        return jsonify({
-            "data": data_res.data or [],
-            "totalCount": total_count
-        })
+        page = fetch_table_page(supabase_admin, table_name, limit, cursor=request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Failed to fetch table '{table_name}': {e}", exc_info=True)
         # Check for a common Supabase error when a table doesn't exist
         if 'relation' in str(e) and 'does not exist' in str(e):
             return jsonify({"setupRequired": True, "message": f"The table '{table_name}' does not exist in the database."}), 200
         return jsonify({"error": f"Failed to fetch data for {table_name}", "details": str(e)}), 500
+    return jsonify(page)
@@ -6,6 +6,7 @@ from postgrest import APIError
 
 from .config import Config
 from .database import supabase_admin, track_page_visit
+from .permissions import current_permissions
 
 auth_bp = Blueprint('auth_bp', __name__)
 
@@ -57,6 +58,9 @@ def discord_callback():
         if not db_user:
             raise Exception("Failed to retrieve user from DB after upsert via RPC.")
 
+        # Server-side sessions move to a fresh ID on login; the cookie session has no ID to rotate
+        if hasattr(session, 'regenerate'):
+            session.regenerate()
         session['user'] = {
             'id': db_user['id'],
             'discord_id': db_user['out_discord_id'],
@@ -79,6 +83,8 @@ def discord_callback():
 def get_current_user():
     # This endpoint is hit on every page load by the frontend
     track_page_visit(session, request)
+    # Brings the session's is_admin and roles up to date with discord_users
+    current_permissions()
     return jsonify({"authenticated": 'user' in session, "user": session.get('user')})
 
 @auth_bp.route('/api/auth/logout', methods=['POST'])
@@ -1,6 +1,7 @@
 from functools import wraps
 from flask import session, jsonify
 from .database import supabase_admin
+from .permissions import is_admin
 
 def require_auth(f):
     @wraps(f)
@@ -15,7 +16,7 @@ def require_admin(f):
     def decorated_function(*args, **kwargs):
         if 'user' not in session:
             return jsonify({"error": "Authentication required"}), 401
-        if not session['user'].get('is_admin'):
+        if not is_admin():
             return jsonify({"error": "Admin access required"}), 403
         if not supabase_admin:
             return jsonify({"error": "Admin backend not configured"}), 500
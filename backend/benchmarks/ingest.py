@@ -0,0 +1,192 @@
+"""
+Ingest microbenchmark: feeds a corpus of raw 24data WebSocket messages through the
+ingester's message path (IngestSupervisor._record_message, which parses, filters and
+upserts into the flight plan store) with no socket, for several store sizes.
+
+    python backend/benchmarks/ingest.py --capacities 1000,20000,100000
+    python backend/benchmarks/ingest.py --corpus corpus.jsonl --burst-rate 800
+    python backend/benchmarks/ingest.py --record corpus.jsonl --seconds 600
+
+A corpus file holds one raw message per line, encoded as a JSON string. --record
+captures one from the live feed (DATA_API_WSS_URL). Without --corpus a synthetic
+corpus shaped like the feed is used: mostly ACFT_DATA position updates, some
+CONTROLLERS messages and about 5% flight plans.
+
+For each store size the report gives messages per second, time per message, bytes
+allocated per message (peak while handling it, and retained after), and how long each
+upsert held the store lock. The headroom column is the sustained rate divided by
+--burst-rate, the event-day message rate the ingester has to keep up with.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from replay_server import synthetic_corpus
+from run import percentile
+
+from backend import services
+from backend.config import Config
+from backend.flight_plan_store import FlightPlanStore
+
+ALLOCATION_SAMPLE = 2000
+
+
+class TimedLock:
+    """A drop-in for threading.Lock that records how long each acquisition was held."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+        self.holds = []
+
+    def __enter__(self):
+        self._lock.acquire()
+        self._acquired_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.holds.append(time.perf_counter() - self._acquired_at)
+        self._lock.release()
+        return False
+
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_corpus(path, seconds):
+    """Appends raw messages from the live 24data feed to `path` for `seconds`."""
+    async def capture():
+        count = 0
+        deadline = time.monotonic() + seconds
+        with open(path, 'a', encoding='utf-8') as f:
+            async with websockets.connect(Config.DATA_API_WSS_URL, origin="") as websocket:
+                while time.monotonic() < deadline:
+                    try:
+                        message = await asyncio.wait_for(websocket.recv(), deadline - time.monotonic())
+                    except asyncio.TimeoutError:
+                        break
+                    f.write(json.dumps(message if isinstance(message, str) else message.decode('utf-8')) + '\n')
+                    count += 1
+        return count
+
+    return asyncio.run(capture())
+
+
+def message_type(message):
+    try:
+        return json.loads(message).get("t") or 'unknown'
+    except ValueError:
+        return 'malformed'
+
+
+def prefilled_store(capacity):
+    """Returns a store filled to `capacity` with plans the corpus never updates, so inserts evict."""
+    store = FlightPlanStore(capacity, ttl=Config.FLIGHT_PLAN_TTL)
+    for i in range(capacity):
+        store.upsert({"callsign": f"FILL{i}", "departing": "IRFD", "arriving": "ITKO", "route": "GPS"})
+    store._lock = TimedLock()
+    return store
+
+
+def benchmark(corpus, capacity, repeat):
+    store = prefilled_store(capacity)
+    original_store = services.flight_plans_cache
+    services.flight_plans_cache = store
+    try:
+        supervisor = services.IngestSupervisor('ws://benchmark')
+        gc.collect()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for message in corpus:
+                supervisor._record_message(message)
+        elapsed = time.perf_counter() - started
+        holds = sorted(store._lock.holds)
+
+        # A separate, smaller pass: tracing allocations slows everything down
+        tracemalloc.start()
+        peaks, retained = [], []
+        for message in corpus[:ALLOCATION_SAMPLE]:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            supervisor._record_message(message)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+        tracemalloc.stop()
+    finally:
+        services.flight_plans_cache = original_store
+
+    messages = len(corpus) * repeat
+    return {
+        "capacity": capacity,
+        "messages": messages,
+        "flight_plans": supervisor.flight_plans_received,
+        "messages_per_second": round(messages / elapsed),
+        "us_per_message": round(elapsed / messages * 1e6, 2),
+        "alloc_peak_bytes": round(sum(peaks) / len(peaks)),
+        "alloc_retained_bytes": round(sum(retained) / len(retained)),
+        "lock_holds": len(holds),
+        "lock_mean_us": round(sum(holds) / len(holds) * 1e6, 2) if holds else None,
+        "lock_p99_us": round(percentile(holds, 0.99) * 1e6, 2) if holds else None,
+        "lock_max_us": round(holds[-1] * 1e6, 2) if holds else None,
+        "lock_busy_fraction": round(sum(holds) / elapsed, 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', help="JSON-lines corpus of raw messages (default: synthetic)")
+    parser.add_argument('--messages', type=int, default=20000, help="size of the synthetic corpus (default 20000)")
+    parser.add_argument('--flight-plan-share', type=float, default=0.05, help="synthetic corpus flight plan share")
+    parser.add_argument('--capacities', default='1000,20000,100000', help="store sizes to test (default 1000,20000,100000)")
+    parser.add_argument('--repeat', type=int, default=3, help="passes over the corpus per store size (default 3)")
+    parser.add_argument('--burst-rate', type=float, default=500, help="event-day messages/s to compare against (default 500)")
+    parser.add_argument('--record', help="record a corpus from the live feed to this file and exit")
+    parser.add_argument('--seconds', type=float, default=300, help="how long to record (default 300)")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        print(f"Recorded {record_corpus(args.record, args.seconds)} messages to {args.record}")
+        return 0
+
+    corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.messages, args.flight_plan_share)
+    mix = {}
+    for message in corpus:
+        kind = message_type(message)
+        mix[kind] = mix.get(kind, 0) + 1
+    results = [benchmark(corpus, int(capacity), args.repeat) for capacity in args.capacities.split(',')]
+
+    if args.json:
+        print(json.dumps({"corpus": mix, "burst_rate": args.burst_rate, "results": results}, indent=2))
+        return 0
+
+    average_size = sum(len(message) for message in corpus) / len(corpus)
+    print(f"Corpus: {len(corpus)} messages, {average_size:.0f} bytes on average, "
+          + ', '.join(f"{kind} {count}" for kind, count in sorted(mix.items())))
+    print(f"{'capacity':>9}{'msg/s':>10}{'us/msg':>9}{'peak B':>9}{'kept B':>9}"
+          f"{'lock us':>9}{'p99 us':>9}{'max us':>9}{'busy':>8}{'headroom':>10}")
+    for r in results:
+        print(f"{r['capacity']:>9}{r['messages_per_second']:>10}{r['us_per_message']:>9}"
+              f"{r['alloc_peak_bytes']:>9}{r['alloc_retained_bytes']:>9}{r['lock_mean_us']:>9}"
+              f"{r['lock_p99_us']:>9}{r['lock_max_us']:>9}{r['lock_busy_fraction']:>8.1%}"
+              f"{r['messages_per_second'] / args.burst_rate:>9.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Local stand-in for Supabase's PostgREST API with injectable latency.
+
+Reads return empty results, writes and RPCs succeed, and every call is counted by
+method and table (or `rpc:<name>`), so benchmarks exercise the real client code paths
+without a database.
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class PostgrestStub:
+    """Answers /rest/v1/* after `latency` seconds plus up to `jitter` seconds of random delay."""
+
+    def __init__(self, latency=0.0, jitter=0.0, host='127.0.0.1'):
+        self.latency = latency
+        self.jitter = jitter
+        self.host = host
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self._server.server_address[1]}"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                parts = self.path.split('?', 1)[0].strip('/').split('/')
+                if parts[:2] != ['rest', 'v1'] or len(parts) < 3:
+                    self._send(404, {"message": "Not found"})
+                    return
+                target = f"rpc:{parts[3]}" if parts[2] == 'rpc' and len(parts) > 3 else parts[2]
+                with stub._lock:
+                    stub.calls[(self.command, target)] += 1
+
+                delay = stub.latency + (random.uniform(0, stub.jitter) if stub.jitter else 0)
+                if delay:
+                    time.sleep(delay)
+                if target.startswith('rpc:'):
+                    self._send(200, {} if self.command == 'POST' else [])
+                elif self.command == 'GET' and 'vnd.pgrst.object' in self.headers.get('Accept', ''):
+                    # .single() with no matching row
+                    self._send(406, {"code": "PGRST116", "message": "JSON object requested, multiple (or no) rows returned"})
+                elif self.command in ('POST', 'PATCH', 'DELETE') and 'return=minimal' in self.headers.get('Prefer', ''):
+                    self._send(201 if self.command == 'POST' else 204, None)
+                else:
+                    self._send(201 if self.command == 'POST' else 200, [])
+
+            def _send(self, status, payload):
+                body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Range', '*/0')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="postgrest-stub", daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,207 @@
+"""
+Local stand-in for the 24data API: /controllers and /atis over HTTP and the flight plan
+WebSocket feed at /wss, replayed at a configurable message rate.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+AIRPORTS = ['IRFD', 'ITKO', 'IPPH', 'IGRV', 'IMLR', 'IZOL', 'ILAR', 'IPAP', 'IBTH', 'ISAU', 'IJAF', 'ISCM']
+AIRLINES = ['DLH', 'BAW', 'UAL', 'RYR', 'AFR', 'KLM', 'SWR', 'QTR']
+AIRCRAFT = ['A320', 'B738', 'A359', 'B77W', 'E190', 'DH8D', 'A21N', 'B789']
+WAYPOINTS = ['ALDER', 'BOBUX', 'CAMEL', 'DINER', 'EXMOR', 'FRANK', 'GRASS', 'HAWKN', 'JACKO', 'KUNAV']
+
+
+def synthetic_flight_plan_messages(count, pilots=500, seed=24):
+    """
+    Returns `count` raw FLIGHT_PLAN / EVENT_FLIGHT_PLAN messages shaped like the 24data
+    feed. Each pilot keeps the same callsign and airport pair, so repeats are updates.
+    """
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        pilot = rng.randrange(pilots)
+        pilot_rng = random.Random(pilot)
+        departing, arriving = pilot_rng.sample(AIRPORTS, 2)
+        flight_plan = {
+            "robloxName": f"pilot{pilot}",
+            "callsign": f"{AIRLINES[pilot % len(AIRLINES)]}{100 + pilot}",
+            "realcallsign": f"{AIRLINES[pilot % len(AIRLINES)]}-{100 + pilot}",
+            "aircraft": pilot_rng.choice(AIRCRAFT),
+            "flightrules": "IFR",
+            "departing": departing,
+            "arriving": arriving,
+            "route": ' '.join(rng.sample(WAYPOINTS, rng.randint(2, 6))),
+            "flightlevel": str(rng.choice(range(100, 410, 10))),
+        }
+        source = "EVENT_FLIGHT_PLAN" if rng.random() < 0.2 else "FLIGHT_PLAN"
+        messages.append(json.dumps({"t": source, "s": 0, "d": flight_plan}))
+    return messages
+
+
+def synthetic_aircraft_message(rng, aircraft=80):
+    """Returns one ACFT_DATA position update, the bulk of the feed, which the ingester ignores."""
+    return json.dumps({"t": "ACFT_DATA", "s": 0, "d": {
+        f"{AIRLINES[i % len(AIRLINES)]}-{100 + i}": {
+            "heading": rng.randrange(360),
+            "playerName": f"pilot{i}",
+            "altitude": rng.randrange(0, 41000, 100),
+            "aircraftType": AIRCRAFT[i % len(AIRCRAFT)],
+            "position": {"x": round(rng.uniform(-50000, 50000), 3), "y": round(rng.uniform(-50000, 50000), 3)},
+            "speed": rng.randrange(0, 500),
+            "wind": f"{rng.randrange(360):03d}/{rng.randrange(30):02d}",
+            "isOnGround": rng.random() < 0.2,
+            "groundSpeed": rng.randrange(0, 550),
+        } for i in range(aircraft)
+    }})
+
+
+def synthetic_corpus(count, flight_plan_share=0.05, aircraft=80, pilots=500, seed=24):
+    """
+    Returns `count` messages mixing flight plans (about `flight_plan_share` of them)
+    with ACFT_DATA and CONTROLLERS messages, the types the ingester ignores.
+    """
+    rng = random.Random(seed)
+    flight_plans = iter(synthetic_flight_plan_messages(count, pilots=pilots, seed=seed))
+    messages = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < flight_plan_share:
+            messages.append(next(flight_plans))
+        elif roll < flight_plan_share + 0.02:
+            messages.append(json.dumps({"t": "CONTROLLERS", "s": 0, "d": synthetic_controllers()}))
+        else:
+            messages.append(synthetic_aircraft_message(rng, aircraft))
+    return messages
+
+
+def synthetic_controllers():
+    return [
+        {"holder": f"controller{i}", "claimable": i % 3 == 0, "airport": airport, "position": position, "queue": []}
+        for i, (airport, position) in enumerate((a, p) for a in AIRPORTS for p in ('tower', 'ground'))
+    ]
+
+
+def synthetic_atis():
+    return [
+        {"airport": airport, "letter": chr(ord('A') + i % 26), "editor": f"controller{i}",
+         "content": f"{airport} ATIS INFO {chr(ord('A') + i % 26)} WIND 270/10 QNH 1013 RWY 27 IN USE"}
+        for i, airport in enumerate(AIRPORTS)
+    ]
+
+
+class ReplayServer:
+    """
+    Serves the 24data REST endpoints with `latency` seconds of added delay and replays
+    `messages` (cycling through them) to every WebSocket client at `message_rate`
+    messages per second.
+    """
+
+    def __init__(self, messages=None, message_rate=20, latency=0.0, host='127.0.0.1'):
+        self.messages = messages or synthetic_flight_plan_messages(2000)
+        self.message_rate = message_rate
+        self.latency = latency
+        self.host = host
+        self.payloads = {
+            '/controllers': json.dumps(synthetic_controllers()).encode('utf-8'),
+            '/atis': json.dumps(synthetic_atis()).encode('utf-8'),
+        }
+        self.http_requests = 0
+        self.messages_sent = 0
+        self._http_server = None
+        self._ws_port = None
+        self._ws_ready = threading.Event()
+        self._ws_thread = None
+        self._loop = None
+        self._stopping = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self._http_server.server_address[1]}"
+
+    @property
+    def wss_url(self):
+        return f"ws://{self.host}:{self._ws_port}/wss"
+
+    def start(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                self._respond(include_body=False)
+
+            def do_GET(self):
+                self._respond(include_body=True)
+
+            def _respond(self, include_body):
+                replay.http_requests += 1
+                if replay.latency:
+                    time.sleep(replay.latency)
+                body = replay.payloads.get(self.path.split('?', 1)[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if include_body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http_server = ThreadingHTTPServer((self.host, 0), Handler)
+        self._http_server.daemon_threads = True
+        threading.Thread(target=self._http_server.serve_forever, name="replay-http", daemon=True).start()
+        self._ws_thread = threading.Thread(target=self._run_websocket, name="replay-wss", daemon=True)
+        self._ws_thread.start()
+        self._ws_ready.wait(5)
+        return self
+
+    def _run_websocket(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve_websocket())
+        finally:
+            self._loop.close()
+
+    async def _serve_websocket(self):
+        self._stopping = asyncio.Event()
+        server = await serve(self._feed, self.host, 0)
+        self._ws_port = next(iter(server.sockets)).getsockname()[1]
+        self._ws_ready.set()
+        await self._stopping.wait()
+        # Closes the open connections too, which ends their _feed handlers
+        server.close()
+        await server.wait_closed()
+
+    async def _feed(self, websocket):
+        interval = 1 / self.message_rate if self.message_rate else 0
+        next_send = time.monotonic()
+        index = 0
+        try:
+            while True:
+                await websocket.send(self.messages[index % len(self.messages)])
+                self.messages_sent += 1
+                index += 1
+                next_send += interval
+                await asyncio.sleep(max(0, next_send - time.monotonic()))
+        except ConnectionClosed:
+            pass
+
+    def stop(self):
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+        if self._ws_thread is not None:
+            if self._stopping is not None:
+                self._loop.call_soon_threadsafe(self._stopping.set)
+            self._ws_thread.join(5)
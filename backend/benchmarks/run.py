@@ -0,0 +1,271 @@
+"""
+Offline load test: runs the app against local 24data and Supabase stand-ins and reports
+throughput and latency percentiles per endpoint.
+
+    python backend/benchmarks/run.py --duration 20 --concurrency 16
+    python backend/benchmarks/run.py --save baseline.json
+    python backend/benchmarks/run.py --baseline baseline.json --tolerance 0.25
+
+With --baseline the exit status is 1 when any endpoint's p95 grew by more than the
+tolerance or any request failed. To load an app served some other way (gunicorn, say),
+start the stand-ins with --stubs-only, export the variables it prints before starting
+the server, and pass the server's URL with --target.
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from postgrest_stub import PostgrestStub
+from replay_server import ReplayServer
+
+# (path, relative weight): the frontend polls flight plans far more often than anything else
+ENDPOINTS = [
+    ('/api/flight-plans', 4),
+    ('/api/auth/user', 3),
+    ('/api/controllers', 2),
+    ('/api/full-status', 1),
+]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values), math.ceil(fraction * len(sorted_values))) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """Turns {path: [(latency, ok), ...]} into per-endpoint throughput and latency (ms)."""
+    results = {}
+    for path, observations in sorted(samples.items()):
+        latencies = sorted(latency * 1000 for latency, _ in observations)
+        results[path] = {
+            "requests": len(observations),
+            "errors": sum(1 for _, ok in observations if not ok),
+            "rps": round(len(observations) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+    return results
+
+
+def stub_environment(replay, postgrest, workdir):
+    return {
+        'DATA_API_BASE_URL': replay.base_url,
+        'DATA_API_WSS_URL': replay.wss_url,
+        'SUPABASE_URL': postgrest.url,
+        'SUPABASE_ANON_KEY': 'benchmark-anon-key',
+        'SUPABASE_SERVICE_KEY': 'benchmark-service-key',
+        'FLIGHT_PLAN_INGEST_MODE': 'local',
+        'FLIGHT_PLAN_CHECKPOINT_PATH': os.path.join(workdir, 'flight_plans.checkpoint'),
+        'FLIGHT_PLAN_SHARED_PATH': os.path.join(workdir, 'flight_plans.snapshot'),
+        'PROFILE_OUTPUT_DIR': os.path.join(workdir, 'profiles'),
+        'HEALTH_PROBE_INTERVAL': '5',
+    }
+
+
+def serve_app():
+    """Creates the app with the stand-in environment and serves it on a local port."""
+    from werkzeug.serving import make_server
+    from backend import create_app
+
+    app = create_app()
+    # Let the session cookie round-trip over plain HTTP on 127.0.0.1
+    app.config['SESSION_COOKIE_DOMAIN'] = None
+    app.config['SESSION_COOKIE_SECURE'] = False
+    app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="benchmark-app", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def serve_gunicorn(profile, workers, environment):
+    """Starts gunicorn with backend/gunicorn.conf.py and a worker profile on a free local port."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    env = dict(os.environ, **environment, GUNICORN_PROFILE=profile, GUNICORN_WORKERS=str(workers),
+               GUNICORN_LOGLEVEL='warning')
+    process = subprocess.Popen([
+        sys.executable, '-m', 'gunicorn', '--config', os.path.join(PROJECT_ROOT, 'backend', 'gunicorn.conf.py'),
+        '--bind', f'127.0.0.1:{port}', '--access-logfile', os.devnull, 'backend.wsgi:app'
+    ], cwd=PROJECT_ROOT, env=env)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def wait_for_flight_plans(target, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = requests.get(f"{target}/api/flight-plans", timeout=2)
+            if int(response.headers.get('X-Flight-Plan-Seq', 0)) > 0:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def run_load(target, duration, concurrency, warmup):
+    """Runs `concurrency` clients, each cycling through ENDPOINTS by weight, and returns their samples."""
+    schedule = [path for path, weight in ENDPOINTS for _ in range(weight)]
+    samples = defaultdict(list)
+    samples_lock = threading.Lock()
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def client(offset):
+        session = requests.Session()
+        local = defaultdict(list)
+        index = offset
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            path = schedule[index % len(schedule)]
+            index += 1
+            try:
+                ok = session.get(f"{target}{path}", timeout=30).status_code < 500
+            except requests.RequestException:
+                ok = False
+            finished = time.monotonic()
+            if now >= measure_from:
+                local[path].append((finished - now, ok))
+        with samples_lock:
+            for path, observations in local.items():
+                samples[path].extend(observations)
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regressions against a saved baseline."""
+    regressions = []
+    for path, result in results.items():
+        if result["errors"]:
+            regressions.append(f"{path}: {result['errors']} failed requests")
+        previous = baseline.get("endpoints", {}).get(path)
+        if previous and result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{path}: p95 {result['p95_ms']}ms vs baseline {previous['p95_ms']}ms")
+    return regressions
+
+
+def print_report(report):
+    print(f"\n{report['concurrency']} clients for {report['duration']}s against {report['server']} at {report['target']}")
+    print(f"{'endpoint':<22}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for path, r in list(report["endpoints"].items()) + [('total', report["total"])]:
+        print(f"{path:<22}{r['requests']:>10}{r['errors']:>8}{r['rps']:>9}{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10, help="measured seconds (default 10)")
+    parser.add_argument('--warmup', type=float, default=2, help="unmeasured seconds first (default 2)")
+    parser.add_argument('--concurrency', type=int, default=16, help="concurrent clients (default 16)")
+    parser.add_argument('--message-rate', type=float, default=20, help="24data WebSocket messages/s (default 20)")
+    parser.add_argument('--upstream-latency', type=float, default=0.05, help="24data REST delay in seconds")
+    parser.add_argument('--db-latency', type=float, default=0.02, help="PostgREST delay in seconds")
+    parser.add_argument('--db-jitter', type=float, default=0.01, help="extra random PostgREST delay in seconds")
+    parser.add_argument('--uncached', action='store_true',
+                        help="disable the 24data response cache, so every /api/controllers waits on the upstream")
+    parser.add_argument('--target', help="load an already running server instead of starting one")
+    parser.add_argument('--gunicorn', metavar='PROFILE', help="serve with gunicorn and this GUNICORN_PROFILE")
+    parser.add_argument('--workers', type=int, default=1, help="gunicorn workers with --gunicorn (default 1)")
+    parser.add_argument('--stubs-only', action='store_true', help="only run the stand-ins and print their environment")
+    parser.add_argument('--save', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help="compare against results saved with --save")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed p95 growth over the baseline (default 0.2)")
+    args = parser.parse_args(argv)
+
+    replay = ReplayServer(message_rate=args.message_rate, latency=args.upstream_latency).start()
+    postgrest = PostgrestStub(latency=args.db_latency, jitter=args.db_jitter).start()
+    workdir = tempfile.mkdtemp(prefix='atc24-benchmark-')
+    environment = stub_environment(replay, postgrest, workdir)
+    if args.uncached:
+        environment.update(EXTERNAL_API_CACHE_TTL='0', EXTERNAL_API_STALE_TTL='0')
+
+    if args.stubs_only:
+        for name, value in environment.items():
+            print(f"export {name}={value}")
+        print("# Stand-ins running; Ctrl+C to stop", flush=True)
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            return 0
+
+    target, server, process = args.target, 'external', None
+    if args.gunicorn:
+        process, target = serve_gunicorn(args.gunicorn, args.workers, environment)
+        server = f"gunicorn {args.gunicorn} x{args.workers}"
+    elif target is None:
+        os.environ.update(environment)
+        _, target = serve_app()
+        server = 'werkzeug threaded (in-process)'
+    try:
+        if not wait_for_flight_plans(target):
+            print("warning: no flight plans were ingested; /api/flight-plans will measure the database fallback",
+                  file=sys.stderr)
+
+        started = time.monotonic()
+        samples = run_load(target, args.duration, args.concurrency, args.warmup)
+        elapsed = time.monotonic() - started - args.warmup
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+    results = summarize(samples, elapsed)
+    report = {
+        "target": target,
+        "server": server,
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "total": summarize({'total': [obs for observations in samples.values() for obs in observations]}, elapsed)['total'],
+        "endpoints": results,
+        "stand_ins": {
+            "websocket_messages_sent": replay.messages_sent,
+            "upstream_http_requests": replay.http_requests,
+            "postgrest_calls": {f"{method} {table}": count for (method, table), count in sorted(postgrest.calls.items())},
+        },
+    }
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
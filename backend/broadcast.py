@@ -0,0 +1,74 @@
+import queue
+import threading
+
+from .flight_plan_store import flight_plan_key
+
+
+class Subscription:
+    """A single streaming client's bounded queue of flight plan updates."""
+
+    def __init__(self, airport=None, maxsize=100):
+        self.airport = airport.strip().upper() if airport else None
+        self.dropped = False
+        self._queue = queue.Queue(maxsize=maxsize)
+
+    def matches(self, flight_plan):
+        if not self.airport:
+            return True
+        _, departure, arrival = flight_plan_key(flight_plan)
+        return self.airport in ((departure or '').upper(), (arrival or '').upper())
+
+    def offer(self, flight_plan):
+        """Queues a flight plan without blocking. Returns False if the queue is full."""
+        try:
+            self._queue.put_nowait(flight_plan)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout=None):
+        """Returns the next flight plan, or None if none arrived within `timeout` seconds."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class FlightPlanBroadcaster:
+    """
+    Fans new and updated flight plans out to streaming subscribers.
+
+    publish() never blocks the ingest loop: each subscriber has a bounded queue, and a
+    subscriber whose queue is full is marked as dropped and removed. Its stream then
+    tells the client to resync from /api/flight-plans.
+    """
+
+    def __init__(self, queue_size=100, max_subscribers=None):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, airport=None):
+        """Registers a new subscriber. Returns None if the subscriber limit has been reached."""
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                return None
+            subscription = Subscription(airport=airport, maxsize=self.queue_size)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, flight_plan):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.matches(flight_plan) and not subscription.offer(flight_plan):
+                subscription.dropped = True
+                self.unsubscribe(subscription)
+
+    def __len__(self):
+        return len(self._subscribers)
@@ -0,0 +1,153 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Every CachedResource created in this process, for metrics
+resources = []
+
+
+class CachedResource:
+    """
+    Caches the result of `loader` with single-flight, stale-while-revalidate semantics.
+
+    - Younger than `ttl`: the cached value is returned as-is.
+    - Younger than `ttl + stale_ttl`: the cached value is returned immediately and one
+      background refresh is started.
+    - Otherwise (or when nothing is cached yet): the caller waits for a fetch. Concurrent
+      callers share a single in-flight fetch instead of each calling `loader`.
+
+    If a fetch fails and any previous value exists, that value is served instead of the error.
+    A fetch that overlaps an invalidate() is discarded and run again, so its callers never
+    get a value read before the invalidation.
+    """
+
+    def __init__(self, loader, ttl, stale_ttl=0, name=None):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name or getattr(loader, '__name__', 'resource')
+        self._value = None
+        self._fetched_at = None
+        self._error = None
+        self._in_flight = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        resources.append(self)
+
+    def get(self):
+        """
+        Returns a (value, fetched_at, fetched_now) tuple, where `fetched_now` is True if
+        this call waited for a fresh fetch rather than being served from the cache.
+        """
+        with self._lock:
+            age = time.time() - self._fetched_at if self._fetched_at is not None else None
+            if age is not None and age < self.ttl:
+                self.hits += 1
+                return self._value, self._fetched_at, False
+            if age is not None and age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                if self._in_flight is None:
+                    self._in_flight = threading.Event()
+                    threading.Thread(target=self._refresh, name=f"refresh-{self.name}", daemon=True).start()
+                return self._value, self._fetched_at, False
+
+            self.misses += 1
+            in_flight = self._in_flight
+            if in_flight is None:
+                in_flight = self._in_flight = threading.Event()
+                leader = True
+            else:
+                leader = False
+
+        if leader:
+            self._refresh()
+        else:
+            in_flight.wait()
+
+        with self._lock:
+            if self._error is not None and self._fetched_at is None:
+                raise self._error
+            # If the fetch failed, this falls back to the last good value
+            return self._value, self._fetched_at, self._error is None
+
+    def _refresh(self):
+        while True:
+            with self._lock:
+                generation = self._generation
+            try:
+                value = self.loader()
+                error = None
+            except Exception as e:
+                value, error = None, e
+            with self._lock:
+                if generation != self._generation:
+                    # invalidate() ran during the fetch, which may have read the old data
+                    continue
+                if error is None:
+                    self._value = value
+                    self._fetched_at = time.time()
+                self._error = error
+                in_flight, self._in_flight = self._in_flight, None
+            in_flight.set()
+            return
+
+    def invalidate(self):
+        """Forgets the cached value so the next get() fetches a fresh one."""
+        with self._lock:
+            self._generation += 1
+            self._value = None
+            self._fetched_at = None
+            self._error = None
+
+
+class ChangeSignal:
+    """
+    Tells the worker processes on one host that some shared data changed. notify()
+    replaces a small file at `path`; changed() stats it at most once per
+    `check_interval` seconds and reports whether it was replaced since the last check.
+    The file is replaced rather than rewritten, so a new inode marks a change even
+    within the filesystem's timestamp granularity.
+    """
+
+    def __init__(self, path, check_interval=1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._version = self._read_version()
+        self._checked_at = time.time()
+
+    def _read_version(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def changed(self):
+        now = time.time()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        version = self._read_version()
+        if version == self._version:
+            return False
+        self._version = version
+        return True
+
+    def notify(self, note=''):
+        """Signals the other processes. The caller is expected to have updated its own state already."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(str(note))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to signal a change through {self.path}: {e}")
+            return
+        self._version = self._read_version()
@@ -0,0 +1,84 @@
+import queue
+import threading
+import time
+
+
+class ClientPool:
+    """
+    A bounded pool of reusable clients for one worker process.
+
+    Clients are created lazily by `factory` up to `max_size`. Once that many are checked
+    out, acquire() waits up to `timeout` seconds for one to be released before raising
+    TimeoutError. Wait times are recorded so the pool can be sized against request rate.
+    """
+
+    def __init__(self, factory, max_size=10, timeout=5.0, name='client-pool'):
+        self.factory = factory
+        self.max_size = max_size
+        self.timeout = timeout
+        self.name = name
+        self.created = 0
+        self.acquired = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Checks out a client, creating one if the pool has not reached `max_size`."""
+        try:
+            client = self._idle.get_nowait()
+        except queue.Empty:
+            client = None
+
+        if client is None:
+            with self._lock:
+                can_create = self.created < self.max_size
+                if can_create:
+                    self.created += 1
+            if can_create:
+                try:
+                    client = self.factory()
+                except Exception:
+                    with self._lock:
+                        self.created -= 1
+                    raise
+
+        if client is None:
+            started = time.monotonic()
+            try:
+                client = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                with self._lock:
+                    self.timeouts += 1
+                raise TimeoutError(f"No {self.name} client became free within {self.timeout}s")
+            waited = time.monotonic() - started
+            with self._lock:
+                self.waits += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+        with self._lock:
+            self.acquired += 1
+        return client
+
+    def release(self, client):
+        """Returns a checked-out client to the pool."""
+        self._idle.put(client)
+
+    def stats(self):
+        with self._lock:
+            idle = self._idle.qsize()
+            return {
+                "max_size": self.max_size,
+                "size": self.created,
+                "idle": idle,
+                "in_use": self.created - idle,
+                "acquired": self.acquired,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.waits * 1000, 2) if self.waits else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+            }
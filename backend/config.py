@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,11 +15,28 @@ class Config:
     SESSION_COOKIE_SAMESITE = 'None'
     SESSION_COOKIE_SECURE = True
     PERMANENT_SESSION_LIFETIME = os.environ.get('PERMANENT_SESSION_LIFETIME', 2592000) # 30 days in seconds
+    # 'cookie' keeps the whole session in the signed cookie. 'file' (shared by the workers on
+    # one host), 'memory' (single worker only) or 'package.module:Class' (a SessionBackend)
+    # keep it on the server, with only an opaque ID in the cookie (see session_store.py).
+    SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cookie')
+    SESSION_FILE_DIR = os.environ.get('SESSION_FILE_DIR') or os.path.join(tempfile.gettempdir(), 'atc24_sessions')
+    SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', 10000)) # sessions kept in memory per worker
+    SESSION_REFRESH_INTERVAL = int(os.environ.get('SESSION_REFRESH_INTERVAL', 86400)) # seconds between cookie refreshes
+    SESSION_TRANSIENT_LIFETIME = int(os.environ.get('SESSION_TRANSIENT_LIFETIME', 14400)) # seconds a non-permanent session outlives its last refresh
 
     # Supabase
     SUPABASE_URL = os.environ.get("SUPABASE_URL")
     SUPABASE_ANON_KEY = os.environ.get("SUPABASE_ANON_KEY")
     SUPABASE_SERVICE_KEY = os.environ.get("SUPABASE_SERVICE_KEY")
+    # Session-aware clients kept per worker process
+    SUPABASE_POOL_SIZE = int(os.environ.get('SUPABASE_POOL_SIZE', 10))
+    SUPABASE_POOL_TIMEOUT = float(os.environ.get('SUPABASE_POOL_TIMEOUT', 5.0)) # seconds
+
+    # Write-behind queue for page visits, debug logs and clearance tracking
+    WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 100))
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL', 2.0)) # seconds
+    WRITE_BEHIND_MAX_QUEUE = int(os.environ.get('WRITE_BEHIND_MAX_QUEUE', 10000))
+    WRITE_BEHIND_ENQUEUE_TIMEOUT = float(os.environ.get('WRITE_BEHIND_ENQUEUE_TIMEOUT', 0.05)) # seconds
 
     # Discord OAuth
     DISCORD_CLIENT_ID = os.environ.get("DISCORD_CLIENT_ID")
@@ -36,9 +54,89 @@ class Config:
     # Admin
     SUPER_ADMIN_DISCORD_ID = os.environ.get('SUPER_ADMIN_DISCORD_ID', '1200035083550208042')
     SUPER_ADMIN_USERNAME = os.environ.get('SUPER_ADMIN_USERNAME', 'h.a.s2')
+    # is_admin/roles are re-read from discord_users at most every PERMISSION_CACHE_TTL seconds per
+    # user. Admin user changes take effect at once in the worker that made them and, through
+    # the mtime of PERMISSION_SIGNAL_PATH, within a second in every other worker on the host.
+    PERMISSION_CACHE_TTL = int(os.environ.get('PERMISSION_CACHE_TTL', 30)) # seconds
+    PERMISSION_CACHE_SIZE = int(os.environ.get('PERMISSION_CACHE_SIZE', 1000)) # users kept in memory per worker
+    PERMISSION_SIGNAL_PATH = os.environ.get('PERMISSION_SIGNAL_PATH') or os.path.join(tempfile.gettempdir(), 'atc24_permissions.signal')
+    # /api/settings is served from memory; saving the settings invalidates every worker on the
+    # host through the mtime of SETTINGS_SIGNAL_PATH, and the TTL catches edits made elsewhere.
+    SETTINGS_CACHE_TTL = int(os.environ.get('SETTINGS_CACHE_TTL', 300)) # seconds
+    SETTINGS_SIGNAL_PATH = os.environ.get('SETTINGS_SIGNAL_PATH') or os.path.join(tempfile.gettempdir(), 'atc24_settings.signal')
 
     # 24Data API
-    DATA_API_BASE_URL = 'https://24data.ptfs.app'
+    # Overridable so the benchmarks in backend/benchmarks can point at a local replay server
+    DATA_API_BASE_URL = os.environ.get('DATA_API_BASE_URL', 'https://24data.ptfs.app')
     DATA_API_CONTROLLERS_URL = f'{DATA_API_BASE_URL}/controllers'
     DATA_API_ATIS_URL = f'{DATA_API_BASE_URL}/atis'
-    DATA_API_WSS_URL = 'wss://24data.ptfs.app/wss'
+    DATA_API_WSS_URL = os.environ.get('DATA_API_WSS_URL', 'wss://24data.ptfs.app/wss')
+    # Controllers/ATIS responses are served from cache for this long, then served stale
+    # for up to EXTERNAL_API_STALE_TTL more seconds while one background refresh runs.
+    EXTERNAL_API_CACHE_TTL = int(os.environ.get('EXTERNAL_API_CACHE_TTL', 15))
+    EXTERNAL_API_STALE_TTL = int(os.environ.get('EXTERNAL_API_STALE_TTL', 300))
+    # Background health probes of the 24data REST endpoints, shown on the status page
+    HEALTH_PROBE_INTERVAL = int(os.environ.get('HEALTH_PROBE_INTERVAL', 30)) # seconds
+    HEALTH_PROBE_TIMEOUT = int(os.environ.get('HEALTH_PROBE_TIMEOUT', 5)) # seconds
+    HEALTH_PROBE_HISTORY = int(os.environ.get('HEALTH_PROBE_HISTORY', 120)) # probes kept per service
+
+    # JSON codec for 24data messages, API responses and the shared snapshot: 'auto' uses
+    # orjson when it is installed, 'stdlib' always uses the json module
+    JSON_CODEC = os.environ.get('JSON_CODEC', 'auto')
+
+    # Prometheus metrics at /metrics, readable from localhost only
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Opt-in sampling profiler for admin-selected requests and the ingest loop. Collapsed
+    # stacks (flamegraph.pl / speedscope input) are written to PROFILE_OUTPUT_DIR.
+    PROFILE_OUTPUT_DIR = os.environ.get('PROFILE_OUTPUT_DIR') or os.path.join(tempfile.gettempdir(), 'atc24_profiles')
+    PROFILE_SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', 0.005)) # seconds between stack samples
+    PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', 200)) # oldest profiles are deleted beyond this
+
+    # Level of the backend.* loggers written to stderr; app_errors.log only keeps ERROR and above
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+    # Most recent error log records kept in memory. They serve the newest page of the error log
+    # while no other worker has written to app_errors.log since, and when the files cannot be read.
+    ERROR_LOG_BUFFER_SIZE = int(os.environ.get('ERROR_LOG_BUFFER_SIZE', 500))
+
+    # Admin dashboard analytics snapshot
+    ANALYTICS_CACHE_TTL = int(os.environ.get('ANALYTICS_CACHE_TTL', 60)) # seconds
+    # Row counts shown in the admin table browser are planner estimates, refreshed in the background
+    TABLE_COUNT_ESTIMATE_TTL = int(os.environ.get('TABLE_COUNT_ESTIMATE_TTL', 300)) # seconds
+    TABLE_COUNT_ESTIMATE_STALE_TTL = int(os.environ.get('TABLE_COUNT_ESTIMATE_STALE_TTL', 3600)) # seconds
+
+    # Flight Plan Store
+    MAX_FLIGHT_PLANS = int(os.environ.get('MAX_FLIGHT_PLANS', 20000))
+    FLIGHT_PLAN_TTL = int(os.environ.get('FLIGHT_PLAN_TTL', 7200)) # 2 hours in seconds
+
+    # Flight plan ingestion: 'local' runs a WebSocket client in every worker, 'shared' runs a
+    # single ingester process (started by gunicorn.conf.py) that publishes the store to a
+    # snapshot file plus a journal of changes (see flight_plan_snapshot.py). 'shared' removes
+    # the per-worker upstream connections, not the per-worker memory: every worker still
+    # replays the files into its own copy of the store (about 1.2 KB per plan in each worker).
+    FLIGHT_PLAN_INGEST_MODE = os.environ.get('FLIGHT_PLAN_INGEST_MODE', 'local')
+    FLIGHT_PLAN_SHARED_PATH = os.environ.get('FLIGHT_PLAN_SHARED_PATH') or os.path.join(
+        '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'atc24_flight_plans.snapshot'
+    )
+    FLIGHT_PLAN_SHARED_INTERVAL = float(os.environ.get('FLIGHT_PLAN_SHARED_INTERVAL', 1.0)) # seconds
+    # Processes that ingest checkpoint the store here (in the same snapshot format) and reload
+    # it on startup, so restarts and deploys begin with a warm cache. An interval of 0
+    # disables checkpoints.
+    FLIGHT_PLAN_CHECKPOINT_PATH = os.environ.get('FLIGHT_PLAN_CHECKPOINT_PATH') or os.path.join(
+        tempfile.gettempdir(), 'atc24_flight_plans.checkpoint'
+    )
+    FLIGHT_PLAN_CHECKPOINT_INTERVAL = float(os.environ.get('FLIGHT_PLAN_CHECKPOINT_INTERVAL', 30)) # seconds
+    # Optional lock file that limits the 24data WebSocket client to one process per host.
+    INGEST_LOCK_FILE = os.environ.get('INGEST_LOCK_FILE')
+    # Ingested flight plans are upserted into flight_plans_received in the background
+    FLIGHT_PLAN_PERSIST_ENABLED = os.environ.get('FLIGHT_PLAN_PERSIST_ENABLED', 'true').lower() == 'true'
+    FLIGHT_PLAN_PERSIST_FLUSH_INTERVAL = float(os.environ.get('FLIGHT_PLAN_PERSIST_FLUSH_INTERVAL', 5.0)) # seconds
+
+    # Live flight plan stream (/api/flight-plans/stream). Each open stream holds a worker
+    # thread, so only enable it with threaded or async gunicorn workers.
+    FLIGHT_PLAN_STREAM_ENABLED = os.environ.get('FLIGHT_PLAN_STREAM_ENABLED', 'false').lower() == 'true'
+    FLIGHT_PLAN_STREAM_QUEUE_SIZE = int(os.environ.get('FLIGHT_PLAN_STREAM_QUEUE_SIZE', 100))
+    FLIGHT_PLAN_STREAM_MAX_SUBSCRIBERS = int(os.environ.get('FLIGHT_PLAN_STREAM_MAX_SUBSCRIBERS', 500))
+    FLIGHT_PLAN_STREAM_KEEPALIVE = int(os.environ.get('FLIGHT_PLAN_STREAM_KEEPALIVE', 15)) # seconds
+    FLIGHT_PLAN_STREAM_MAX_AGE = int(os.environ.get('FLIGHT_PLAN_STREAM_MAX_AGE', 300)) # seconds before the client reconnects
@@ -1,24 +1,125 @@
-from supabase import create_client, Client
-from supabase.lib.client_options import ClientOptions
+import importlib.util
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+from flask import g
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_TIMEOUT
+from supabase import create_client, Client, ClientOptions
+from .client_pool import ClientPool
 from .config import Config
 from .flask_storage import FlaskSessionStorage
+from .flight_plan_store import flight_plan_key
+from .metrics import SUPABASE_EVENT_HOOKS
+from .write_behind import BatchWriter
+
+logger = logging.getLogger(__name__)
 
 supabase_admin: Client = None
 
+# Analytics and log rows are written in the background so requests never wait on them
+write_behind = BatchWriter(
+    lambda: supabase_admin,
+    batch_size=Config.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=Config.WRITE_BEHIND_FLUSH_INTERVAL,
+    max_queue=Config.WRITE_BEHIND_MAX_QUEUE,
+    enqueue_timeout=Config.WRITE_BEHIND_ENQUEUE_TIMEOUT
+)
+
+# Ingested flight plans, upserted on their composite key. The ingest loop never waits on
+# this queue (enqueue_timeout=0); a full queue drops rows, which the next update re-sends.
+flight_plan_writer = BatchWriter(
+    lambda: supabase_admin,
+    batch_size=Config.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=Config.FLIGHT_PLAN_PERSIST_FLUSH_INTERVAL,
+    max_queue=Config.WRITE_BEHIND_MAX_QUEUE,
+    enqueue_timeout=0,
+    on_conflict='callsign,departure,destination',
+    name='flight-plan-writer'
+)
+
+# Session-aware clients are pooled per worker process; see get_supabase_client()
+_client_pool = None
+_client_pool_pid = None
+_client_pool_lock = threading.Lock()
+
+def _create_http_client(limits=None):
+    """Returns a keep-alive httpx client (HTTP/2 when h2 is installed) that reports request latency."""
+    return httpx.Client(
+        http2=importlib.util.find_spec('h2') is not None,
+        timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+        follow_redirects=True,
+        limits=limits or httpx.Limits(),
+        event_hooks=SUPABASE_EVENT_HOOKS
+    )
+
+def _create_client_pool():
+    # One connection pool shared by every pooled client
+    http_client = _create_http_client(
+        httpx.Limits(max_connections=Config.SUPABASE_POOL_SIZE, max_keepalive_connections=Config.SUPABASE_POOL_SIZE)
+    )
+
+    def factory():
+        return create_client(
+            Config.SUPABASE_URL,
+            Config.SUPABASE_ANON_KEY,
+            options=ClientOptions(storage=FlaskSessionStorage(), httpx_client=http_client)
+        )
+
+    return ClientPool(factory, max_size=Config.SUPABASE_POOL_SIZE, timeout=Config.SUPABASE_POOL_TIMEOUT, name='supabase')
+
+def get_client_pool():
+    """Returns this worker's client pool, creating a fresh one after a fork."""
+    global _client_pool, _client_pool_pid
+    pid = os.getpid()
+    if _client_pool_pid != pid:
+        with _client_pool_lock:
+            if _client_pool_pid != pid:
+                _client_pool = _create_client_pool()
+                _client_pool_pid = pid
+    return _client_pool
+
+def _bind_session(client):
+    """Points a pooled client's Authorization header at the current user's session, if any."""
+    try:
+        auth_session = client.auth.get_session()
+    except Exception:
+        auth_session = None
+    token = auth_session.access_token if auth_session else Config.SUPABASE_ANON_KEY
+    client.options.headers["Authorization"] = f"Bearer {token}"
+    client.postgrest.auth(token)
+
 def get_supabase_client():
     """
     Returns a Supabase client that is aware of the user's session.
+    The client is checked out of the worker's pool for the rest of the request.
     """
     if not Config.SUPABASE_URL or 'your_supabase_url' in Config.SUPABASE_URL:
         raise ValueError("SUPABASE_URL is not set or is a placeholder.")
     if not Config.SUPABASE_ANON_KEY:
         raise ValueError("SUPABASE_ANON_KEY is not set.")
 
-    return create_client(
-        Config.SUPABASE_URL,
-        Config.SUPABASE_ANON_KEY,
-        options=ClientOptions(storage=FlaskSessionStorage())
-    )
+    client = g.get('supabase_client')
+    if client is None:
+        pool = get_client_pool()
+        client = pool.acquire()
+        g.supabase_client = client
+        g.supabase_client_pool = pool
+        _bind_session(client)
+    return client
+
+def release_supabase_client(exc=None):
+    """Returns the request's pooled client, if it took one. Registered as a teardown handler."""
+    client = g.pop('supabase_client', None)
+    pool = g.pop('supabase_client_pool', None)
+    if client is not None and pool is not None:
+        pool.release(client)
+
+def client_pool_stats():
+    return _client_pool.stats() if _client_pool is not None and _client_pool_pid == os.getpid() else None
 
 def init_db():
     """
@@ -34,49 +135,66 @@ def init_db():
         raise ValueError("SUPABASE_SERVICE_KEY is not set or is a placeholder. Admin operations will fail.")
 
     try:
-        supabase_admin = create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_KEY)
-        print("Supabase admin client initialized successfully.")
+        supabase_admin = create_client(
+            Config.SUPABASE_URL,
+            Config.SUPABASE_SERVICE_KEY,
+            options=ClientOptions(httpx_client=_create_http_client())
+        )
+        # The PostgREST client is created lazily; create it now so request threads never race on it
+        supabase_admin.postgrest
+        logger.info("Supabase admin client initialized successfully.")
 
     except Exception as e:
-        print(f"CRITICAL: Supabase client failed to initialize: {e}")
+        logger.critical("Supabase client failed to initialize: %s", e)
         raise
 
 def log_to_db(level, message, source='backend', data=None):
-    """Inserts a log entry into the debug_logs table."""
+    """Queues a log entry for the debug_logs table."""
     if not supabase_admin:
-        print(f"[{level.upper()}] DB_LOG_FAIL: {message}")
+        logger.warning("[%s] DB_LOG_FAIL: %s", level.upper(), message)
         return
 
-    try:
-        log_entry = {
-            "level": level,
-            "message": message,
-            "source": source,
-            "data": data
-        }
-        supabase_admin.from_('debug_logs').insert(log_entry).execute()
-    except Exception as e:
-        print(f"CRITICAL: Failed to write log to database: {e}")
+    log_entry = {
+        "level": level,
+        "message": message,
+        "source": source,
+        "data": data
+    }
+    if not write_behind.enqueue('debug_logs', log_entry):
+        logger.critical("Write-behind queue full, dropped log: %s", message)
 
 def track_page_visit(session, request):
-    """Tracks a page visit in the database."""
-    supabase = get_supabase_client()
-    if not supabase:
+    """Queues a page visit for the page_visits table."""
+    is_first_visit = session.get('page_views', 0) == 0
+    session['page_views'] = session.get('page_views', 0) + 1
+
+    visit_data = {
+        "page_path": request.path,
+        "user_agent": request.user_agent.string,
+        "referrer": request.referrer,
+        "session_id": session.get('session_id'),
+        "is_first_visit": is_first_visit,
+        "user_id": session.get('user', {}).get('id'),
+        "discord_username": session.get('user', {}).get('username')
+    }
+    write_behind.enqueue('page_visits', visit_data)
+
+def persist_flight_plan(flight_plan):
+    """Queues an ingested flight plan for upsert into the flight_plans_received table."""
+    if not supabase_admin or not Config.FLIGHT_PLAN_PERSIST_ENABLED:
+        return
+    callsign, departure, destination = flight_plan_key(flight_plan)
+    if not callsign:
         return
 
-    try:
-        is_first_visit = session.get('page_views', 0) == 0
-        session['page_views'] = session.get('page_views', 0) + 1
-
-        visit_data = {
-            "page_path": request.path,
-            "user_agent": request.user_agent.string,
-            "referrer": request.referrer,
-            "session_id": session.get('session_id'),
-            "is_first_visit": is_first_visit,
-            "user_id": session.get('user', {}).get('id'),
-            "discord_username": session.get('user', {}).get('username')
-        }
-        supabase.from_('page_visits').insert(visit_data).execute()
-    except Exception as e:
-        log_to_db('error', 'Failed to track page visit', data={'error': str(e)})
+    row = {
+        "callsign": callsign,
+        "departure": departure or '',
+        "destination": destination or '',
+        "route": flight_plan.get("route"),
+        "flight_level": flight_plan.get("flightlevel") or flight_plan.get("flight_level"),
+        "source": flight_plan.get("source"),
+        "raw_data": flight_plan,
+        "updated_at": datetime.fromtimestamp(flight_plan.get("timestamp") or time.time(), timezone.utc).isoformat()
+    }
+    flight_plan_writer.enqueue('flight_plans_received', row)
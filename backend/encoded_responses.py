@@ -0,0 +1,97 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+
+class EncodedPayload:
+    """
+    A JSON response body serialized once, with ready-to-send gzip (and brotli, when
+    installed) variants and a strong ETag per encoding.
+    """
+
+    def __init__(self, data, etag=None):
+        self.body = current_app.json.dumps(data).encode('utf-8')
+        self.etag = etag or hashlib.sha1(self.body).hexdigest()
+        # In order of preference when the client accepts several
+        self.encodings = {}
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            if brotli is not None:
+                self.encodings['br'] = brotli.compress(self.body, quality=5)
+            self.encodings['gzip'] = gzip.compress(self.body, compresslevel=6, mtime=0)
+        self.encodings['identity'] = self.body
+
+    def etag_for(self, encoding):
+        return self.etag if encoding == 'identity' else f"{self.etag}-{encoding}"
+
+
+def not_modified(etag, encodings=('identity', 'gzip', 'br')):
+    """
+    Returns a 304 response if the request's If-None-Match matches any encoding's variant
+    of `etag`, otherwise None. Lets callers skip building a payload altogether.
+    """
+    for encoding in encodings:
+        variant = etag if encoding == 'identity' else f"{etag}-{encoding}"
+        if request.if_none_match.contains(variant):
+            response = current_app.response_class(status=304)
+            response.set_etag(variant)
+            response.vary.add('Accept-Encoding')
+            return response
+    return None
+
+
+def send_payload(payload, status=200):
+    """Builds a response for `payload` in the best encoding the client accepts, or a 304."""
+    response = not_modified(payload.etag, payload.encodings)
+    if response is not None:
+        return response
+
+    encoding = request.accept_encodings.best_match(list(payload.encodings), default='identity')
+    response = current_app.response_class(payload.encodings[encoding], status=status, mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.set_etag(payload.etag_for(encoding))
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+class PayloadCache:
+    """
+    Holds pre-encoded payloads for one data source, keyed by request variant (e.g. query
+    filters). Every entry is dropped as soon as the source's version changes.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._version = None
+        self._payloads = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, key, build):
+        """Returns the payload for `key` at `version`, calling `build()` to create it if needed."""
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._payloads.clear()
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                return payload
+
+        payload = build()
+        with self._lock:
+            if version == self._version:
+                self._payloads[key] = payload
+                while len(self._payloads) > self.max_entries:
+                    self._payloads.popitem(last=False)
+        return payload
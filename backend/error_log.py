@@ -0,0 +1,216 @@
+import logging
+import os
+import re
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+from .config import Config
+
+LOG_FILE = 'app_errors.log'
+BACKUP_COUNT = 5
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Matches the first line of a record written with LOG_FORMAT; other lines are continuations
+RECORD_START = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - ([A-Z]+) - (.*)$')
+READ_BLOCK_SIZE = 8192
+
+
+def parse_level(level):
+    """Turns a level name ('error', 'WARNING', 'all') or number into a logging level number."""
+    if level is None or str(level).lower() == 'all':
+        return logging.NOTSET
+    if isinstance(level, int) or str(level).isdigit():
+        return int(level)
+    levelno = logging.getLevelName(str(level).upper())
+    if not isinstance(levelno, int):
+        raise ValueError(f"Unknown log level '{level}'")
+    return levelno
+
+
+def _make_record(timestamp, levelname, message, details=None):
+    levelno = logging.getLevelName(levelname)
+    return {
+        "timestamp": timestamp,
+        "level": levelname.lower(),
+        "levelno": levelno if isinstance(levelno, int) else logging.NOTSET,
+        "message": message,
+        "details": details or None,
+    }
+
+
+def format_record(record):
+    """Renders a structured record back into its log file form."""
+    line = f"{record['timestamp']} - {record['level'].upper()} - {record['message']}"
+    return f"{line}\n{record['details']}" if record["details"] else line
+
+
+class PositionedFileHandler(RotatingFileHandler):
+    """
+    A RotatingFileHandler that notes where each record landed in the file, as
+    record.log_position = (inode, start, end), for the RingBufferHandler installed after it.
+    """
+
+    def emit(self, record):
+        super().emit(record)
+        if self.stream is None:
+            return
+        try:
+            fd = self.stream.fileno()
+            # The file is opened for appending, so the offset is the end of this record
+            end = os.lseek(fd, 0, os.SEEK_CUR)
+            length = len((self.format(record) + self.terminator).encode(self.stream.encoding))
+            record.log_position = (os.fstat(fd).st_ino, end - length, end)
+        except (OSError, ValueError):
+            pass
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent `capacity` log records in memory as structured dicts."""
+
+    def __init__(self, capacity=500, level=logging.NOTSET):
+        super().__init__(level)
+        self._records = deque(maxlen=capacity)  # (record, log_position or None)
+        self._buffer_lock = threading.Lock()
+
+    def emit(self, record):
+        try:
+            self.format(record)  # fills in asctime and exc_text
+            details = "\n".join(part for part in (record.exc_text, record.stack_info) if part)
+            entry = _make_record(record.asctime, record.levelname, record.getMessage(), details)
+            with self._buffer_lock:
+                self._records.append((entry, getattr(record, 'log_position', None)))
+        except Exception:
+            self.handleError(record)
+
+    def records(self, limit, min_level=logging.NOTSET):
+        """Returns up to `limit` of the buffered records at `min_level` or above, newest first."""
+        with self._buffer_lock:
+            snapshot = list(self._records)
+        matches = []
+        for record, _ in reversed(snapshot):
+            if record["levelno"] >= min_level:
+                matches.append(record)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def newest_in_file(self, limit, min_level, path):
+        """
+        Returns (records, next_cursor) like read_log_records(), or None unless the buffered
+        records run back unbroken from the end of `path`. Another process writing to the
+        file, a rotation or a record that is not buffered all break the chain.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._buffer_lock:
+            snapshot = list(self._records)
+        expected_end = stat.st_size
+        matches = []
+        for record, position in reversed(snapshot):
+            if position is None or position[0] != stat.st_ino or position[2] != expected_end:
+                return None
+            expected_end = position[1]
+            if record["levelno"] >= min_level:
+                matches.append(record)
+                if len(matches) == limit:
+                    return matches, f"pos:0:{expected_end}"
+        return None
+
+
+# Installed on the app logger by create_app
+error_log_buffer = RingBufferHandler(capacity=Config.ERROR_LOG_BUFFER_SIZE)
+
+
+def _lines_backward(path, end=None):
+    """
+    Yields (offset, line) pairs from the end of `path` (or from byte `end`) towards
+    its start, reading fixed-size blocks so only the tail that is needed is read.
+    """
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END) if end is None else min(end, f.seek(0, os.SEEK_END))
+        remainder = b''
+        while position > 0:
+            read_size = min(READ_BLOCK_SIZE, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            lines = chunk.split(b'\n')
+            # The first piece may be the tail of a line that starts in an earlier block
+            remainder = lines.pop(0)
+            offset = position + len(remainder) + 1
+            line_offsets = []
+            for line in lines:
+                line_offsets.append((offset, line))
+                offset += len(line) + 1
+            for line_offset, line in reversed(line_offsets):
+                if line:
+                    yield line_offset, line.decode('utf-8', errors='replace')
+        if remainder:
+            yield 0, remainder.decode('utf-8', errors='replace')
+
+
+def read_log_records(limit, min_level=logging.NOTSET, cursor=None, path=LOG_FILE, backup_count=BACKUP_COUNT):
+    """
+    Reads up to `limit` records at `min_level` or above, newest first, walking backward
+    through `path` and then its rotated backups (`path.1` ... `path.N`).
+
+    Returns (records, next_cursor). Pass next_cursor back to continue with older records;
+    it is None once the oldest backup is exhausted. Cursors are a file and a byte
+    position, so records that share a timestamp are never skipped, but a rotation
+    between two requests can make the next page skip or repeat records.
+    """
+    file_index, end = 0, None
+    if cursor:
+        kind, _, value = cursor.partition(':')
+        index, _, offset = value.partition(':')
+        try:
+            if kind != 'pos':
+                raise ValueError
+            file_index, end = int(index), int(offset)
+        except ValueError:
+            raise ValueError("Invalid cursor")
+
+    records = []
+    for index in range(file_index, backup_count + 1):
+        file_path = path if index == 0 else f"{path}.{index}"
+        if not os.path.exists(file_path):
+            continue
+        continuation = []
+        for offset, line in _lines_backward(file_path, end if index == file_index else None):
+            match = RECORD_START.match(line)
+            if not match:
+                continuation.append(line)
+                continue
+            timestamp, levelname, message = match.groups()
+            details = "\n".join(reversed(continuation))
+            continuation = []
+            record = _make_record(timestamp, levelname, message, details)
+            if record["levelno"] >= min_level:
+                records.append(record)
+                if len(records) == limit:
+                    return records, f"pos:{index}:{offset}"
+    return records, None
+
+
+def recent_log_records(limit, min_level=logging.NOTSET, cursor=None, path=LOG_FILE):
+    """
+    Returns (records, next_cursor) for the newest `limit` records at `min_level` or above.
+
+    The newest page comes from this worker's in-memory buffer while its records are still
+    the newest in `path`, as they are when no other worker has logged since. Otherwise, and
+    for every older page, the files are read backward from where the last page ended. The
+    buffer is also the fallback when the files cannot be read.
+    """
+    if cursor is None:
+        page = error_log_buffer.newest_in_file(limit, min_level, path)
+        if page is not None:
+            return page
+    try:
+        return read_log_records(limit, min_level, cursor, path=path)
+    except OSError:
+        if cursor is not None:
+            raise
+        return error_log_buffer.records(limit, min_level), None
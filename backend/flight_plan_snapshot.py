@@ -0,0 +1,292 @@
+"""
+Snapshot and journal files of the flight plan store.
+
+In 'shared' ingest mode the ingester publishes its store to these files and every worker
+replays them into its own FlightPlanStore. That removes the duplicated 24data connections,
+but not the duplicated memory: each worker still holds a fully indexed copy. Ingesting
+processes also write a snapshot as a checkpoint to warm-start from after a restart.
+
+The files are JSON behind a small struct header. They are read with plain reads and
+parsed in full; nothing is served from a memory mapping.
+"""
+
+import logging
+import os
+import struct
+import tempfile
+import time
+
+from . import json_codec
+
+logger = logging.getLogger(__name__)
+
+# Snapshot layout: fixed header followed by a JSON object holding the store's
+# exported state (see FlightPlanStore.export_state) and free-form metadata such as the
+# ingester's stats.
+SNAPSHOT_MAGIC = b'FPS1'
+SNAPSHOT_HEADER = struct.Struct('<4sQdI')  # magic, store version, written at, payload length
+
+# Journal layout: a header naming the snapshot it follows, then one record per publish
+# holding the store's changes since the previous one (see FlightPlanStore.export_changes)
+# and the metadata. Records are appended with a single write; a reader that finds an
+# incomplete record at the end leaves it for its next read.
+JOURNAL_MAGIC = b'FPJ1'
+JOURNAL_HEADER = struct.Struct('<4s16sQ')  # magic, epoch, snapshot version
+JOURNAL_RECORD = struct.Struct('<QQdI')  # base version, new version, written at, payload length
+
+
+def write_snapshot(path, state, meta=None):
+    """
+    Atomically writes an exported flight plan store state to `path`.
+    The file is written next to the target and renamed over it, so readers never see a partial snapshot.
+    """
+    payload = json_codec.dumpb({"state": state, "meta": meta or {}})
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.flight_plans.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, state["version"], time.time(), len(payload)))
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path):
+    """
+    Reads a snapshot written by write_snapshot().
+    Returns a (written_at, state, meta) tuple, or None if the file is missing or invalid.
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(SNAPSHOT_HEADER.size)
+            if len(header) < SNAPSHOT_HEADER.size:
+                return None
+            magic, _, written_at, length = SNAPSHOT_HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC:
+                return None
+            payload = f.read(length)
+            if len(payload) < length:
+                return None
+    except FileNotFoundError:
+        return None
+    data = json_codec.loads(payload)
+    return written_at, data["state"], data["meta"]
+
+
+def start_journal(path, epoch, version):
+    """Atomically replaces the journal at `path` with an empty one following snapshot `version`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.flight_plans.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, epoch.encode('ascii'), version))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def append_journal(path, changes, meta=None):
+    """Appends one record of FlightPlanStore.export_changes() output. Returns the bytes written."""
+    payload = json_codec.dumpb({
+        "changes": {name: changes[name] for name in ("plans", "seqs", "tombstones")},
+        "meta": meta or {},
+    })
+    record = JOURNAL_RECORD.pack(changes["base"], changes["version"], time.time(), len(payload)) + payload
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+    try:
+        os.write(fd, record)
+    finally:
+        os.close(fd)
+    return len(record)
+
+
+def load_checkpoint(store, path, max_age):
+    """
+    Warm-starts `store` from a snapshot at `path`, unless it is missing or was written
+    more than `max_age` seconds ago. Plans past the store's TTL are dropped as it loads.
+    Returns the number of plans loaded.
+    """
+    snapshot = read_snapshot(path)
+    if snapshot is None:
+        return 0
+    written_at, state, _ = snapshot
+    if time.time() - written_at > max_age:
+        return 0
+    store.load_state(state, new_epoch=True)
+    return len(store)
+
+
+class SnapshotPublisher:
+    """
+    Periodically publishes a FlightPlanStore to a snapshot file (ingester side).
+    The store is published whenever it changes, and at least every `heartbeat_intervals`
+    intervals so followers always see fresh metadata (0 disables the heartbeat, e.g. for
+    checkpoints nobody follows).
+
+    With `journal`, a publish appends only the changes since the previous one to
+    `path`.journal, and the full snapshot is rewritten only when the journal has grown
+    past the snapshot's size (or the store's epoch changed), so followers apply small
+    deltas instead of re-parsing the whole store.
+    """
+    HEARTBEAT_INTERVALS = 10
+
+    def __init__(self, store, path, interval, meta=None, heartbeat_intervals=HEARTBEAT_INTERVALS,
+                 name='flight plan snapshot', journal=False):
+        self.store = store
+        self.path = path
+        self.interval = interval
+        self.meta = meta
+        self.heartbeat_intervals = heartbeat_intervals
+        self.name = name
+        self.journal_path = f"{path}.journal" if journal else None
+        self._published = None  # (epoch, version)
+        self._published_at = 0
+        self._snapshot_size = 0
+        self._journal_size = 0
+
+    def publish(self):
+        published = (self.store.epoch, self.store.version)
+        heartbeat_due = self.heartbeat_intervals and time.time() - self._published_at >= self.interval * self.heartbeat_intervals
+        if published == self._published and not heartbeat_due:
+            return
+        meta = self.meta() if self.meta else None
+
+        changes = None
+        if (self.journal_path and self._published is not None and self._published[0] == self.store.epoch
+                and self._journal_size < self._snapshot_size):
+            changes = self.store.export_changes(self._published[1])
+        if changes is not None and changes["epoch"] == self._published[0]:
+            self._journal_size += append_journal(self.journal_path, changes, meta)
+            self._published = (changes["epoch"], changes["version"])
+        else:
+            state = self.store.export_state()
+            write_snapshot(self.path, state, meta)
+            self._snapshot_size = os.path.getsize(self.path)
+            if self.journal_path:
+                start_journal(self.journal_path, state["epoch"], state["version"])
+                self._journal_size = 0
+            self._published = (state["epoch"], state["version"])
+        self._published_at = time.time()
+
+    def run(self):
+        while True:
+            try:
+                self.publish()
+            except Exception as e:
+                logger.warning("Failed to publish %s: %s", self.name, e)
+            time.sleep(self.interval)
+
+
+class SnapshotFollower:
+    """
+    Keeps a FlightPlanStore in step with a SnapshotPublisher (worker side): the
+    snapshot is loaded when it is rewritten, and the journal records appended after it
+    are applied as they arrive. `on_update`, if given, is called for each plan updated
+    since the previous load.
+
+    Ingest is not duplicated, but memory is: every worker holds its own indexed copy of
+    the store, about 1.2 KB per plan (25 MB per worker at 20,000 plans).
+    """
+
+    def __init__(self, store, path, interval, on_update=None):
+        self.store = store
+        self.on_update = on_update
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.interval = interval
+        self.meta = {}
+        self.written_at = None
+        self._last_stat = None
+        self._snapshot_version = None
+        self._loaded_version = None
+        self._journal_inode = None
+        self._journal_offset = 0
+        self._high_water = None
+
+    def refresh(self):
+        # The publisher evicts and publishes the removals; evicting here as well would
+        # move this copy's sequence numbers away from the publisher's
+        self.store.ttl = None
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        current = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if current != self._last_stat:
+            snapshot = read_snapshot(self.path)
+            if snapshot is None:
+                return
+            written_at, state, meta = snapshot
+            version = (state["epoch"], state["version"])
+            # Skipped when the journal has already brought this copy to the same version
+            if version != self._loaded_version:
+                self.store.load_state(state)
+                self._loaded_version = version
+                self._notify(state["plans"])
+            self.meta = meta
+            self.written_at = written_at
+            self._snapshot_version = version
+            self._journal_inode = None
+            self._last_stat = current
+        self._follow_journal()
+
+    def _follow_journal(self):
+        try:
+            f = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self._journal_inode:
+                header = f.read(JOURNAL_HEADER.size)
+                if len(header) < JOURNAL_HEADER.size:
+                    return
+                magic, epoch, version = JOURNAL_HEADER.unpack(header)
+                # A journal for another snapshot: wait until the snapshot and journal agree
+                if magic != JOURNAL_MAGIC or (epoch.rstrip(b'\0').decode('ascii'), version) != self._snapshot_version:
+                    return
+                self._journal_inode = inode
+                self._journal_offset = JOURNAL_HEADER.size
+            f.seek(self._journal_offset)
+            data = f.read()
+
+        position = 0
+        while position + JOURNAL_RECORD.size <= len(data):
+            base, version, written_at, length = JOURNAL_RECORD.unpack_from(data, position)
+            end = position + JOURNAL_RECORD.size + length
+            if end > len(data):
+                break
+            if base != self._loaded_version[1]:
+                # Out of step with the journal; start over from the snapshot
+                self._last_stat = self._loaded_version = self._journal_inode = None
+                return
+            record = json_codec.loads(data[position + JOURNAL_RECORD.size:end])
+            changes = dict(record["changes"], version=version)
+            self.store.apply_changes(changes)
+            self._loaded_version = (self._loaded_version[0], version)
+            self._notify(changes["plans"])
+            self.meta = record["meta"]
+            self.written_at = written_at
+            position = end
+        self._journal_offset += position
+
+    def _notify(self, plans):
+        high_water = max((fp.get("timestamp", 0) for fp in plans), default=0)
+        if self.on_update and self._high_water is not None:
+            for flight_plan in plans:
+                if flight_plan.get("timestamp", 0) > self._high_water:
+                    self.on_update(flight_plan)
+        self._high_water = max(high_water, self._high_water or 0)
+
+    def run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Failed to load flight plan snapshot: %s", e)
+            time.sleep(self.interval)
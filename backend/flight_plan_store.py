@@ -0,0 +1,347 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+
+# Width of the time buckets used to answer `since` queries, in seconds.
+TIME_BUCKET_SECONDS = 60
+
+
+def flight_plan_key(flight_plan):
+    """
+    Returns the composite key that uniquely identifies a flight plan.
+    24data sends `departing`/`arriving`; `departure`/`arrival` are accepted as fallbacks.
+    """
+    return (
+        flight_plan.get("callsign"),
+        flight_plan.get("departing") or flight_plan.get("departure"),
+        flight_plan.get("arriving") or flight_plan.get("arrival"),
+    )
+
+
+def _normalize_airport(code):
+    return code.strip().upper() if code else None
+
+
+def plan_matches(flight_plan, departure=None, arrival=None, airport=None, callsign=None, since=None):
+    """Checks a single flight plan against the same filters FlightPlanStore.query() accepts."""
+    _, plan_departure, plan_arrival = flight_plan_key(flight_plan)
+    plan_departure, plan_arrival = _normalize_airport(plan_departure), _normalize_airport(plan_arrival)
+    if departure and plan_departure != _normalize_airport(departure):
+        return False
+    if arrival and plan_arrival != _normalize_airport(arrival):
+        return False
+    if airport and _normalize_airport(airport) not in (plan_departure, plan_arrival):
+        return False
+    if callsign and not (flight_plan.get("callsign") or "").upper().startswith(callsign.strip().upper()):
+        return False
+    if since is not None and flight_plan["timestamp"] < since:
+        return False
+    return True
+
+
+class FlightPlanStore:
+    """
+    Thread-safe, hash-indexed store for live flight plans.
+
+    Plans are keyed on (callsign, departure, arrival) so an upsert is O(1), and kept
+    in recency order (least recently updated first) so that capacity and TTL eviction
+    only ever have to look at the oldest entries. Expiry is tracked on the monotonic
+    clock (see _stored_at_for), so that order holds for plans with older timestamps
+    and across wall-clock steps. Secondary indexes by departure
+    airport, arrival airport and time bucket are maintained on every mutation so
+    filtered queries only touch the matching plans.
+
+    Every insert, update and removal is stamped with the next value of `version`, a
+    monotonically increasing sequence number. Because updates move a plan to the end,
+    the store is also ordered by sequence number, so changes_since() only walks the
+    plans that actually changed. Removals leave a bounded trail of tombstones.
+    `epoch` identifies the sequence; numbers from another epoch are meaningless.
+    """
+
+    def __init__(self, capacity, ttl=None, tombstone_limit=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.epoch = uuid.uuid4().hex[:12]
+        self.version = 0
+        # Upserts made through this instance; plans loaded from a snapshot are not counted
+        self.upserts = 0
+        self._plans = OrderedDict()
+        self._seqs = {}
+        # key -> time.monotonic() when stored; non-decreasing in recency order
+        self._stored_at = {}
+        self._tombstones = deque(maxlen=tombstone_limit or capacity)
+        # Removals at or below this sequence number may no longer have a tombstone
+        self._tombstone_floor = 0
+        self._by_departure = defaultdict(set)
+        self._by_arrival = defaultdict(set)
+        self._by_time_bucket = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def upsert(self, flight_plan):
+        """Inserts or replaces a flight plan and marks it as the most recent one."""
+        key = flight_plan_key(flight_plan)
+        flight_plan.setdefault("timestamp", time.time())
+        with self._lock:
+            if key in self._plans:
+                self._remove_locked(key, tombstone=False)
+            newest = self._stored_at[next(reversed(self._plans))] if self._plans else None
+            self.version += 1
+            self.upserts += 1
+            self._plans[key] = flight_plan
+            self._seqs[key] = self.version
+            self._stored_at[key] = self._stored_at_for(flight_plan, newest)
+            self._index_locked(key, flight_plan)
+            self._evict_locked()
+
+    def export_state(self):
+        """Returns a JSON-serializable copy of the store, including sequence numbers and tombstones."""
+        with self._lock:
+            self._evict_locked()
+            return {
+                "epoch": self.epoch,
+                "version": self.version,
+                "plans": list(self._plans.values()),
+                "seqs": list(self._seqs.values()),
+                "tombstones": [[seq, list(key)] for seq, key in self._tombstones],
+                "tombstone_floor": self._tombstone_floor,
+            }
+
+    def load_state(self, state, new_epoch=False):
+        """
+        Replaces the whole store with a state produced by export_state().
+        With `new_epoch`, the loaded sequence numbers start a fresh epoch, so clients
+        holding numbers from the exporting process are sent a full reload.
+        """
+        with self._lock:
+            self._clear_locked()
+            self.epoch = uuid.uuid4().hex[:12] if new_epoch else state["epoch"]
+            self.version = state["version"]
+            stored_at = None
+            for flight_plan, seq in zip(state["plans"], state["seqs"]):
+                key = flight_plan_key(flight_plan)
+                stored_at = self._stored_at_for(flight_plan, stored_at)
+                self._plans[key] = flight_plan
+                self._seqs[key] = seq
+                self._stored_at[key] = stored_at
+                self._index_locked(key, flight_plan)
+            self._tombstones.extend((seq, tuple(key)) for seq, key in state["tombstones"])
+            self._tombstone_floor = state["tombstone_floor"]
+            self._evict_locked()
+
+    def export_changes(self, seq):
+        """
+        Returns the changes after sequence number `seq` in export_state() form (plans,
+        seqs and tombstones, oldest first) plus the `base` they apply to, or None when
+        `seq` is too old or unknown and only a full export will do.
+        """
+        with self._lock:
+            self._evict_locked()
+            if seq < self._tombstone_floor or seq > self.version:
+                return None
+            plans, seqs = [], []
+            for key in reversed(self._plans):
+                if self._seqs[key] <= seq:
+                    break
+                plans.append(self._plans[key])
+                seqs.append(self._seqs[key])
+            tombstones = []
+            for removed_seq, key in reversed(self._tombstones):
+                if removed_seq <= seq:
+                    break
+                tombstones.append([removed_seq, list(key)])
+            plans.reverse()
+            seqs.reverse()
+            tombstones.reverse()
+            return {"epoch": self.epoch, "base": seq, "version": self.version,
+                    "plans": plans, "seqs": seqs, "tombstones": tombstones}
+
+    def apply_changes(self, changes):
+        """
+        Applies export_changes() output on top of the state it was computed from, keeping
+        the exporter's sequence numbers. Plans are not evicted here: a mirror relies on
+        the exporting store to evict and to send the removals.
+        """
+        with self._lock:
+            for flight_plan, seq in zip(changes["plans"], changes["seqs"]):
+                key = flight_plan_key(flight_plan)
+                if key in self._plans:
+                    self._remove_locked(key, tombstone=False)
+                self._plans[key] = flight_plan
+                self._seqs[key] = seq
+                self._stored_at[key] = time.monotonic()
+                self._index_locked(key, flight_plan)
+            for seq, key in changes["tombstones"]:
+                key = tuple(key)
+                # A later upsert of the same key wins over the removal
+                if key in self._plans and self._seqs[key] < seq:
+                    self._remove_locked(key, tombstone=False)
+                if len(self._tombstones) == self._tombstones.maxlen:
+                    self._tombstone_floor = self._tombstones[0][0]
+                self._tombstones.append((seq, key))
+            self.version = changes["version"]
+
+    def expire(self):
+        """Drops every flight plan stored more than the configured TTL ago."""
+        with self._lock:
+            self._evict_locked()
+
+    def _index_locked(self, key, flight_plan):
+        _, departure, arrival = key
+        if departure:
+            self._by_departure[_normalize_airport(departure)].add(key)
+        if arrival:
+            self._by_arrival[_normalize_airport(arrival)].add(key)
+        self._by_time_bucket[int(flight_plan["timestamp"] // TIME_BUCKET_SECONDS)].add(key)
+
+    def _remove_locked(self, key, tombstone=True):
+        flight_plan = self._plans.pop(key)
+        del self._seqs[key]
+        del self._stored_at[key]
+        _, departure, arrival = key
+        if departure:
+            self._discard_from_index(self._by_departure, _normalize_airport(departure), key)
+        if arrival:
+            self._discard_from_index(self._by_arrival, _normalize_airport(arrival), key)
+        self._discard_from_index(self._by_time_bucket, int(flight_plan["timestamp"] // TIME_BUCKET_SECONDS), key)
+        if tombstone:
+            self.version += 1
+            if len(self._tombstones) == self._tombstones.maxlen:
+                self._tombstone_floor = self._tombstones[0][0]
+            self._tombstones.append((self.version, key))
+        return flight_plan
+
+    @staticmethod
+    def _discard_from_index(index, index_key, key):
+        keys = index.get(index_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del index[index_key]
+
+    @staticmethod
+    def _stored_at_for(flight_plan, newest):
+        """
+        Returns the monotonic time a plan counts as stored at: now, less however old its
+        timestamp already is, but never before `newest` (the previous entry's), so the
+        recency order stays the expiry order. A plan with an older timestamp than the
+        entries before it therefore expires with them rather than staying behind them.
+        """
+        stored_at = time.monotonic() - max(0, time.time() - flight_plan["timestamp"])
+        return stored_at if newest is None else max(stored_at, newest)
+
+    def _evict_locked(self):
+        while len(self._plans) > self.capacity:
+            self._remove_locked(next(iter(self._plans)))
+        if self.ttl:
+            cutoff = time.monotonic() - self.ttl
+            while self._plans:
+                oldest_key = next(iter(self._plans))
+                if self._stored_at[oldest_key] >= cutoff:
+                    break
+                self._remove_locked(oldest_key)
+
+    def snapshot(self, limit=None):
+        """Returns the stored flight plans, most recently updated first."""
+        with self._lock:
+            self._evict_locked()
+            plans = list(reversed(self._plans.values()))
+        return plans[:limit] if limit is not None else plans
+
+    def query(self, departure=None, arrival=None, airport=None, callsign=None, since=None, limit=None):
+        """
+        Returns the flight plans matching every given filter, most recently updated first.
+
+        `departure`, `arrival` and `airport` (either end of the route) match ICAO codes
+        case-insensitively, `callsign` is a case-insensitive prefix and `since` is a
+        Unix timestamp. Airport and time filters are answered from the secondary indexes.
+        """
+        callsign_prefix = callsign.strip().upper() if callsign else None
+        with self._lock:
+            self._evict_locked()
+
+            candidate_sets = []
+            if departure:
+                candidate_sets.append(self._by_departure.get(_normalize_airport(departure), set()))
+            if arrival:
+                candidate_sets.append(self._by_arrival.get(_normalize_airport(arrival), set()))
+            if airport:
+                code = _normalize_airport(airport)
+                candidate_sets.append(self._by_departure.get(code, set()) | self._by_arrival.get(code, set()))
+            if since is not None:
+                first_bucket = int(since // TIME_BUCKET_SECONDS)
+                candidate_sets.append(set().union(*(
+                    keys for bucket, keys in self._by_time_bucket.items() if bucket >= first_bucket
+                )))
+
+            if candidate_sets:
+                candidate_sets.sort(key=len)
+                keys = candidate_sets[0].intersection(*candidate_sets[1:])
+                candidates = sorted((self._plans[key] for key in keys), key=lambda fp: fp["timestamp"], reverse=True)
+            else:
+                candidates = reversed(self._plans.values())
+
+            results = []
+            for flight_plan in candidates:
+                if since is not None and flight_plan["timestamp"] < since:
+                    continue
+                if callsign_prefix and not (flight_plan.get("callsign") or "").upper().startswith(callsign_prefix):
+                    continue
+                results.append(flight_plan)
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+    def changes_since(self, seq):
+        """
+        Returns the plans inserted or updated (newest first) and the keys removed after
+        sequence number `seq`, along with the current sequence number. `full` is True
+        when `seq` is too old or unknown to compute a delta; `upserts` then holds every plan
+        and the caller should replace its copy.
+        """
+        with self._lock:
+            self._evict_locked()
+            if seq < self._tombstone_floor or seq > self.version:
+                return {"seq": self.version, "full": True, "upserts": list(reversed(self._plans.values())), "removed": []}
+
+            upserts = []
+            for key in reversed(self._plans):
+                if self._seqs[key] <= seq:
+                    break
+                upserts.append(self._plans[key])
+            removed = []
+            for removed_seq, key in reversed(self._tombstones):
+                if removed_seq <= seq:
+                    break
+                if key not in self._plans:
+                    removed.append(key)
+        return {"seq": self.version, "full": False, "upserts": upserts, "removed": removed}
+
+    def latest(self):
+        """Returns the most recently updated flight plan, or None if the store is empty."""
+        with self._lock:
+            if not self._plans:
+                return None
+            return next(reversed(self._plans.values()))
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+            # Deltas can't span a clear, so every earlier sequence number now needs a full reload
+            self.version += 1
+            self._tombstone_floor = self.version
+
+    def _clear_locked(self):
+        self._plans.clear()
+        self._seqs.clear()
+        self._stored_at.clear()
+        self._tombstones.clear()
+        self._by_departure.clear()
+        self._by_arrival.clear()
+        self._by_time_bucket.clear()
+
+    def __len__(self):
+        return len(self._plans)
+
+    def __iter__(self):
+        return iter(self.snapshot())
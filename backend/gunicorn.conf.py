@@ -1,29 +1,89 @@
 """Gunicorn configuration file."""
 
 import os
-import threading
-from backend.services import run_websocket_in_background
+import subprocess
+import sys
+from dotenv import load_dotenv
+
+# Before the GUNICORN_* settings below are read, so they can be set in .env too
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
+
+# Worker profiles, chosen with GUNICORN_PROFILE (see "Worker Profiles" in the README for
+# benchmark numbers):
+# - sync: one request at a time per worker. A slow upstream or database call holds up
+#   every other request on that worker.
+# - gthread (default): GUNICORN_THREADS request threads per worker, so I/O waits overlap.
+#   The shared state (flight plan store, caches, client pools, metrics) is lock-protected.
+# - gevent: cooperative greenlets for many concurrent connections, such as the live flight
+#   plan stream, which this profile enables. Requires `pip install gevent`. The asyncio
+#   WebSocket client does not run under gevent's monkey-patching, so flight plans are
+#   ingested by the separate ingester process ('shared' ingest mode).
+WORKER_PROFILES = {
+    'sync': {'worker_class': 'sync', 'threads': 1},
+    'gthread': {'worker_class': 'gthread', 'threads': int(os.environ.get('GUNICORN_THREADS', 8))},
+    'gevent': {'worker_class': 'gevent', 'threads': 1},
+}
+profile = os.environ.get('GUNICORN_PROFILE', 'gthread')
+if profile not in WORKER_PROFILES:
+    raise ValueError(f"Unknown GUNICORN_PROFILE '{profile}', expected one of {', '.join(WORKER_PROFILES)}")
+
+# Profile defaults must be in the environment before backend.config reads it
+if profile == 'gevent':
+    os.environ.setdefault('FLIGHT_PLAN_INGEST_MODE', 'shared')
+    os.environ.setdefault('FLIGHT_PLAN_STREAM_ENABLED', 'true')
+
+from backend.config import Config
+from backend.services import ingest_supervisor
 
 # Server socket
 bind = "0.0.0.0:5000"
 workers = int(os.environ.get('GUNICORN_WORKERS', 1))
 
+# Concurrency
+worker_class = WORKER_PROFILES[profile]['worker_class']
+threads = WORKER_PROFILES[profile]['threads']
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))  # gevent only
+# Keep-alive is only honoured by threaded and async workers
+keepalive = 5
+
 # Logging
 loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
 accesslog = "-"
 errorlog = "-"
 
+# The single ingester process used in 'shared' flight plan ingest mode
+ingester_process = None
+
+def when_ready(server):
+    """
+    Called just after the server is started.
+    In 'shared' ingest mode this starts the one ingester process for all workers.
+    """
+    global ingester_process
+    if Config.FLIGHT_PLAN_INGEST_MODE != 'shared':
+        return
+
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    ingester_process = subprocess.Popen([sys.executable, "-m", "backend.ingester"], cwd=project_root)
+    server.log.info("Started flight plan ingester (pid: %s)", ingester_process.pid)
+
+def on_exit(server):
+    """Stops the ingester process when the server shuts down."""
+    if ingester_process and ingester_process.poll() is None:
+        ingester_process.terminate()
+        ingester_process.wait(timeout=10)
+
 def post_worker_init(worker):
     """
     Called when a worker is initialized.
     This is a good place to start background tasks.
     """
-    worker.log.info("Worker initialized (pid: %s)", worker.pid)
+    worker.log.info("Worker initialized (pid: %s, profile: %s)", worker.pid, profile)
 
-    # Start the WebSocket client in a background thread
+    # Start the WebSocket client (or, in 'shared' mode, the cache follower) in a background thread.
+    # The supervisor guarantees a single instance per process even though create_app also calls start().
     try:
-        websocket_thread = threading.Thread(target=run_websocket_in_background, daemon=True)
-        websocket_thread.start()
-        worker.log.info("Successfully started WebSocket client thread.")
+        if ingest_supervisor.start():
+            worker.log.info("Successfully started flight plan %s thread.", ingest_supervisor.role)
     except Exception as e:
-        worker.log.error("Failed to start WebSocket client thread: %s", e)
+        worker.log.error("Failed to start flight plan ingestion: %s", e)
@@ -0,0 +1,104 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """
+    Probes upstream HTTP services in the background and keeps a rolling history per service.
+
+    Every `interval` seconds each target gets a HEAD request, all targets concurrently,
+    over one pooled keep-alive session. The last `history` results are kept, so
+    status() is a constant-time read that never waits on an upstream.
+    """
+
+    def __init__(self, targets, interval=30, timeout=5, history=120):
+        self.targets = dict(targets)
+        self.interval = interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.targets), pool_maxsize=len(self.targets))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._history = {name: deque(maxlen=history) for name in self.targets}
+        self._executor = ThreadPoolExecutor(max_workers=len(self.targets), thread_name_prefix='health-probe')
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts probing in a background thread. Returns False if it was already running."""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            try:
+                self.probe_all()
+            except Exception as e:
+                logger.warning("Health probe failed: %s", e)
+            time.sleep(max(0, self.interval - (time.monotonic() - started)))
+
+    def probe_all(self):
+        """Probes every target concurrently and records the results."""
+        results = self._executor.map(self._probe, self.targets.items())
+        with self._lock:
+            for name, result in zip(self.targets, results):
+                self._history[name].append(result)
+
+    def _probe(self, target):
+        _, url = target
+        started = time.monotonic()
+        try:
+            response = self.session.head(url, timeout=self.timeout)
+            return {
+                "checked_at": time.time(),
+                "ok": response.status_code == 200,
+                "status_code": response.status_code,
+                "latency_ms": round((time.monotonic() - started) * 1000, 1),
+                "error": None,
+            }
+        except requests.RequestException as e:
+            return {
+                "checked_at": time.time(),
+                "ok": False,
+                "status_code": None,
+                "latency_ms": None,
+                "error": type(e).__name__,
+            }
+
+    def status(self, name):
+        """
+        Returns the latest result for one service plus availability and average latency
+        over the retained history. `status` is "Unknown" until the first probe completes.
+        """
+        with self._lock:
+            history = list(self._history[name])
+        if not history:
+            return {"url": self.targets[name], "status": "Unknown", "checked_at": None, "latency_ms": None,
+                    "error": None, "availability": None, "avg_latency_ms": None, "history": []}
+
+        latest = history[-1]
+        latencies = [result["latency_ms"] for result in history if result["ok"]]
+        return {
+            "url": self.targets[name],
+            "status": "Online" if latest["ok"] else "Offline",
+            "checked_at": latest["checked_at"],
+            "latency_ms": latest["latency_ms"],
+            "error": latest["error"],
+            "availability": round(sum(result["ok"] for result in history) / len(history), 4),
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 1) if latencies else None,
+            "history": [[result["checked_at"], result["latency_ms"] if result["ok"] else None] for result in history],
+        }
@@ -0,0 +1,30 @@
+"""
+Standalone flight plan ingester for FLIGHT_PLAN_INGEST_MODE=shared.
+
+Runs the single 24data WebSocket client for the host and publishes the flight plan
+cache as a snapshot and journal at FLIGHT_PLAN_SHARED_PATH, which every gunicorn worker
+replays into its own copy of the cache.
+gunicorn.conf.py starts this automatically; it can also be run by hand with
+`python -m backend.ingester`.
+"""
+
+import logging
+
+from .database import init_db
+from .services import ingest_supervisor, run_snapshot_publisher
+
+logger = logging.getLogger(__name__)
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        init_db()
+    except ValueError as e:
+        # The cache is still served to the workers; only persistence is lost
+        logger.warning("Flight plans will not be persisted: %s", e)
+    ingest_supervisor.start_ingest()
+    logger.info("Flight plan ingester started.")
+    run_snapshot_publisher()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+JSON encoding and decoding for the hot paths: 24data message parsing, API responses and
+the shared flight plan snapshot.
+
+orjson is used when it is installed (and JSON_CODEC is not 'stdlib'); otherwise the
+stdlib json module is. Both produce the same JSON values. The bytes can differ: orjson
+writes non-ASCII characters as UTF-8 instead of \\u escapes, and it has no spaces after
+separators. Anything orjson refuses, such as integers wider than 64 bits or non-string
+dict keys, is handed to the stdlib module, so results and errors are the same either way.
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+from .config import Config
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json module is always available
+    orjson = None
+
+# Decided once at import; the per-call cost is a single flag check
+FAST = orjson is not None and Config.JSON_CODEC != 'stdlib'
+NAME = 'orjson' if FAST else 'stdlib'
+
+
+def loads(data):
+    """Parses JSON from str or bytes. Raises ValueError (json.JSONDecodeError) if it is invalid."""
+    if FAST:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Let the stdlib decide: it also accepts NaN and integers wider than 64 bits
+            pass
+    return json.loads(data)
+
+
+def dumpb(obj, sort_keys=False, default=None):
+    """Serializes `obj` to compact UTF-8 JSON bytes."""
+    if FAST:
+        option = orjson.OPT_PASSTHROUGH_DATETIME | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(
+        obj, sort_keys=sort_keys, default=default, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def dumps(obj, sort_keys=False, default=None):
+    """Serializes `obj` to a compact JSON string."""
+    return dumpb(obj, sort_keys=sort_keys, default=default).decode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by this module. Keeps the default provider's behaviour
+    (sorted keys, its `default` for dates, decimals and UUIDs, indented output in debug
+    mode) and defers to it whenever it is called with extra json.dumps() arguments.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=self.sort_keys, default=self.default)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = dumpb(obj, sort_keys=self.sort_keys, default=self.default) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,199 @@
+"""
+Process-local metrics in the Prometheus text exposition format.
+
+Each gunicorn worker keeps its own counters, so scrape every worker (or run a single
+one) when exact totals matter. Recording a sample is a dict lookup and an addition
+under a lock, cheap enough to leave on in production.
+"""
+
+import bisect
+import threading
+import time
+
+from flask import Blueprint, Response, abort, request
+
+from . import caching
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+_registry = []
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket (non-cumulative) counts plus the +Inf bucket, then the sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        samples = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                samples.append((f'{self.name}_bucket', labels, (('le', le),), cumulative))
+            samples.append((f'{self.name}_sum', labels, (), total))
+            samples.append((f'{self.name}_count', labels, (), cumulative))
+        return samples
+
+
+class GaugeCallback:
+    """
+    A value read from the application when metrics are rendered. `callback` returns
+    either a number or a dict mapping label value tuples to numbers.
+    """
+
+    def __init__(self, name, documentation, callback, labelnames=(), type='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        self.type = type
+        _registry.append(self)
+
+    def samples(self):
+        value = self.callback()
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return [(self.name, labels, (), v) for labels, v in value.items() if v is not None]
+        return [(self.name, (), (), value)]
+
+
+def render():
+    """Returns every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        try:
+            samples = metric.samples()
+        except Exception:
+            # A failing callback must not take the whole scrape down
+            continue
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for name, labels, extra, value in samples:
+            lines.append(f'{name}{_format_labels(metric.labelnames, labels, extra)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+# --- HTTP server ---
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'Time spent handling a request, by blueprint and endpoint.',
+    ('blueprint', 'endpoint', 'method', 'status')
+)
+http_request_cookie_bytes = Histogram(
+    'http_request_cookie_bytes', 'Size of the Cookie header sent by clients.', buckets=SIZE_BUCKETS
+)
+session_cookie_bytes = Histogram(
+    'session_cookie_bytes', 'Size of the signed session cookie, as received and as set.', ('direction',),
+    buckets=SIZE_BUCKETS
+)
+
+# --- Upstreams ---
+supabase_request_duration = Histogram(
+    'supabase_request_duration_seconds', 'Time until Supabase response headers arrive, by table or RPC.',
+    ('target', 'method', 'status')
+)
+upstream_request_duration = Histogram(
+    'upstream_request_duration_seconds', 'Time spent on 24data REST calls.', ('service', 'outcome')
+)
+
+# --- Caches ---
+GaugeCallback(
+    'cached_resource_requests_total', 'CachedResource lookups by outcome (hit, stale or miss).',
+    lambda: {
+        (resource.name, outcome): count
+        for resource in caching.resources
+        for outcome, count in (('hit', resource.hits), ('stale', resource.stale_hits), ('miss', resource.misses))
+    },
+    labelnames=('cache', 'outcome'), type='counter'
+)
+
+
+def observe_request(app, response, **extra):
+    """Records latency and cookie sizes for the current request (a request_finished receiver)."""
+    started = request.environ.get('metrics.started')
+    if started is not None:
+        http_request_duration.observe(
+            time.perf_counter() - started,
+            request.blueprint or '', request.endpoint or 'unmatched', request.method, response.status_code
+        )
+
+    cookie_header = request.headers.get('Cookie')
+    if cookie_header:
+        http_request_cookie_bytes.observe(len(cookie_header))
+    cookie_name = app.config.get('SESSION_COOKIE_NAME', 'session')
+    received = request.cookies.get(cookie_name)
+    if received:
+        session_cookie_bytes.observe(len(received), 'received')
+    for header in response.headers.getlist('Set-Cookie'):
+        if header.startswith(f'{cookie_name}='):
+            session_cookie_bytes.observe(len(header.split(';', 1)[0]) - len(cookie_name) - 1, 'set')
+
+
+def _supabase_target(url):
+    # /rest/v1/<table> or /rest/v1/rpc/<function>; anything else (auth, storage) by service
+    parts = url.path.strip('/').split('/')
+    if len(parts) >= 3 and parts[0] == 'rest':
+        return f'rpc:{parts[3]}' if parts[2] == 'rpc' and len(parts) > 3 else parts[2]
+    return parts[0] if parts else ''
+
+
+def _on_supabase_request(http_request):
+    http_request.extensions['metrics.started'] = time.perf_counter()
+
+
+def _on_supabase_response(response):
+    started = response.request.extensions.get('metrics.started')
+    if started is not None:
+        supabase_request_duration.observe(
+            time.perf_counter() - started,
+            _supabase_target(response.request.url), response.request.method, response.status_code
+        )
+
+
+# Passed to the httpx clients used by the Supabase clients
+SUPABASE_EVENT_HOOKS = {'request': [_on_supabase_request], 'response': [_on_supabase_response]}
+
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+@metrics_bp.route('/metrics')
+def get_metrics():
+    # Local scrapes only: the direct peer must be loopback and no proxy may be involved
+    if request.remote_addr not in ('127.0.0.1', '::1') or 'X-Forwarded-For' in request.headers:
+        abort(404)
+    return Response(render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,26 @@
+-- Migration to let the ingester upsert flight plans into flight_plans_received.
+-- Rows are keyed on (callsign, departure, destination), matching the in-memory store.
+
+ALTER TABLE public.flight_plans_received ADD COLUMN IF NOT EXISTS departure TEXT;
+ALTER TABLE public.flight_plans_received ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+UPDATE public.flight_plans_received SET departure = '' WHERE departure IS NULL;
+UPDATE public.flight_plans_received SET destination = '' WHERE destination IS NULL;
+UPDATE public.flight_plans_received SET updated_at = created_at WHERE updated_at IS NULL;
+
+ALTER TABLE public.flight_plans_received ALTER COLUMN departure SET DEFAULT '';
+ALTER TABLE public.flight_plans_received ALTER COLUMN departure SET NOT NULL;
+ALTER TABLE public.flight_plans_received ALTER COLUMN destination SET DEFAULT '';
+ALTER TABLE public.flight_plans_received ALTER COLUMN destination SET NOT NULL;
+
+-- Keep only the newest row for each key before adding the unique index
+DELETE FROM public.flight_plans_received a
+USING public.flight_plans_received b
+WHERE a.callsign = b.callsign
+  AND a.departure = b.departure
+  AND a.destination = b.destination
+  AND (a.created_at, a.id) < (b.created_at, b.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_flight_plans_received_key
+    ON public.flight_plans_received(callsign, departure, destination);
+CREATE INDEX IF NOT EXISTS idx_flight_plans_received_updated_at ON public.flight_plans_received(updated_at);
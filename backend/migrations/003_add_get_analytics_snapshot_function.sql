@@ -0,0 +1,55 @@
+-- Migration to serve the admin dashboard from a single analytics query.
+
+-- FUNCTION: get_analytics_snapshot()
+-- Returns the dashboard totals and the last 30 days of daily counts as one JSON object.
+-- The totals are estimates, read from the statistics instead of counting every row: the
+-- live tuple count, which follows the deletes of an analytics reset within moments, or
+-- the planner's row estimate when the statistics have been reset.
+CREATE OR REPLACE FUNCTION get_analytics_snapshot()
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    since TIMESTAMPTZ := date_trunc('day', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' - INTERVAL '29 days';
+    totals JSONB;
+BEGIN
+    SELECT jsonb_object_agg(c.relname, GREATEST(COALESCE(s.n_live_tup, c.reltuples::BIGINT), 0))
+    INTO totals
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE n.nspname = 'public'
+      AND c.relname IN ('page_visits', 'clearance_generations', 'flight_plans_received');
+
+    RETURN jsonb_build_object(
+        'totalVisits', COALESCE(totals->'page_visits', '0'::JSONB),
+        'clearancesGenerated', COALESCE(totals->'clearance_generations', '0'::JSONB),
+        'flightPlansReceived', COALESCE(totals->'flight_plans_received', '0'::JSONB),
+        'dailyVisits', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('date', d.date, 'count', d.count) ORDER BY d.date)
+            FROM (
+                SELECT (created_at AT TIME ZONE 'UTC')::date AS date, COUNT(*) AS count
+                FROM page_visits
+                WHERE created_at >= since
+                GROUP BY 1
+            ) d
+        ), '[]'::JSONB),
+        'dailyClearances', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('date', d.date, 'count', d.count) ORDER BY d.date)
+            FROM (
+                SELECT (created_at AT TIME ZONE 'UTC')::date AS date, COUNT(*) AS count
+                FROM clearance_generations
+                WHERE created_at >= since
+                GROUP BY 1
+            ) d
+        ), '[]'::JSONB)
+    );
+END;
+$$;
+
+-- SECURITY DEFINER bypasses row level security, so only the backend's service role may call it
+REVOKE EXECUTE ON FUNCTION get_analytics_snapshot() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_analytics_snapshot() TO service_role;
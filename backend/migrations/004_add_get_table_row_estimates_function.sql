@@ -0,0 +1,28 @@
+-- Migration to support keyset pagination and estimated row counts in the admin table browser.
+
+-- FUNCTION: get_table_row_estimates()
+-- Returns the planner's row estimate for every table in the public schema.
+-- Tables that have never been analyzed report pg_stat's live tuple count instead.
+CREATE OR REPLACE FUNCTION get_table_row_estimates()
+RETURNS TABLE(table_name TEXT, estimate BIGINT)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+    SELECT
+        c.relname::TEXT,
+        GREATEST(CASE WHEN c.reltuples < 0 THEN COALESCE(s.n_live_tup, 0) ELSE c.reltuples::BIGINT END, 0)
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    WHERE n.nspname = 'public' AND c.relkind = 'r';
+$$;
+
+-- SECURITY DEFINER bypasses row level security, so only the backend's service role may call it
+REVOKE EXECUTE ON FUNCTION get_table_row_estimates() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_table_row_estimates() TO service_role;
+
+-- The browser pages every table on (created_at, id); these two had no created_at index yet
+CREATE INDEX IF NOT EXISTS idx_discord_users_created_at ON public.discord_users(created_at);
+CREATE INDEX IF NOT EXISTS idx_user_sessions_created_at ON public.user_sessions(created_at);
@@ -0,0 +1,119 @@
+"""
+Authorization from discord_users rather than the session cookie.
+
+The session holds the `is_admin` and `roles` a user had when they logged in. Admin checks
+resolve them from the database instead, through a small per-worker cache: each user's
+permissions are re-read at most every PERMISSION_CACHE_TTL seconds, and the admin user
+endpoints call invalidate(), which clears them at once in this worker and, through the
+mtime of a signal file, within a second in every other worker on the host.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import session
+
+from . import database
+from .caching import ChangeSignal
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class PermissionCache:
+    """
+    An LRU of up to `max_entries` users' permissions as returned by `loader(user_id)`,
+    each kept for `ttl` seconds. If `signal_path` is set, its version is checked at most
+    once per `check_interval` seconds and any change clears the whole cache.
+    """
+
+    def __init__(self, loader, ttl, max_entries=1000, signal_path=None, check_interval=1.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # user_id -> (permissions, fetched_at)
+        self._lock = threading.Lock()
+        self._signal = ChangeSignal(signal_path, check_interval) if signal_path else None
+
+    def get(self, user_id, fallback=None):
+        """
+        Returns the permissions of `user_id`, or `fallback` if they are not cached and
+        loading them fails. An expired copy is not used: it may predate a demotion.
+        """
+        if self._signal is not None and self._signal.changed():
+            with self._lock:
+                self._entries.clear()
+        now = time.time()
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is not None and now - cached[1] < self.ttl:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+
+        try:
+            permissions = self.loader(user_id)
+        except Exception as e:
+            logger.warning(f"Failed to load permissions for user {user_id}: {e}")
+            return fallback
+
+        with self._lock:
+            self._entries[user_id] = (permissions, now)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return permissions
+
+    def invalidate(self, user_id=None):
+        """Forgets `user_id` (or every user) here and signals the other workers to do the same."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+        if self._signal is not None:
+            self._signal.notify(user_id or '*')
+
+
+def load_permissions(user_id):
+    response = database.supabase_admin.table('discord_users').select('is_admin, roles').eq('id', user_id).limit(1).execute()
+    row = response.data[0] if response.data else {}
+    return {'is_admin': bool(row.get('is_admin')), 'roles': row.get('roles') or []}
+
+
+permission_cache = PermissionCache(
+    load_permissions, Config.PERMISSION_CACHE_TTL, max_entries=Config.PERMISSION_CACHE_SIZE,
+    signal_path=Config.PERMISSION_SIGNAL_PATH
+)
+
+
+def current_permissions():
+    """
+    Returns the signed-in user's {'is_admin', 'roles'}, or None if nobody is signed in.
+    The session copy is brought up to date when it differs; /api/auth/user calls this so
+    the frontend follows. If the lookup fails the user gets no permissions at all, rather
+    than the ones the session recorded at login.
+    """
+    user = session.get('user')
+    if not user:
+        return None
+    session_copy = {'is_admin': bool(user.get('is_admin')), 'roles': user.get('roles') or []}
+    # Read at call time: init_db() creates the client after this module is imported
+    if database.supabase_admin is None or not user.get('id'):
+        return session_copy
+    permissions = permission_cache.get(user['id'])
+    if permissions is None:
+        return {'is_admin': False, 'roles': []}
+    if permissions != session_copy:
+        session['user'] = dict(user, **permissions)
+    return permissions
+
+
+def is_admin():
+    permissions = current_permissions()
+    return bool(permissions and permissions['is_admin'])
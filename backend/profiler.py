@@ -0,0 +1,284 @@
+"""
+Opt-in sampling profiler for individual requests and the ingest loop.
+
+A helper thread reads the target thread's stack from sys._current_frames() every
+PROFILE_SAMPLE_INTERVAL seconds; the profiled code itself is not instrumented. Results
+are written as collapsed stacks ("frame;frame;frame count" per line), which
+flamegraph.pl, inferno and speedscope read directly.
+
+Requests are profiled when an admin sends the X-Profile header, or when the profiling
+switch (set from the admin API) selects their endpoint. While nothing is selected the
+per-request cost is a header lookup and a clock read.
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from functools import lru_cache
+
+from flask import g, request
+
+from .config import Config
+from .permissions import is_admin
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_NAME = re.compile(r'^[A-Za-z0-9_.-]+\.folded$')
+_SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename):
+    for root in sorted([_SOURCE_ROOT] + [p for p in sys.path if p], key=len, reverse=True):
+        if filename.startswith(root + os.sep):
+            return filename[len(root) + 1:]
+    return filename
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the thread `thread_id` every `interval` seconds until stop()
+    is called, the `duration` passes or the thread exits.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.duration = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, duration=None, on_finish=None):
+        self.started_at = time.time()
+        self._thread = threading.Thread(
+            target=self._run, args=(duration, on_finish), name="profiler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _run(self, duration, on_finish):
+        started = time.monotonic()
+        deadline = started + duration if duration else None
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break  # the profiled thread has exited
+            self.stacks[_collapse(frame)] += 1
+            self.samples += 1
+            del frame
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self.duration = time.monotonic() - started
+        if on_finish is not None:
+            on_finish(self)
+
+    def stop(self):
+        """Stops sampling and waits for the sampling thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def collapsed(self):
+        """Returns the samples as collapsed stacks, most frequent first."""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# --- Output files ---
+def write_profile(label, profiler, output_dir=None, max_files=None):
+    """Writes a finished profile to the output directory and returns its file name."""
+    output_dir = output_dir or Config.PROFILE_OUTPUT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    safe_label = re.sub(r'[^A-Za-z0-9_.-]+', '-', label).strip('-') or 'profile'
+    name = (f"{time.strftime('%Y%m%d-%H%M%S', time.gmtime(profiler.started_at))}-{safe_label}"
+            f"-{os.getpid()}-{uuid.uuid4().hex[:6]}.folded")
+    path = os.path.join(output_dir, name)
+    with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+        f.write(profiler.collapsed())
+    os.replace(f"{path}.tmp", path)
+    _prune(output_dir, max_files or Config.PROFILE_MAX_FILES)
+    return name
+
+
+def _prune(output_dir, max_files):
+    names = sorted(name for name in os.listdir(output_dir) if PROFILE_NAME.match(name))
+    for name in names[:-max_files]:
+        try:
+            os.remove(os.path.join(output_dir, name))
+        except OSError:
+            pass
+
+
+def list_profiles(output_dir=None):
+    """Returns the saved profiles, newest first."""
+    output_dir = output_dir or Config.PROFILE_OUTPUT_DIR
+    if not os.path.isdir(output_dir):
+        return []
+    profiles = []
+    for name in os.listdir(output_dir):
+        if not PROFILE_NAME.match(name):
+            continue
+        try:
+            stat = os.stat(os.path.join(output_dir, name))
+        except OSError:
+            continue
+        profiles.append({"name": name, "size": stat.st_size, "created_at": stat.st_mtime})
+    return sorted(profiles, key=lambda profile: profile["name"], reverse=True)
+
+
+def profile_path(name, output_dir=None):
+    """Returns the path of a saved profile, or None if `name` is not a profile file."""
+    if not PROFILE_NAME.match(name or ''):
+        return None
+    path = os.path.join(output_dir or Config.PROFILE_OUTPUT_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+# --- Request selection ---
+class ProfilingSwitch:
+    """
+    Which requests to profile, shared by every worker on the host through a small JSON
+    file. Workers look at the file's mtime at most once per `refresh_interval` seconds
+    and only re-read it when it changed.
+    """
+
+    def __init__(self, path, refresh_interval=1.0):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._state = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def enable(self, endpoints=(), sample_rate=1.0, duration=300):
+        """
+        Profiles a `sample_rate` fraction of requests to `endpoints` (all endpoints if
+        empty) for the next `duration` seconds.
+        """
+        state = {"endpoints": sorted(endpoints), "sample_rate": sample_rate, "until": time.time() + duration}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(f"{self.path}.tmp", self.path)
+        self._checked_at = 0.0
+        return state
+
+    def disable(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self._checked_at = 0.0
+
+    def state(self):
+        """Returns the active selection, or None if profiling is off or has expired."""
+        now = time.time()
+        if now - self._checked_at >= self.refresh_interval:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != self._mtime:
+                self._mtime = mtime
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        self._state = json.load(f)
+                except (OSError, ValueError):
+                    self._state = None
+        state = self._state
+        if state is None or state["until"] <= now:
+            return None
+        return state
+
+    def selects(self, endpoint):
+        state = self.state()
+        if state is None:
+            return False
+        if state["endpoints"] and endpoint not in state["endpoints"]:
+            return False
+        return random.random() < state["sample_rate"]
+
+
+profiling_switch = ProfilingSwitch(os.path.join(Config.PROFILE_OUTPUT_DIR, 'switch.json'))
+
+
+def init_request_profiling(app):
+    """Registers the hooks that profile selected requests of `app`."""
+
+    @app.before_request
+    def start_request_profile():
+        if request.headers.get(PROFILE_HEADER) is not None:
+            if not is_admin():
+                return
+        elif not profiling_switch.selects(request.endpoint):
+            return
+        g.profiler = SamplingProfiler(threading.get_ident(), Config.PROFILE_SAMPLE_INTERVAL).start()
+
+    @app.after_request
+    def finish_request_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
+            try:
+                response.headers['X-Profile-Id'] = write_profile(f"{request.method}-{request.endpoint}", profiler)
+            except OSError as e:
+                app.logger.warning(f"Failed to write request profile: {e}")
+        return response
+
+    @app.teardown_request
+    def stop_request_profile(exc=None):
+        # Only reached with a profiler still running if after_request was skipped
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.stop()
+
+
+# --- Background threads ---
+_window_profiles = {}
+_window_lock = threading.Lock()
+
+
+def profile_thread(label, thread_id, seconds):
+    """
+    Profiles another thread (such as the ingest event loop) for `seconds` in the
+    background and writes the result when done. Returns False if a profile with the
+    same label is already running.
+    """
+    with _window_lock:
+        current = _window_profiles.get(label)
+        if current is not None and current.running:
+            return False
+
+        def finish(profiler):
+            try:
+                write_profile(label, profiler)
+            except OSError as e:
+                logger.warning("Failed to write %s profile: %s", label, e)
+
+        _window_profiles[label] = SamplingProfiler(thread_id, Config.PROFILE_SAMPLE_INTERVAL).start(
+            duration=seconds, on_finish=finish
+        )
+        return True
@@ -1,87 +1,334 @@
 import asyncio
-import json
+import fcntl
+import logging
+import random
 import threading
 import time
 from collections import deque
 
 import requests
 import websockets
-from flask import current_app
 
+from . import json_codec
+from .broadcast import FlightPlanBroadcaster
+from .caching import CachedResource
+from .client_pool import ClientPool
 from .config import Config
+from .database import persist_flight_plan
+from .flight_plan_store import FlightPlanStore
+from .health import HealthProber
+from .metrics import GaugeCallback, upstream_request_duration
+from .flight_plan_snapshot import SnapshotFollower, SnapshotPublisher, load_checkpoint
+
+logger = logging.getLogger(__name__)
 
 # --- In-memory Cache ---
-MAX_FLIGHT_PLANS = 50
-flight_plans_cache = deque(maxlen=MAX_FLIGHT_PLANS)
-flight_plan_lock = threading.Lock()
+flight_plans_cache = FlightPlanStore(Config.MAX_FLIGHT_PLANS, ttl=Config.FLIGHT_PLAN_TTL)
+
+# --- Live Updates ---
+flight_plan_broadcaster = FlightPlanBroadcaster(
+    queue_size=Config.FLIGHT_PLAN_STREAM_QUEUE_SIZE,
+    max_subscribers=Config.FLIGHT_PLAN_STREAM_MAX_SUBSCRIBERS
+)
 
 # --- External API Service ---
 class ExternalApiService:
+    """
+    Client for the 24data REST API.
+    Responses are cached with single-flight stale-while-revalidate semantics (see CachedResource),
+    so bursts of page loads share one upstream call. Cached responses report `"source": "cache"`
+    and keep the `lastUpdated` time of the upstream fetch.
+
+    requests.Session is not safe to share between threads, so each fetch checks one out of
+    a small pool; sessions (and their keep-alive connections) are reused across threads.
+    """
     def __init__(self):
-        self.session = requests.Session()
+        self.sessions = ClientPool(requests.Session, max_size=4, timeout=15, name='24data-session')
+        self._controllers = CachedResource(self._fetch_controllers, Config.EXTERNAL_API_CACHE_TTL, Config.EXTERNAL_API_STALE_TTL, name='controllers')
+        self._atis = CachedResource(self._fetch_atis, Config.EXTERNAL_API_CACHE_TTL, Config.EXTERNAL_API_STALE_TTL, name='atis')
 
-    def get_controllers(self):
+    def _get(self, service, url):
+        started = time.perf_counter()
+        outcome = 'error'
+        session = self.sessions.acquire()
         try:
-            response = self.session.get(Config.DATA_API_CONTROLLERS_URL, timeout=15)
+            response = session.get(url, timeout=15)
             response.raise_for_status()
-            return {"data": response.json(), "lastUpdated": time.time(), "source": "live"}
+            data = response.json()
+            outcome = 'ok'
+            return data
+        finally:
+            self.sessions.release(session)
+            upstream_request_duration.observe(time.perf_counter() - started, service, outcome)
+
+    def _fetch_controllers(self):
+        try:
+            return self._get('controllers', Config.DATA_API_CONTROLLERS_URL)
         except requests.exceptions.RequestException as e:
-            current_app.logger.error(f"Failed to fetch controllers: {e}", exc_info=True)
+            # May run on a background refresh thread, outside the Flask app context
+            logger.error(f"Failed to fetch controllers: {e}", exc_info=True)
             raise
 
-    def get_atis(self):
+    def _fetch_atis(self):
         try:
-            response = self.session.get(Config.DATA_API_ATIS_URL, timeout=15)
-            response.raise_for_status()
-            return {"data": response.json(), "lastUpdated": time.time(), "source": "live"}
+            return self._get('atis', Config.DATA_API_ATIS_URL)
         except requests.exceptions.RequestException as e:
-            current_app.logger.error(f"Failed to fetch ATIS data: {e}", exc_info=True)
+            logger.error(f"Failed to fetch ATIS data: {e}", exc_info=True)
             raise
 
+    @staticmethod
+    def _cached_response(resource):
+        data, fetched_at, fetched_now = resource.get()
+        return {"data": data, "lastUpdated": fetched_at, "source": "live" if fetched_now else "cache"}
+
+    def get_controllers(self):
+        return self._cached_response(self._controllers)
+
+    def get_atis(self):
+        return self._cached_response(self._atis)
+
 external_api_service = ExternalApiService()
 
+# --- Upstream Health ---
+health_prober = HealthProber(
+    {"24DATA_Controllers": Config.DATA_API_CONTROLLERS_URL, "24DATA_ATIS": Config.DATA_API_ATIS_URL},
+    interval=Config.HEALTH_PROBE_INTERVAL,
+    timeout=Config.HEALTH_PROBE_TIMEOUT,
+    history=Config.HEALTH_PROBE_HISTORY
+)
+
 # --- WebSocket Service ---
-async def flight_plan_websocket_client():
-    """Connects to the flight plan WebSocket and populates the cache."""
-    uri = Config.DATA_API_WSS_URL
-    while True:
+def handle_websocket_message(message):
+    """
+    Parses one raw 24data WebSocket message, upserts the flight plan it carries and
+    queues it for persistence. Returns the flight plan, or None for message types
+    that are ignored. Raises ValueError for messages that are not JSON objects.
+    """
+    data = json_codec.loads(message)
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+    if data.get("t") in ["FLIGHT_PLAN", "EVENT_FLIGHT_PLAN"]:
+        flight_plan = data.get("d", {})
+        if flight_plan and not isinstance(flight_plan, dict):
+            raise ValueError(f"expected a flight plan object, got {type(flight_plan).__name__}")
+        if flight_plan:
+            flight_plan["timestamp"] = time.time()
+            flight_plan["source"] = data.get("t")
+            flight_plans_cache.upsert(flight_plan)
+            flight_plan_broadcaster.publish(flight_plan)
+            persist_flight_plan(flight_plan)
+            return flight_plan
+    return None
+
+class IngestSupervisor:
+    """
+    Owns flight plan ingestion for this process.
+
+    start() is idempotent, so only one WebSocket client (or, in 'shared' mode, one
+    cache follower) ever runs per process however many times it is called. When
+    INGEST_LOCK_FILE is set, the WebSocket client additionally holds an exclusive
+    lock on it, so only one client runs per host; other processes wait on standby.
+    The client reconnects with capped exponential backoff and jitter and records
+    its health, which stats() exposes to the status endpoints. Before connecting, the
+    ingester warm-starts the cache from its last checkpoint, then keeps checkpointing.
+    """
+    RECONNECT_BASE_DELAY = 1
+    RECONNECT_MAX_DELAY = 60
+    RATE_WINDOW = 60  # seconds of history used for the message rate
+
+    def __init__(self, uri, mode='local', lock_path=None):
+        self.uri = uri
+        self.mode = mode
+        self.lock_path = lock_path
+        self.role = None
+        self.state = 'stopped'
+        self.reconnects = 0
+        self.messages_received = 0
+        self.flight_plans_received = 0
+        self.parse_errors = 0
+        self.connected_since = None
+        self.last_message_at = None
+        self.last_error = None
+        self.next_retry_at = None
+        self._message_buckets = deque(maxlen=self.RATE_WINDOW)
+        self._lock_file = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._checkpoints_started = False
+        self._follower = SnapshotFollower(
+            flight_plans_cache, Config.FLIGHT_PLAN_SHARED_PATH, Config.FLIGHT_PLAN_SHARED_INTERVAL,
+            on_update=flight_plan_broadcaster.publish
+        )
+
+    def start(self):
+        """Starts the ingest path configured for this process. Returns False if it was already running."""
+        if self.mode == 'shared':
+            return self._start('follower', self._follower.run)
+        return self._start('ingester', self._run_ingest)
+
+    def start_ingest(self):
+        """Starts the WebSocket client regardless of mode (used by the shared-mode ingester process)."""
+        return self._start('ingester', self._run_ingest)
+
+    def ingest_thread_id(self):
+        """Returns the ident of the thread running the WebSocket client in this process, or None."""
+        thread = self._thread
+        if self.role == 'ingester' and thread is not None and thread.is_alive():
+            return thread.ident
+        return None
+
+    def _start(self, role, target):
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self.role = role
+            self.state = 'following' if role == 'follower' else 'starting'
+            self._thread = threading.Thread(target=target, name=f"flight-plan-{role}", daemon=True)
+            self._thread.start()
+            return True
+
+    def _start_checkpoints(self):
+        if not Config.FLIGHT_PLAN_CHECKPOINT_INTERVAL or self._checkpoints_started:
+            return
+        self._checkpoints_started = True
         try:
-            async with websockets.connect(uri, origin="") as websocket:
-                print("WebSocket connected successfully.")
-                while True:
-                    message = await websocket.recv()
-                    data = json.loads(message)
-                    if data.get("t") in ["FLIGHT_PLAN", "EVENT_FLIGHT_PLAN"]:
-                        flight_plan = data.get("d", {})
-                        if flight_plan:
-                            flight_plan["timestamp"] = time.time()
-                            flight_plan["source"] = data.get("t")
-
-                            with flight_plan_lock:
-                                # Create a composite key to uniquely identify flight plans
-                                composite_key = (
-                                    flight_plan.get("callsign"),
-                                    flight_plan.get("departure"),
-                                    flight_plan.get("arrival")
-                                )
-
-                                # Check if a flight plan with the same composite key exists and replace it
-                                found = False
-                                for i, fp in enumerate(flight_plans_cache):
-                                    if (fp.get("callsign"), fp.get("departure"), fp.get("arrival")) == composite_key:
-                                        flight_plans_cache[i] = flight_plan
-                                        found = True
-                                        break
-
-                                if not found:
-                                    flight_plans_cache.appendleft(flight_plan)
+            loaded = load_checkpoint(flight_plans_cache, Config.FLIGHT_PLAN_CHECKPOINT_PATH, max_age=Config.FLIGHT_PLAN_TTL)
+            if loaded:
+                logger.info("Warm-started flight plan cache with %d plans from checkpoint", loaded)
         except Exception as e:
-            # Use print here as we are outside the Flask app context
-            print(f"WebSocket error: {e}. Reconnecting in 5 seconds...")
-        await asyncio.sleep(5)
+            logger.warning("Ignoring unreadable flight plan checkpoint: %s", e)
+        checkpointer = SnapshotPublisher(
+            flight_plans_cache, Config.FLIGHT_PLAN_CHECKPOINT_PATH, Config.FLIGHT_PLAN_CHECKPOINT_INTERVAL,
+            heartbeat_intervals=0, name='flight plan checkpoint'
+        )
+        threading.Thread(target=checkpointer.run, name="flight-plan-checkpoint", daemon=True).start()
+
+    def _acquire_host_lock(self):
+        if not self.lock_path:
+            return True
+        lock_file = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _run_ingest(self):
+        while not self._acquire_host_lock():
+            self.state = 'standby'
+            time.sleep(self.RECONNECT_MAX_DELAY)
+        self._start_checkpoints()
+        run_websocket_in_background(self._client())
+
+    async def _client(self):
+        attempt = 0
+        while True:
+            self.state = 'connecting'
+            try:
+                async with websockets.connect(self.uri, origin="") as websocket:
+                    logger.info("WebSocket connected to %s", self.uri)
+                    self.state = 'connected'
+                    self.connected_since = time.time()
+                    self.last_error = None
+                    attempt = 0
+                    async for message in websocket:
+                        self._record_message(message)
+                self.last_error = "Connection closed by server"
+            except Exception as e:
+                self.last_error = str(e)
+            self.connected_since = None
+            self.reconnects += 1
+
+            # Capped exponential backoff with jitter so workers don't reconnect in lockstep
+            ceiling = min(self.RECONNECT_MAX_DELAY, self.RECONNECT_BASE_DELAY * 2 ** attempt)
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+            attempt += 1
+            self.state = 'backoff'
+            self.next_retry_at = time.time() + delay
+            logger.warning("WebSocket error: %s. Reconnecting in %.1f seconds...", self.last_error, delay)
+            await asyncio.sleep(delay)
 
-def run_websocket_in_background():
-    """Runs the WebSocket client in a separate thread."""
+    def _record_message(self, message):
+        now = time.time()
+        self.messages_received += 1
+        self.last_message_at = now
+        second = int(now)
+        if self._message_buckets and self._message_buckets[-1][0] == second:
+            self._message_buckets[-1][1] += 1
+        else:
+            self._message_buckets.append([second, 1])
+        try:
+            if handle_websocket_message(message) is not None:
+                self.flight_plans_received += 1
+        except ValueError as e:
+            self.parse_errors += 1
+            logger.warning("Discarding malformed WebSocket message: %s", e)
+
+    def local_stats(self):
+        """Returns this process's own ingest counters."""
+        now = time.time()
+        window_start = now - self.RATE_WINDOW
+        recent_messages = sum(count for second, count in list(self._message_buckets) if second > window_start)
+        return {
+            "mode": self.mode,
+            "role": self.role,
+            "state": self.state,
+            "connected": self.state == 'connected',
+            "reconnects": self.reconnects,
+            "messages_received": self.messages_received,
+            "flight_plans_received": self.flight_plans_received,
+            "parse_errors": self.parse_errors,
+            "messages_per_second": round(recent_messages / self.RATE_WINDOW, 3),
+            "connected_since": self.connected_since,
+            "last_message_at": self.last_message_at,
+            "last_message_age": now - self.last_message_at if self.last_message_at else None,
+            "last_error": self.last_error,
+            "next_retry_at": self.next_retry_at if self.state == 'backoff' else None,
+        }
+
+    def stats(self):
+        """
+        Returns the health of flight plan ingestion as seen from this process.
+        Followers report the ingester's published counters, with ages recomputed locally.
+        """
+        if self.role != 'follower':
+            return self.local_stats()
+
+        ingester_stats = dict(self._follower.meta.get("ingest") or {"state": "unknown", "connected": False})
+        last_message_at = ingester_stats.get("last_message_at")
+        ingester_stats.update({
+            "mode": self.mode,
+            "role": self.role,
+            "last_message_age": time.time() - last_message_at if last_message_at else None,
+            "snapshot_age": time.time() - self._follower.written_at if self._follower.written_at else None,
+        })
+        return ingester_stats
+
+ingest_supervisor = IngestSupervisor(Config.DATA_API_WSS_URL, mode=Config.FLIGHT_PLAN_INGEST_MODE, lock_path=Config.INGEST_LOCK_FILE)
+
+# --- Metrics ---
+GaugeCallback('flight_plan_cache_size', 'Flight plans currently cached.', lambda: len(flight_plans_cache))
+GaugeCallback('flight_plan_cache_version', 'Sequence number of the flight plan cache.', lambda: flight_plans_cache.version)
+GaugeCallback('flight_plan_cache_upserts_total', 'Flight plans upserted by this process.',
+              lambda: flight_plans_cache.upserts, type='counter')
+GaugeCallback('ingest_messages_total', 'WebSocket messages received from 24data.',
+              lambda: ingest_supervisor.stats().get("messages_received"), type='counter')
+GaugeCallback('ingest_messages_per_second', 'WebSocket messages per second over the last minute.',
+              lambda: ingest_supervisor.stats().get("messages_per_second"))
+GaugeCallback('ingest_connected', 'Whether the 24data WebSocket is connected.',
+              lambda: int(bool(ingest_supervisor.stats().get("connected"))))
+
+def run_websocket_in_background(client):
+    """Runs a WebSocket client coroutine on a fresh event loop in the current (background) thread."""
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    loop.run_until_complete(flight_plan_websocket_client())
+    loop.run_until_complete(client)
+
+def run_snapshot_publisher():
+    """Publishes the flight plan cache and ingest stats as a snapshot and journal for the workers (ingester side of 'shared' mode)."""
+    SnapshotPublisher(
+        flight_plans_cache, Config.FLIGHT_PLAN_SHARED_PATH, Config.FLIGHT_PLAN_SHARED_INTERVAL,
+        meta=lambda: {"ingest": ingest_supervisor.local_stats()}, journal=True
+    ).run()
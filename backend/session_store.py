@@ -0,0 +1,327 @@
+"""
+Server-side sessions: the cookie carries only an opaque session ID, and the session data
+lives in an in-memory LRU tier in front of a pluggable persistent tier.
+
+The cookie is set when a session is created or rotated, and for permanent sessions
+re-sent at most once per SESSION_REFRESH_INTERVAL to push its expiry forward, instead of
+being re-signed and re-sent whenever the session changes. Records are serialized with
+Flask's tagged JSON, so the session holds the same types as the cookie session.
+
+A session holding nothing but its generated ID key is not stored at all: the key is
+derived from the cookie's session ID, so crawlers and health checks cost no records.
+Records of non-permanent sessions expire SESSION_TRANSIENT_LIFETIME after their last
+refresh rather than after PERMANENT_SESSION_LIFETIME.
+"""
+
+import hashlib
+import importlib
+import os
+import re
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{43}$')  # secrets.token_urlsafe(32)
+CLEANUP_INTERVAL = 3600  # seconds between sweeps for expired records
+
+_serializer = TaggedJSONSerializer()
+
+
+def new_session_id():
+    return secrets.token_urlsafe(32)
+
+
+def derived_id(sid):
+    """A stable, non-reversible UUID for the session with ID `sid`."""
+    return str(uuid.UUID(bytes=hashlib.sha256(sid.encode('ascii')).digest()[:16]))
+
+
+class ServerSideSession(SecureCookieSession):
+    """A session identified by `sid`, whose data is stored on the server."""
+
+    def __init__(self, initial=None, sid=None, new=False, record=None):
+        super().__init__(initial)
+        self.sid = sid or new_session_id()
+        self.new = new
+        self.record = record
+        self.previous_sid = None
+
+    def regenerate(self):
+        """Moves the session to a fresh ID, e.g. after login, so a planted ID is useless."""
+        if not self.new and self.previous_sid is None:
+            self.previous_sid = self.sid
+        self.sid = new_session_id()
+        self.modified = True
+
+
+class SessionBackend:
+    """
+    Persistent tier. Records are dicts with the session `data`, its `expires_at` time and
+    `refreshed_at`, when its expiry and cookie were last pushed forward.
+
+    version() must be cheap: it is called on every request to check that the copy in the
+    LRU tier is current. Return None when the record does not exist.
+    """
+
+    def load(self, sid):
+        """Returns (record, version), or None if there is no such session."""
+        raise NotImplementedError
+
+    def version(self, sid):
+        raise NotImplementedError
+
+    def save(self, sid, record):
+        """Stores `record` and returns its new version."""
+        raise NotImplementedError
+
+    def delete(self, sid):
+        raise NotImplementedError
+
+    def cleanup(self, now):
+        """Removes records that expired before `now`."""
+
+
+class FileSessionBackend(SessionBackend):
+    """
+    One file per session in `directory`, shared by every worker on the host. Files are
+    replaced atomically, so (inode, mtime) identifies a version and a stat() is enough
+    to tell whether a cached copy is stale.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, sid):
+        return os.path.join(self.directory, f"{sid}.session")
+
+    @staticmethod
+    def _version(stat):
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def load(self, sid):
+        try:
+            with open(self._path(sid), 'r', encoding='utf-8') as f:
+                version = self._version(os.fstat(f.fileno()))
+                return _serializer.loads(f.read()), version
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def version(self, sid):
+        try:
+            return self._version(os.stat(self._path(sid)))
+        except FileNotFoundError:
+            return None
+
+    def save(self, sid, record):
+        path = self._path(sid)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(_serializer.dumps(record))
+        os.replace(tmp_path, path)
+        return self._version(os.stat(path))
+
+    def delete(self, sid):
+        try:
+            os.remove(self._path(sid))
+        except FileNotFoundError:
+            pass
+
+    def cleanup(self, now):
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.session'):
+                continue
+            loaded = self.load(entry.name[:-len('.session')])
+            if loaded is not None and loaded[0]["expires_at"] <= now:
+                self.delete(entry.name[:-len('.session')])
+
+
+class SessionStore:
+    """
+    An LRU of up to `max_entries` session records in front of `backend`. Without a
+    backend the LRU is the only copy, which only suits a single worker process.
+    """
+
+    def __init__(self, backend=None, max_entries=10000):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # sid -> (record, version)
+        self._lock = threading.Lock()
+        self._last_cleanup = time.time()
+
+    def _remember(self, sid, record, version):
+        with self._lock:
+            self._entries[sid] = (record, version)
+            self._entries.move_to_end(sid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _forget(self, sid):
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def get(self, sid, now=None):
+        """Returns the unexpired record for `sid`, or None."""
+        now = now or time.time()
+        with self._lock:
+            cached = self._entries.get(sid)
+            if cached is not None:
+                self._entries.move_to_end(sid)
+
+        if cached is not None and (self.backend is None or self.backend.version(sid) == cached[1]):
+            self.hits += 1
+            record = cached[0]
+        elif self.backend is None:
+            self.misses += 1
+            return None
+        else:
+            self.misses += 1
+            loaded = self.backend.load(sid)
+            if loaded is None:
+                self._forget(sid)
+                return None
+            record, version = loaded
+            self._remember(sid, record, version)
+
+        if record["expires_at"] <= now:
+            self.delete(sid)
+            return None
+        return record
+
+    def save(self, sid, record):
+        version = self.backend.save(sid, record) if self.backend is not None else None
+        self._remember(sid, record, version)
+        self._maybe_cleanup(time.time())
+
+    def delete(self, sid):
+        if self.backend is not None:
+            self.backend.delete(sid)
+        self._forget(sid)
+
+    def _maybe_cleanup(self, now):
+        if now - self._last_cleanup < CLEANUP_INTERVAL:
+            return
+        self._last_cleanup = now
+        if self.backend is not None:
+            threading.Thread(target=self.backend.cleanup, args=(now,), name="session-cleanup", daemon=True).start()
+        else:
+            with self._lock:
+                expired = [sid for sid, (record, _) in self._entries.items() if record["expires_at"] <= now]
+                for sid in expired:
+                    del self._entries[sid]
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Flask session interface that keeps session data in a SessionStore.
+
+    With `id_key`, every session starts out holding that key, set to derived_id() of its
+    session ID, and a session with nothing else in it is never stored.
+    """
+
+    session_class = ServerSideSession
+
+    def __init__(self, store, refresh_interval=86400, transient_lifetime=14400, id_key=None):
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.transient_lifetime = transient_lifetime
+        self.id_key = id_key
+
+    def _initial_data(self, sid):
+        return {self.id_key: derived_id(sid)} if self.id_key else None
+
+    def _is_bare(self, session):
+        return set(session) <= {self.id_key, '_permanent'}
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and SESSION_ID.match(sid):
+            record = self.store.get(sid)
+            if record is not None:
+                return self.session_class(record["data"], sid=sid, record=record)
+            # Unknown or expired: a bare session keeps its ID, so its id_key stays the same
+            return self.session_class(self._initial_data(sid), sid=sid)
+        sid = new_session_id()
+        return self.session_class(self._initial_data(sid), sid=sid, new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        partitioned = self.get_cookie_partitioned(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+        response.vary.add('Cookie')
+
+        record = session.record
+        if record is None and not session.new and session.previous_sid is None and session and not self._is_bare(session):
+            # A record is only ever created under an ID this server handed out
+            session.regenerate()
+        if session.previous_sid is not None:
+            self.store.delete(session.previous_sid)
+
+        if not session:
+            if not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(
+                    name, domain=domain, path=path, secure=secure, partitioned=partitioned,
+                    samesite=samesite, httponly=httponly
+                )
+            return
+
+        now = time.time()
+        if record is None and self._is_bare(session):
+            # Nothing to store; the cookie alone carries the session
+            if session.new:
+                response.set_cookie(
+                    name, session.sid, expires=self.get_expiration_time(app, session), httponly=httponly,
+                    domain=domain, path=path, secure=secure, partitioned=partitioned, samesite=samesite
+                )
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds() if session.permanent else self.transient_lifetime
+        refresh_due = record is None or now - record["refreshed_at"] >= min(self.refresh_interval, lifetime / 2)
+        if not (session.modified or refresh_due or session.previous_sid is not None):
+            return
+
+        set_cookie = refresh_due or session.previous_sid is not None
+        self.store.save(session.sid, {
+            "data": dict(session),
+            "expires_at": now + lifetime if set_cookie else record["expires_at"],
+            "refreshed_at": now if set_cookie else record["refreshed_at"],
+        })
+        if set_cookie:
+            response.set_cookie(
+                name, session.sid, expires=self.get_expiration_time(app, session), httponly=httponly,
+                domain=domain, path=path, secure=secure, partitioned=partitioned, samesite=samesite
+            )
+
+
+def _create_backend(name, config):
+    if name == 'memory':
+        return None
+    if name == 'file':
+        return FileSessionBackend(config['SESSION_FILE_DIR'])
+    # 'package.module:ClassName' for any other SessionBackend implementation
+    module_name, _, class_name = name.partition(':')
+    if not class_name:
+        raise ValueError(f"Unknown SESSION_BACKEND '{name}'")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def create_session_interface(config):
+    """Builds the server-side session interface configured by SESSION_BACKEND."""
+    store = SessionStore(_create_backend(config['SESSION_BACKEND'], config), max_entries=config['SESSION_CACHE_SIZE'])
+    # 'session_id' is the visitor ID create_app's ensure_session_id() puts in every session
+    return ServerSideSessionInterface(
+        store, refresh_interval=config['SESSION_REFRESH_INTERVAL'],
+        transient_lifetime=config['SESSION_TRANSIENT_LIFETIME'], id_key='session_id'
+    )
@@ -1,9 +1,10 @@
-import time
-from collections import deque
+import logging
 from flask import Blueprint, jsonify, render_template, current_app
-import requests
+from .error_log import format_record, recent_log_records
+from .database import client_pool_stats, flight_plan_writer, write_behind
+from .services import health_prober, ingest_supervisor
 
-from .services import flight_plans_cache
+logger = logging.getLogger(__name__)
 
 status_bp = Blueprint('status_bp', __name__)
 
@@ -31,12 +32,26 @@ def get_full_status():
     response = {
         "24data_connectivity": {
             "status": data_status,
-            "endpoints": [{"name": name, "status": "operational" if "Online" in details["status"] else "outage", "message": details["status"]} for name, details in external_services.items()]
+            "endpoints": [{
+                "name": name,
+                "status": "operational" if "Online" in details["status"] else "outage",
+                "message": details["status"],
+                "latency_ms": details.get("latency_ms"),
+                "availability": details.get("availability"),
+                "checked_at": details.get("checked_at")
+            } for name, details in external_services.items()],
+            "probes": {name: details for name, details in external_services.items() if "history" in details},
+            "ingest": ingest_supervisor.stats()
         },
         "24ifr_api": {
             "status": api_status,
             "endpoints": [{"name": route["endpoint"], "path": route["path"], "methods": route["methods"], "status": "operational"} for route in internal_routes]
         },
+        "database": {
+            "client_pool": client_pool_stats(),
+            "write_behind": write_behind.stats(),
+            "flight_plan_writer": flight_plan_writer.stats()
+        },
         "errors": {
             "status": error_status,
             "count": len(error_log),
@@ -46,27 +61,21 @@ def get_full_status():
     return jsonify(response)
 
 def get_external_service_status():
+    """
+    Returns the latest background probe result for each REST endpoint, plus the
+    WebSocket status derived from the ingest supervisor. Never waits on an upstream.
+    """
     from .config import Config
-    services = {
-        "24DATA_Controllers": {"url": Config.DATA_API_CONTROLLERS_URL, "status": "Offline"},
-        "24DATA_ATIS": {"url": Config.DATA_API_ATIS_URL, "status": "Offline"},
-        "24DATA_WebSocket": {"url": Config.DATA_API_WSS_URL, "status": "Offline"}
-    }
-    try:
-        response = requests.head(services["24DATA_Controllers"]["url"], timeout=5)
-        if response.status_code == 200:
-            services["24DATA_Controllers"]["status"] = "Online"
-    except requests.RequestException:
-        pass
-    try:
-        response = requests.head(services["24DATA_ATIS"]["url"], timeout=5)
-        if response.status_code == 200:
-            services["24DATA_ATIS"]["status"] = "Online"
-    except requests.RequestException:
-        pass
+    # Idempotent; in production create_app has already started it
+    health_prober.start()
+    services = {name: health_prober.status(name) for name in health_prober.targets}
+    services["24DATA_WebSocket"] = {"url": Config.DATA_API_WSS_URL, "status": "Offline"}
 
-    if flight_plans_cache and (time.time() - flight_plans_cache[0]['timestamp']) < 300:
+    ingest = ingest_supervisor.stats()
+    if ingest.get("last_message_age") is not None and ingest["last_message_age"] < 300:
         services["24DATA_WebSocket"]["status"] = "Online (Receiving Data)"
+    elif ingest.get("connected"):
+        services["24DATA_WebSocket"]["status"] = "Online (No Recent Data)"
 
     return services
 
@@ -80,11 +89,10 @@ def get_internal_routes():
     return routes
 
 def get_error_log():
+    """Returns the 25 most recent error records as log lines, oldest first."""
     try:
-        with open('app_errors.log', 'r') as f:
-            return deque(f, 25)
-    except FileNotFoundError:
-        return []
+        records, _ = recent_log_records(25, logging.ERROR)
+        return [format_record(record) for record in reversed(records)]
     except Exception as e:
-        print(f"Error reading error log: {e}")
+        logger.warning("Error reading error log: %s", e)
         return ["Could not read error log file."]
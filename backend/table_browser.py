@@ -0,0 +1,80 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from . import database
+from .caching import CachedResource
+from .config import Config
+
+# Tables the admin table browser may read. Each has `created_at` and `id` columns.
+BROWSABLE_TABLES = [
+    'page_visits', 'clearance_generations', 'flight_plans_received',
+    'user_sessions', 'discord_users', 'admin_activities'
+]
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(row):
+    """Returns an opaque cursor pointing just past `row` in (created_at, id) descending order."""
+    raw = json.dumps([row['created_at'], row['id']], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """
+    Returns the (created_at, id) pair in a cursor. Raises ValueError if it is malformed.
+
+    The values end up inside a PostgREST filter string, so only an ISO-8601 timestamp and
+    an integer or UUID id are accepted; anything else could add filter clauses.
+    """
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        datetime.fromisoformat(created_at)
+        if isinstance(row_id, str):
+            row_id = str(uuid.UUID(row_id))
+        elif not isinstance(row_id, int) or isinstance(row_id, bool):
+            raise ValueError
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, row_id
+
+
+def _load_row_estimates():
+    # Planner statistics (pg_class.reltuples): constant time however large the tables get
+    response = database.supabase_admin.rpc('get_table_row_estimates', {}).execute()
+    return {row['table_name']: row['estimate'] for row in response.data or []}
+
+# Served stale while one background refresh runs, so paging never waits on the estimate
+row_estimates = CachedResource(
+    _load_row_estimates, Config.TABLE_COUNT_ESTIMATE_TTL, stale_ttl=Config.TABLE_COUNT_ESTIMATE_STALE_TTL,
+    name='table-row-estimates'
+)
+
+
+def fetch_table_page(client, table, limit, cursor=None):
+    """
+    Returns one page of `table`, newest first, using keyset pagination on (created_at, id).
+
+    Pass the previous page's `nextCursor` as `cursor` to continue; it is None on the last
+    page. `totalCount` is an estimate from the planner statistics and may be None.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = client.from_(table).select('*').order('created_at', desc=True).order('id', desc=True)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt."{row_id}")')
+    # One extra row tells us whether another page follows without a count
+    rows = query.limit(limit + 1).execute().data or []
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    try:
+        total_count = row_estimates.get()[0].get(table)
+    except Exception:
+        total_count = None
+    return {
+        "data": rows[:limit],
+        "nextCursor": next_cursor,
+        "totalCount": total_count,
+        "totalCountEstimated": True,
+    }
@@ -0,0 +1,154 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import create_app
+from backend.admin_settings import SettingsCache, settings_cache
+from backend.permissions import permission_cache
+
+class TestSettingsCache(unittest.TestCase):
+    @patch('backend.init_db')
+    def setUp(self, mock_init_db):
+        self.app = create_app()
+        self.context = self.app.app_context()
+        self.context.push()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.signal_path = os.path.join(self.tmpdir.name, 'settings.signal')
+        self.settings = {'theme': 'dark'}
+        self.loads = 0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        self.context.pop()
+
+    def loader(self):
+        self.loads += 1
+        return dict(self.settings)
+
+    def test_served_from_memory_until_invalidated(self):
+        """
+        Tests that the settings are loaded once and reloaded right after invalidate().
+        """
+        cache = SettingsCache(self.loader, ttl=60)
+        first = cache.get()
+        self.assertIs(cache.get(), first)
+        self.assertEqual(self.loads, 1)
+
+        self.settings = {'theme': 'light'}
+        cache.invalidate()
+        second = cache.get()
+        self.assertEqual(self.loads, 2)
+        self.assertNotEqual(second.etag, first.etag)
+        self.assertIn(b'light', second.body)
+
+    def test_signal_file_invalidates_other_workers(self):
+        """
+        Tests that a save in one worker is seen by another that shares the signal file.
+        """
+        worker_a = SettingsCache(self.loader, ttl=60, signal_path=self.signal_path, check_interval=0)
+        worker_b = SettingsCache(self.loader, ttl=60, signal_path=self.signal_path, check_interval=0)
+        worker_a.get()
+        worker_b.get()
+
+        self.settings = {'theme': 'light'}
+        worker_a.invalidate()
+        self.assertIn(b'light', worker_b.get().body)
+        self.assertIn(b'light', worker_a.get().body)
+        self.assertEqual(self.loads, 4)
+
+    def test_load_overlapping_a_save_is_not_kept(self):
+        """
+        Tests that a load which started before invalidate() is served but not cached.
+        """
+        started, release = threading.Event(), threading.Event()
+
+        def slow_loader():
+            settings = self.loader()
+            started.set()
+            release.wait(5)
+            return settings
+
+        def load_in_background():
+            with self.app.app_context():
+                cache.get()
+
+        cache = SettingsCache(slow_loader, ttl=60)
+        thread = threading.Thread(target=load_in_background)
+        thread.start()
+        started.wait(5)
+        cache.invalidate()
+        release.set()
+        thread.join(5)
+
+        self.settings = {'theme': 'light'}
+        self.assertIn(b'light', cache.get().body)
+
+    def test_load_failure_serves_last_good(self):
+        """
+        Tests that a failed reload serves the previous payload, and raises when there is none.
+        """
+        cache = SettingsCache(self.loader, ttl=0)
+        payload = cache.get()
+        with patch.object(cache, 'loader', side_effect=RuntimeError('down')):
+            self.assertIs(cache.get(), payload)
+            with self.assertRaises(RuntimeError):
+                SettingsCache(cache.loader, ttl=0).get()
+
+class TestPublicSettingsApi(unittest.TestCase):
+    @patch('backend.init_db')
+    def setUp(self, mock_init_db):
+        """Set up a test client logged in as an admin."""
+        app = create_app()
+        app.config['TESTING'] = True
+        # The production cookie settings (.hasmah.xyz, Secure) would keep the session off localhost
+        app.config['SESSION_COOKIE_DOMAIN'] = None
+        app.config['SESSION_COOKIE_SECURE'] = False
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user'] = {'id': 'admin-id', 'username': 'admin', 'is_admin': True}
+        settings_cache.invalidate()
+        permission_cache.invalidate()
+
+    def tearDown(self):
+        settings_cache.invalidate()
+        permission_cache.invalidate()
+
+    @patch('backend.api.log_to_db')
+    @patch('backend.api.supabase_admin')
+    @patch('backend.database.supabase_admin')
+    def test_etag_and_save_invalidation(self, mock_settings_admin, mock_api_admin, mock_log):
+        """
+        Tests that /api/settings is cached with an ETag, answers a matching If-None-Match
+        with a 304, and serves the new settings right after they are saved.
+        """
+        # The admin check reads discord_users through the same client
+        permissions = mock_settings_admin.table.return_value.select.return_value.eq.return_value.limit.return_value
+        permissions.execute.return_value = MagicMock(data=[{'is_admin': True, 'roles': ['admin']}])
+        query = mock_settings_admin.from_.return_value.select.return_value.eq.return_value.execute
+        query.return_value = MagicMock(data=[{'settings': {'theme': 'dark'}}])
+
+        response = self.client.get('/api/settings')
+        self.assertEqual(response.get_json(), {'theme': 'dark'})
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        etag = response.headers['ETag']
+        response = self.client.get('/api/settings', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(query.call_count, 1)
+
+        mock_api_admin.from_.return_value.upsert.return_value.execute.return_value = MagicMock(data=[])
+        query.return_value = MagicMock(data=[{'settings': {'theme': 'light'}}])
+        self.assertEqual(self.client.post('/api/admin/settings', json={'theme': 'light'}).status_code, 200)
+
+        response = self.client.get('/api/settings', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'theme': 'light'})
+        self.assertEqual(query.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,170 @@
+import gzip
+import json
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import create_app
+from backend.api import analytics_snapshot
+from backend.services import flight_plans_cache
+
+class TestFlightPlansApi(unittest.TestCase):
+    @patch('backend.init_db')
+    def setUp(self, mock_init_db):
+        """Set up a test client with a few cached flight plans."""
+        app = create_app()
+        app.config['TESTING'] = True
+        self.client = app.test_client()
+        flight_plans_cache.clear()
+        flight_plans_cache.upsert({'callsign': 'AAL1', 'departing': 'IRFD', 'arriving': 'ITKO'})
+        flight_plans_cache.upsert({'callsign': 'BAW2', 'departing': 'ITKO', 'arriving': 'IPPH'})
+
+    def tearDown(self):
+        flight_plans_cache.clear()
+
+    def test_filtered_query(self):
+        """
+        Tests that query parameters are applied server-side.
+        """
+        response = self.client.get('/api/flight-plans?departure=IRFD')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['callsign'] for p in response.get_json()], ['AAL1'])
+
+        response = self.client.get('/api/flight-plans?limit=abc')
+        self.assertEqual(response.status_code, 400)
+        for since in ('nan', 'inf', '-inf'):
+            self.assertEqual(self.client.get(f'/api/flight-plans?since={since}').status_code, 400)
+
+    def test_etag_not_modified(self):
+        """
+        Tests that an unchanged store answers a matching If-None-Match with an empty 304.
+        """
+        response = self.client.get('/api/flight-plans')
+        etag = response.headers['ETag']
+
+        response = self.client.get('/api/flight-plans', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        flight_plans_cache.upsert({'callsign': 'DLH3', 'departing': 'IRFD', 'arriving': 'IPPH'})
+        response = self.client.get('/api/flight-plans', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_compressed_payload(self):
+        """
+        Tests that large responses are served pre-compressed to clients that accept gzip.
+        """
+        for i in range(20):
+            flight_plans_cache.upsert({'callsign': f'EZY{i}', 'departing': 'IRFD', 'arriving': 'ITKO', 'route': 'GPS DIRECT'})
+
+        plain = self.client.get('/api/flight-plans')
+        compressed = self.client.get('/api/flight-plans', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(compressed.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed.headers['Vary'])
+        self.assertNotEqual(compressed.headers['ETag'], plain.headers['ETag'])
+        self.assertEqual(json.loads(gzip.decompress(compressed.data)), plain.get_json())
+
+    def test_since_seq_delta(self):
+        """
+        Tests that since_seq returns only the plans changed after that sequence number,
+        and a full reload when the epoch does not match.
+        """
+        response = self.client.get('/api/flight-plans')
+        seq, epoch = response.headers['X-Flight-Plan-Seq'], response.headers['X-Flight-Plan-Epoch']
+        flight_plans_cache.upsert({'callsign': 'DLH3', 'departing': 'IRFD', 'arriving': 'IPPH'})
+
+        data = self.client.get(f'/api/flight-plans?since_seq={seq}&epoch={epoch}').get_json()
+        self.assertFalse(data['full'])
+        self.assertEqual([p['callsign'] for p in data['upserts']], ['DLH3'])
+
+        data = self.client.get(f'/api/flight-plans?since_seq={seq}&epoch=other').get_json()
+        self.assertTrue(data['full'])
+        self.assertEqual(len(data['upserts']), 3)
+
+        # A truncated delta would advance the client's seq past plans it never received
+        response = self.client.get(f'/api/flight-plans?since_seq=0&epoch={epoch}&limit=2')
+        self.assertEqual(response.status_code, 400)
+
+class TestAdminAnalyticsApi(unittest.TestCase):
+    @patch('backend.init_db')
+    def setUp(self, mock_init_db):
+        """Set up a test client logged in as an admin."""
+        app = create_app()
+        app.config['TESTING'] = True
+        # The production cookie settings (.hasmah.xyz, Secure) would keep the session off localhost
+        app.config['SESSION_COOKIE_DOMAIN'] = None
+        app.config['SESSION_COOKIE_SECURE'] = False
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user'] = {'id': 'admin-id', 'username': 'admin', 'is_admin': True}
+        analytics_snapshot.invalidate()
+
+    def tearDown(self):
+        analytics_snapshot.invalidate()
+
+    @patch('backend.api.supabase_admin')
+    def test_analytics_and_charts_share_one_snapshot(self, mock_admin):
+        """
+        Tests that the analytics and charts endpoints are served from one cached RPC call,
+        which ?refresh=true invalidates.
+        """
+        mock_admin.rpc.return_value.execute.return_value = MagicMock(data={
+            'totalVisits': 10, 'clearancesGenerated': 4, 'flightPlansReceived': 7,
+            'dailyVisits': [{'date': '2026-10-16', 'count': 3}],
+            'dailyClearances': [{'date': '2026-10-16', 'count': 1}],
+        })
+
+        analytics = self.client.get('/api/admin/analytics').get_json()
+        charts = self.client.get('/api/admin/charts').get_json()
+        self.assertEqual(analytics['totalVisits'], 10)
+        self.assertEqual(analytics['dailyVisits'], {'2026-10-16': 3})
+        self.assertEqual(charts['daily_clearances'], [{'date': '2026-10-16', 'count': 1}])
+        mock_admin.rpc.assert_called_once_with('get_analytics_snapshot', {})
+
+        self.client.get('/api/admin/analytics?refresh=true')
+        self.assertEqual(mock_admin.rpc.call_count, 2)
+
+class TestAdminLogsApi(unittest.TestCase):
+    @patch('backend.init_db')
+    def setUp(self, mock_init_db):
+        """Set up a test client logged in as an admin."""
+        app = create_app()
+        app.config['TESTING'] = True
+        # The production cookie settings (.hasmah.xyz, Secure) would keep the session off localhost
+        app.config['SESSION_COOKIE_DOMAIN'] = None
+        app.config['SESSION_COOKIE_SECURE'] = False
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user'] = {'id': 'admin-id', 'username': 'admin', 'is_admin': True}
+
+    @patch('backend.auth_utils.supabase_admin', MagicMock())
+    @patch('backend.admin.supabase_admin')
+    def test_database_logs(self, mock_admin):
+        """
+        Tests that the rows log_to_db() writes to debug_logs are served, filtered by level.
+        """
+        query = mock_admin.from_.return_value.select.return_value.order.return_value.limit.return_value
+        query.eq.return_value.execute.return_value = MagicMock(data=[{'level': 'warn', 'message': 'slow'}])
+
+        response = self.client.get('/api/admin/debug-logs?level=warn')
+        self.assertEqual(response.get_json(), {'logs': [{'level': 'warn', 'message': 'slow'}]})
+        mock_admin.from_.assert_called_once_with('debug_logs')
+        query.eq.assert_called_once_with('level', 'warn')
+
+    @patch('backend.auth_utils.supabase_admin', MagicMock())
+    @patch('backend.admin.recent_log_records', return_value=([], None))
+    def test_log_limit_is_bounded(self, mock_records):
+        """
+        Tests that the error log page size is clamped to 1..1000 and must be an integer.
+        """
+        for requested, expected in (('0', 1), ('-5', 1), ('5000', 1000), ('20', 20)):
+            self.assertEqual(self.client.get(f'/api/admin/logs?limit={requested}').status_code, 200)
+            self.assertEqual(mock_records.call_args.args[0], expected)
+        self.assertEqual(self.client.get('/api/admin/logs?limit=abc').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+import requests
+import websockets
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from ingest import benchmark
+from postgrest_stub import PostgrestStub
+from replay_server import ReplayServer, synthetic_corpus
+from run import compare, percentile, summarize
+
+from backend.flight_plan_store import FlightPlanStore, flight_plan_key
+
+class TestBenchmarkStandIns(unittest.TestCase):
+    def test_replay_server_feeds_flight_plans(self):
+        """
+        Tests that the replay server serves the REST payloads and streams 24data-shaped messages.
+        """
+        replay = ReplayServer(message_rate=200).start()
+        try:
+            self.assertEqual(requests.get(f"{replay.base_url}/controllers").status_code, 200)
+            self.assertEqual(requests.head(f"{replay.base_url}/atis").status_code, 200)
+
+            async def receive(count):
+                async with websockets.connect(replay.wss_url) as websocket:
+                    return [await websocket.recv() for _ in range(count)]
+            messages = asyncio.run(receive(5))
+        finally:
+            replay.stop()
+
+        self.assertEqual(messages, replay.messages[:5])
+        plan = json.loads(messages[0])["d"]
+        self.assertTrue(all(flight_plan_key(plan)))
+        store = FlightPlanStore(capacity=10)
+        store.upsert(plan)
+        self.assertEqual(len(store), 1)
+
+    def test_postgrest_stub_counts_calls(self):
+        """
+        Tests that the PostgREST stub answers reads, writes and RPCs and counts them by target.
+        """
+        stub = PostgrestStub().start()
+        try:
+            self.assertEqual(requests.get(f"{stub.url}/rest/v1/page_visits?select=*").json(), [])
+            self.assertEqual(requests.post(f"{stub.url}/rest/v1/page_visits", json=[{}]).status_code, 201)
+            self.assertEqual(requests.post(f"{stub.url}/rest/v1/rpc/get_analytics_snapshot", json={}).json(), {})
+        finally:
+            stub.stop()
+        self.assertEqual(stub.calls[('POST', 'page_visits')], 1)
+        self.assertEqual(stub.calls[('POST', 'rpc:get_analytics_snapshot')], 1)
+
+class TestLoadReport(unittest.TestCase):
+    def test_percentiles_and_regressions(self):
+        """
+        Tests nearest-rank percentiles and the baseline comparison.
+        """
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+
+        results = summarize({'/api/controllers': [(0.010, True)] * 99 + [(0.100, False)]}, elapsed=10)
+        self.assertEqual(results['/api/controllers']['rps'], 10.0)
+        self.assertEqual(results['/api/controllers']['p95_ms'], 10.0)
+
+        baseline = {"endpoints": {'/api/controllers': {"p95_ms": 5.0}}}
+        regressions = compare(results, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+
+class TestIngestBenchmark(unittest.TestCase):
+    def test_corpus_runs_through_the_ingest_path(self):
+        """
+        Tests that the ingest benchmark upserts only flight plans and times every store lock hold.
+        """
+        corpus = synthetic_corpus(200, flight_plan_share=0.2)
+        flight_plans = sum(1 for message in corpus if '"FLIGHT_PLAN"' in message or '"EVENT_FLIGHT_PLAN"' in message)
+
+        result = benchmark(corpus, capacity=50, repeat=1)
+
+        self.assertEqual(result["messages"], 200)
+        self.assertEqual(result["flight_plans"], flight_plans * 2)  # timed pass plus allocation pass
+        self.assertEqual(result["lock_holds"], flight_plans)
+        self.assertGreater(result["messages_per_second"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.broadcast import FlightPlanBroadcaster
+
+class TestFlightPlanBroadcaster(unittest.TestCase):
+    def test_airport_filter(self):
+        """
+        Tests that a subscription with an airport filter only receives plans touching that airport.
+        """
+        broadcaster = FlightPlanBroadcaster()
+        subscription = broadcaster.subscribe(airport='irfd')
+        broadcaster.publish({'callsign': 'AAL1', 'departing': 'ITKO', 'arriving': 'IPPH'})
+        broadcaster.publish({'callsign': 'BAW2', 'departing': 'ITKO', 'arriving': 'IRFD'})
+
+        self.assertEqual(subscription.get(timeout=0)['callsign'], 'BAW2')
+        self.assertIsNone(subscription.get(timeout=0))
+
+    def test_slow_consumer_is_dropped(self):
+        """
+        Tests that a subscriber whose queue is full is dropped instead of blocking the publisher.
+        """
+        broadcaster = FlightPlanBroadcaster(queue_size=1)
+        slow = broadcaster.subscribe()
+        broadcaster.publish({'callsign': 'AAL1'})
+        broadcaster.publish({'callsign': 'AAL2'})
+
+        self.assertTrue(slow.dropped)
+        self.assertEqual(len(broadcaster), 0)
+
+    def test_subscriber_limit(self):
+        """
+        Tests that subscribe() refuses new subscribers once the limit is reached.
+        """
+        broadcaster = FlightPlanBroadcaster(max_subscribers=1)
+        self.assertIsNotNone(broadcaster.subscribe())
+        self.assertIsNone(broadcaster.subscribe())
+
+if __name__ == '__main__':
+    unittest.main()
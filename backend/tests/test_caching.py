@@ -0,0 +1,97 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.caching import CachedResource
+
+class TestCachedResource(unittest.TestCase):
+    def test_single_flight(self):
+        """
+        Tests that concurrent callers with an empty cache share one loader call.
+        """
+        calls = []
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return len(calls)
+
+        resource = CachedResource(loader, ttl=60)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(resource.get())) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(value == 1 and fetched_now for value, _, fetched_now in results))
+        self.assertFalse(resource.get()[2])
+
+    def test_stale_while_revalidate(self):
+        """
+        Tests that an expired value is served immediately while a background refresh runs.
+        """
+        values = iter(['old', 'new'])
+        resource = CachedResource(lambda: next(values), ttl=0.05, stale_ttl=60)
+        resource.get()
+        time.sleep(0.1)
+
+        self.assertEqual(resource.get()[0], 'old')
+        time.sleep(0.1)
+        self.assertEqual(resource.get()[0], 'new')
+
+    def test_error_falls_back_to_last_value(self):
+        """
+        Tests that a failed fetch serves the last good value, and raises when there is none.
+        """
+        outcomes = iter(['ok', RuntimeError('upstream down')])
+        def loader():
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        resource = CachedResource(loader, ttl=0)
+        self.assertEqual(resource.get()[0], 'ok')
+        value, _, fetched_now = resource.get()
+        self.assertEqual(value, 'ok')
+        self.assertFalse(fetched_now)
+
+        failing = CachedResource(lambda: 1 / 0, ttl=60)
+        with self.assertRaises(ZeroDivisionError):
+            failing.get()
+
+    def test_fetch_overlapping_invalidate_is_discarded(self):
+        """
+        Tests that a fetch which started before invalidate() is run again, so neither
+        its caller nor the cache gets the value it read.
+        """
+        data = {'value': 'old'}
+        started, release = threading.Event(), threading.Event()
+        def loader():
+            value = data['value']
+            if not started.is_set():
+                started.set()
+                release.wait(5)
+            return value
+
+        resource = CachedResource(loader, ttl=60)
+        results = []
+        thread = threading.Thread(target=lambda: results.append(resource.get()))
+        thread.start()
+        started.wait(5)
+        data['value'] = 'new'
+        resource.invalidate()
+        release.set()
+        thread.join(5)
+
+        self.assertEqual(results[0][0], 'new')
+        self.assertEqual(resource.get()[0], 'new')
+
+if __name__ == '__main__':
+    unittest.main()
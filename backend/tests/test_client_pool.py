@@ -0,0 +1,46 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.client_pool import ClientPool
+
+class TestClientPool(unittest.TestCase):
+    def test_clients_are_reused(self):
+        """
+        Tests that a released client is handed out again instead of creating a new one.
+        """
+        pool = ClientPool(object, max_size=2)
+        client = pool.acquire()
+        pool.release(client)
+
+        self.assertIs(pool.acquire(), client)
+        self.assertEqual(pool.stats()['size'], 1)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_exhausted_pool_waits_then_times_out(self):
+        """
+        Tests that acquire() waits for a release when the pool is full, and records the wait.
+        """
+        pool = ClientPool(object, max_size=1, timeout=0.05)
+        client = pool.acquire()
+        with self.assertRaises(TimeoutError):
+            pool.acquire()
+
+        pool.timeout = 5
+        threading.Timer(0.05, pool.release, args=(client,)).start()
+        started = time.monotonic()
+        self.assertIs(pool.acquire(), client)
+        self.assertGreater(time.monotonic() - started, 0.01)
+
+        stats = pool.stats()
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['max_wait_ms'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
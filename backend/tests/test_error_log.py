@@ -0,0 +1,126 @@
+import logging
+import os
+import sys
+import tempfile
+import unittest
+from logging.handlers import RotatingFileHandler
+from unittest.mock import patch
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import error_log
+from backend.error_log import (
+    LOG_FORMAT, PositionedFileHandler, RingBufferHandler, parse_level, read_log_records, recent_log_records
+)
+
+class TestErrorLog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'app_errors.log')
+        self.logger = logging.getLogger(f'test_error_log.{id(self)}')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        for handler in list(self.logger.handlers):
+            handler.close()
+            self.logger.removeHandler(handler)
+        self.tmpdir.cleanup()
+
+    @patch('backend.error_log.READ_BLOCK_SIZE', 64)  # force lines to straddle block boundaries
+    def test_reads_backward_across_rotated_files(self):
+        """
+        Tests that records are read newest first through the rotated backups, filtered by
+        level, with tracebacks attached and cursors continuing where the last page ended.
+        """
+        handler = RotatingFileHandler(self.path, maxBytes=2048, backupCount=5)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.logger.addHandler(handler)
+        for i in range(60):
+            if i % 3 == 0:
+                try:
+                    raise RuntimeError(f"boom {i}")
+                except RuntimeError:
+                    self.logger.error(f"failure {i}", exc_info=True)
+            else:
+                self.logger.warning(f"warning {i}")
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+
+        records, cursor = read_log_records(5, logging.ERROR, path=self.path)
+        self.assertEqual([r['message'] for r in records], [f"failure {i}" for i in (57, 54, 51, 48, 45)])
+        self.assertIn("RuntimeError: boom 57", records[0]['details'])
+
+        records, _ = read_log_records(2, logging.ERROR, cursor=cursor, path=self.path)
+        self.assertEqual([r['message'] for r in records], ["failure 42", "failure 39"])
+
+        records, cursor = read_log_records(1000, parse_level('all'), path=self.path)
+        self.assertIsNone(cursor)
+        messages = [r['message'] for r in records]
+        self.assertEqual(messages, sorted(messages, key=lambda m: -int(m.split()[-1])))
+
+    def test_first_page_includes_other_writers(self):
+        """
+        Tests that the newest page is read from the shared file, so records written by other
+        workers are included, and that records sharing a timestamp are not skipped between pages.
+        """
+        with open(self.path, 'w', encoding='utf-8') as f:
+            for i in range(6):
+                f.write(f"2026-10-17 12:00:00,000 - ERROR - worker {i % 2} record {i}\n")
+
+        records, cursor = recent_log_records(4, logging.ERROR, path=self.path)
+        self.assertEqual([r['message'] for r in records], [f"worker {i % 2} record {i}" for i in (5, 4, 3, 2)])
+        records, cursor = recent_log_records(4, logging.ERROR, cursor=cursor, path=self.path)
+        self.assertEqual([r['message'] for r in records], ["worker 1 record 1", "worker 0 record 0"])
+        self.assertIsNone(cursor)
+        with self.assertRaises(ValueError):
+            recent_log_records(4, cursor='before:2026-10-17', path=self.path)
+
+    def test_newest_page_from_ring_buffer(self):
+        """
+        Tests that the newest page comes from memory while this process is the only writer,
+        continues from the file where it ended, and falls back to the file once another
+        process has written to it.
+        """
+        formatter = logging.Formatter(LOG_FORMAT)
+        file_handler = PositionedFileHandler(self.path, maxBytes=1024 * 1024, backupCount=5)
+        file_handler.setFormatter(formatter)
+        buffer = RingBufferHandler(capacity=10)
+        buffer.setFormatter(formatter)
+        self.logger.addHandler(file_handler)
+        self.logger.addHandler(buffer)
+        for i in range(6):
+            self.logger.error(f"failure {i}")
+
+        with patch.object(error_log, 'error_log_buffer', buffer), \
+                patch.object(error_log, 'read_log_records', wraps=read_log_records) as reader:
+            records, cursor = recent_log_records(4, path=self.path)
+            self.assertEqual([r['message'] for r in records], [f"failure {i}" for i in (5, 4, 3, 2)])
+            reader.assert_not_called()
+
+            records, cursor = recent_log_records(4, cursor=cursor, path=self.path)
+            self.assertEqual([r['message'] for r in records], ["failure 1", "failure 0"])
+            self.assertIsNone(cursor)
+
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("2026-10-17 12:00:00,000 - ERROR - another worker\n")
+            reader.reset_mock()
+            records, _ = recent_log_records(2, path=self.path)
+            self.assertEqual([r['message'] for r in records], ["another worker", "failure 5"])
+            reader.assert_called_once()
+
+    def test_ring_buffer(self):
+        """
+        Tests that the in-memory buffer keeps only the newest records and filters by level.
+        """
+        buffer = RingBufferHandler(capacity=3)
+        buffer.setFormatter(logging.Formatter(LOG_FORMAT))
+        self.logger.addHandler(buffer)
+        for i in range(5):
+            self.logger.log(logging.ERROR if i % 2 else logging.WARNING, f"message {i}")
+
+        self.assertEqual([r['message'] for r in buffer.records(10)], ["message 4", "message 3", "message 2"])
+        self.assertEqual([r['message'] for r in buffer.records(10, logging.ERROR)], ["message 3"])
+
+if __name__ == '__main__':
+    unittest.main()
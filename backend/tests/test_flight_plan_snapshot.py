@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.flight_plan_store import FlightPlanStore
+from backend.flight_plan_snapshot import SnapshotFollower, SnapshotPublisher, load_checkpoint, read_snapshot
+
+class TestFlightPlanSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'flight_plans.snapshot')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_read_missing_snapshot(self):
+        """
+        Tests that reading a snapshot that was never written returns None.
+        """
+        self.assertIsNone(read_snapshot(self.path))
+
+    def test_follower_mirrors_published_store(self):
+        """
+        Tests that a follower store ends up with the publisher's plans in the same order.
+        """
+        ingest_store = FlightPlanStore(capacity=10)
+        worker_store = FlightPlanStore(capacity=10)
+        publisher = SnapshotPublisher(ingest_store, self.path, interval=1)
+        follower = SnapshotFollower(worker_store, self.path, interval=1)
+
+        ingest_store.upsert({'callsign': 'AAL1', 'departing': 'IRFD', 'arriving': 'ITKO'})
+        ingest_store.upsert({'callsign': 'BAW2', 'departing': 'ITKO', 'arriving': 'IRFD'})
+        publisher.publish()
+        follower.refresh()
+
+        self.assertEqual([p['callsign'] for p in worker_store.snapshot()], ['BAW2', 'AAL1'])
+        self.assertEqual([p['callsign'] for p in worker_store.query(departure='ITKO')], ['BAW2'])
+
+    def test_follower_applies_journal_deltas(self):
+        """
+        Tests that after the first snapshot, publishes only append changes to the journal,
+        which the follower applies (upserts, updates and removals) with the publisher's
+        sequence numbers, and that a journal outgrowing the snapshot is compacted.
+        """
+        ingest_store = FlightPlanStore(capacity=3)
+        worker_store = FlightPlanStore(capacity=3, ttl=60)
+        publisher = SnapshotPublisher(ingest_store, self.path, interval=1, journal=True)
+        updates = []
+        follower = SnapshotFollower(worker_store, self.path, interval=1, on_update=updates.append)
+
+        ingest_store.upsert({'callsign': 'AAL1', 'departing': 'IRFD', 'arriving': 'ITKO'})
+        publisher.publish()
+        follower.refresh()
+        snapshot_stat = os.stat(self.path)
+
+        ingest_store.upsert({'callsign': 'BAW2', 'departing': 'ITKO', 'arriving': 'IRFD'})
+        ingest_store.upsert({'callsign': 'AAL1', 'departing': 'IRFD', 'arriving': 'ITKO', 'route': 'GPS'})
+        ingest_store.upsert({'callsign': 'DLH3', 'departing': 'IRFD', 'arriving': 'IPPH'})
+        ingest_store.upsert({'callsign': 'KLM4', 'departing': 'IPPH', 'arriving': 'IRFD'})  # evicts BAW2
+        publisher.publish()
+        follower.refresh()
+
+        self.assertEqual(os.stat(self.path).st_mtime_ns, snapshot_stat.st_mtime_ns)
+        self.assertEqual([p['callsign'] for p in worker_store.snapshot()], ['KLM4', 'DLH3', 'AAL1'])
+        self.assertEqual(worker_store.snapshot()[2].get('route'), 'GPS')
+        self.assertEqual((worker_store.epoch, worker_store.version), (ingest_store.epoch, ingest_store.version))
+        self.assertEqual(worker_store.changes_since(1)['removed'], [('BAW2', 'ITKO', 'IRFD')])
+        self.assertEqual([p['callsign'] for p in updates], ['AAL1', 'DLH3', 'KLM4'])
+
+        # The journal is now larger than the snapshot, so the next publish rewrites it
+        ingest_store.upsert({'callsign': 'UAL5', 'departing': 'ITKO', 'arriving': 'IPPH'})
+        publisher.publish()
+        self.assertNotEqual(os.stat(self.path).st_ino, snapshot_stat.st_ino)
+        follower.refresh()
+        self.assertEqual([p['callsign'] for p in worker_store.snapshot()], ['UAL5', 'KLM4', 'DLH3'])
+        self.assertEqual(worker_store.version, ingest_store.version)
+
+        # A follower starting late reads the snapshot and then the journal
+        late_store = FlightPlanStore(capacity=3)
+        ingest_store.upsert({'callsign': 'SWR6', 'departing': 'IRFD', 'arriving': 'ITKO'})
+        publisher.publish()
+        SnapshotFollower(late_store, self.path, interval=1).refresh()
+        self.assertEqual([p['callsign'] for p in late_store.snapshot()], ['SWR6', 'UAL5', 'KLM4'])
+
+    def test_checkpoint_warm_start(self):
+        """
+        Tests that a checkpoint reloads unexpired plans under a new epoch and that
+        a checkpoint older than max_age is ignored.
+        """
+        old_store = FlightPlanStore(capacity=10)
+        old_store.upsert({'callsign': 'OLD1', 'departing': 'IRFD', 'arriving': 'ITKO', 'timestamp': time.time() - 120})
+        old_store.upsert({'callsign': 'AAL1', 'departing': 'IRFD', 'arriving': 'ITKO'})
+        SnapshotPublisher(old_store, self.path, interval=1, heartbeat_intervals=0).publish()
+        self.assertEqual(len(old_store), 2)
+
+        new_store = FlightPlanStore(capacity=10, ttl=60)
+        self.assertEqual(load_checkpoint(new_store, self.path, max_age=60), 1)
+        self.assertEqual([p['callsign'] for p in new_store.snapshot()], ['AAL1'])
+        self.assertNotEqual(new_store.epoch, old_store.epoch)
+
+        self.assertEqual(load_checkpoint(FlightPlanStore(capacity=10), self.path, max_age=-1), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.flight_plan_store import FlightPlanStore
+
+def make_plan(callsign, departing='IRFD', arriving='ITKO', **extra):
+    return dict(callsign=callsign, departing=departing, arriving=arriving, **extra)
+
+class TestFlightPlanStore(unittest.TestCase):
+    def test_upsert_replaces_matching_plan(self):
+        """
+        Tests that a plan with the same composite key replaces the stored one
+        and moves to the front of the recency order.
+        """
+        store = FlightPlanStore(capacity=10)
+        store.upsert(make_plan('AAL1', route='OLD'))
+        store.upsert(make_plan('BAW2'))
+        store.upsert(make_plan('AAL1', route='NEW'))
+
+        plans = store.snapshot()
+        self.assertEqual(len(store), 2)
+        self.assertEqual([p['callsign'] for p in plans], ['AAL1', 'BAW2'])
+        self.assertEqual(plans[0]['route'], 'NEW')
+
+    def test_capacity_evicts_least_recently_updated(self):
+        """
+        Tests that exceeding the capacity evicts the least recently updated plan.
+        """
+        store = FlightPlanStore(capacity=2)
+        store.upsert(make_plan('AAL1'))
+        store.upsert(make_plan('BAW2'))
+        store.upsert(make_plan('AAL1', route='UPDATED'))
+        store.upsert(make_plan('DLH3'))
+
+        self.assertEqual([p['callsign'] for p in store.snapshot()], ['DLH3', 'AAL1'])
+
+    def test_ttl_drops_stale_plans(self):
+        """
+        Tests that plans older than the TTL are no longer returned.
+        """
+        store = FlightPlanStore(capacity=10, ttl=60)
+        store.upsert(make_plan('AAL1', timestamp=time.time() - 120))
+        store.upsert(make_plan('BAW2'))
+
+        self.assertEqual([p['callsign'] for p in store.snapshot()], ['BAW2'])
+        self.assertEqual(store.latest()['callsign'], 'BAW2')
+
+    def test_ttl_holds_for_older_timestamps_and_clock_steps(self):
+        """
+        Tests that a plan stored after a newer one still expires, even when the wall clock
+        steps backward in the meantime.
+        """
+        store = FlightPlanStore(capacity=10, ttl=60)
+        with patch('backend.flight_plan_store.time.monotonic', return_value=1000.0):
+            store.upsert(make_plan('AAL1'))
+            store.upsert(make_plan('BAW2', timestamp=time.time() - 30))
+            self.assertEqual(len(store.snapshot()), 2)
+
+        an_hour_ago = time.time() - 3600
+        with patch('backend.flight_plan_store.time.monotonic', return_value=1090.0), \
+                patch('backend.flight_plan_store.time.time', return_value=an_hour_ago):
+            self.assertEqual(store.snapshot(), [])
+
+    def test_query_filters_by_indexes(self):
+        """
+        Tests that airport, callsign-prefix, time and limit filters combine correctly.
+        """
+        store = FlightPlanStore(capacity=10)
+        now = time.time()
+        store.upsert(make_plan('AAL1', departing='IRFD', arriving='ITKO', timestamp=now - 600))
+        store.upsert(make_plan('AAL2', departing='IRFD', arriving='IPPH', timestamp=now - 30))
+        store.upsert(make_plan('BAW3', departing='ITKO', arriving='IRFD', timestamp=now - 10))
+
+        self.assertEqual([p['callsign'] for p in store.query(departure='irfd')], ['AAL2', 'AAL1'])
+        self.assertEqual([p['callsign'] for p in store.query(arrival='IRFD')], ['BAW3'])
+        self.assertEqual([p['callsign'] for p in store.query(airport='IRFD')], ['BAW3', 'AAL2', 'AAL1'])
+        self.assertEqual([p['callsign'] for p in store.query(departure='IRFD', since=now - 60)], ['AAL2'])
+        self.assertEqual([p['callsign'] for p in store.query(callsign='aal', limit=1)], ['AAL2'])
+        self.assertEqual(store.query(departure='EGLL'), [])
+
+    def test_changes_since_returns_delta(self):
+        """
+        Tests that changes_since() returns only plans changed after the given sequence
+        number, reports evictions as removals, and falls back to a full reload when
+        the tombstones no longer cover the requested range.
+        """
+        store = FlightPlanStore(capacity=2, tombstone_limit=1)
+        store.upsert(make_plan('AAL1'))
+        store.upsert(make_plan('BAW2'))
+        seq = store.version
+
+        store.upsert(make_plan('DLH3'))  # evicts AAL1
+        changes = store.changes_since(seq)
+        self.assertFalse(changes['full'])
+        self.assertEqual([p['callsign'] for p in changes['upserts']], ['DLH3'])
+        self.assertEqual(changes['removed'], [('AAL1', 'IRFD', 'ITKO')])
+        self.assertEqual(store.changes_since(changes['seq'])['upserts'], [])
+
+        store.upsert(make_plan('EZY4'))  # evicts BAW2, pushing AAL1's tombstone out
+        self.assertTrue(store.changes_since(seq)['full'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock
+
+import requests
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.health import HealthProber
+
+class TestHealthProber(unittest.TestCase):
+    def test_probes_run_concurrently(self):
+        """
+        Tests that all targets are probed in parallel rather than one after another.
+        """
+        prober = HealthProber({'a': 'https://a.invalid', 'b': 'https://b.invalid'})
+        def slow_head(url, timeout):
+            time.sleep(0.2)
+            return MagicMock(status_code=200)
+        prober.session.head = slow_head
+
+        started = time.monotonic()
+        prober.probe_all()
+        self.assertLess(time.monotonic() - started, 0.35)
+        self.assertEqual(prober.status('a')['status'], 'Online')
+        self.assertEqual(prober.status('b')['status'], 'Online')
+
+    def test_rolling_history(self):
+        """
+        Tests that availability and latency are computed over the retained history only.
+        """
+        prober = HealthProber({'a': 'https://a.invalid'}, history=2)
+        self.assertEqual(prober.status('a')['status'], 'Unknown')
+
+        outcomes = iter([MagicMock(status_code=500), MagicMock(status_code=200), requests.ConnectionError()])
+        def head(url, timeout):
+            outcome = next(outcomes)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        prober.session.head = head
+        for _ in range(3):
+            prober.probe_all()
+
+        status = prober.status('a')
+        self.assertEqual(status['status'], 'Offline')
+        self.assertEqual(status['error'], 'ConnectionError')
+        self.assertEqual(status['availability'], 0.5)
+        self.assertEqual(len(status['history']), 2)
+        self.assertIsNotNone(status['avg_latency_ms'])
+
+if __name__ == '__main__':
+    unittest.main()
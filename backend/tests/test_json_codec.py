@@ -0,0 +1,88 @@
+import datetime
+import decimal
+import json
+import os
+import sys
+import unittest
+import uuid
+from unittest.mock import patch
+
+from flask import Flask
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import json_codec
+from backend.json_codec import FastJSONProvider
+
+SAMPLES = [
+    {"t": "FLIGHT_PLAN", "s": 0, "d": {"callsign": "DLH123", "departing": "IRFD", "arriving": "ITKO",
+                                        "route": "ALDER BOBUX", "flightlevel": "340", "timestamp": 1760000000.123456}},
+    {"unicode": "Zürich ✈ 東京", "escapes": "quote \" backslash \\ newline \n tab \t", "empty": ""},
+    {"floats": [0.1, 1e16, 1.5e-7, -0.0, 123456789.987654321], "ints": [0, -1, 2 ** 63 - 1, -2 ** 63]},
+    {"wide": 2 ** 70, "nested": {"b": [1, {"c": None}], "a": (True, False)}},
+    {1: "non-string key", "2": "string key"},
+    [],
+]
+
+def codec_modes():
+    modes = [False]
+    if json_codec.orjson is not None:
+        modes.append(True)
+    return modes
+
+class TestJsonCodec(unittest.TestCase):
+    def test_round_trips_match_stdlib(self):
+        """
+        Tests that both codecs produce the same JSON values as the stdlib for every sample.
+        """
+        for fast in codec_modes():
+            with patch.object(json_codec, 'FAST', fast):
+                for sample in SAMPLES:
+                    with self.subTest(fast=fast, sample=sample):
+                        encoded = json_codec.dumps(sample)
+                        self.assertEqual(json.loads(encoded), json.loads(json.dumps(sample)))
+                        self.assertEqual(json_codec.loads(encoded), json.loads(encoded))
+                        self.assertEqual(json_codec.loads(encoded.encode('utf-8')), json.loads(encoded))
+
+    def test_errors_match_stdlib(self):
+        """
+        Tests that malformed input raises ValueError and stdlib-only inputs still parse.
+        """
+        for fast in codec_modes():
+            with patch.object(json_codec, 'FAST', fast):
+                with self.assertRaises(ValueError):
+                    json_codec.loads('{"t": "FLIGHT_PLAN",')
+                with self.assertRaises(TypeError):
+                    json_codec.dumps({"when": object()})
+                self.assertEqual(json_codec.loads('[%d]' % 2 ** 70), [2 ** 70])
+                self.assertTrue(json_codec.loads('NaN') != json_codec.loads('NaN'))
+
+    def test_flask_provider_matches_default(self):
+        """
+        Tests that FastJSONProvider responses decode to the same values, in the same key
+        order, as Flask's default provider, including its date, decimal and UUID handling.
+        """
+        payload = {
+            "z": 1, "a": "Zürich", "when": datetime.datetime(2026, 10, 17, 12, 30, tzinfo=datetime.timezone.utc),
+            "day": datetime.date(2026, 10, 17), "amount": decimal.Decimal('12.50'),
+            "id": uuid.UUID('12345678-1234-5678-1234-567812345678'), "items": SAMPLES[:3],
+        }
+        default_app = Flask('default')
+        fast_app = Flask('fast')
+        fast_app.json = FastJSONProvider(fast_app)
+
+        for fast in codec_modes():
+            with patch.object(json_codec, 'FAST', fast):
+                with default_app.app_context():
+                    expected = default_app.json.response(payload).get_data()
+                with fast_app.app_context():
+                    actual = fast_app.json.response(payload).get_data()
+                    self.assertEqual(fast_app.json.loads(fast_app.json.dumps(payload)), json.loads(expected))
+                with self.subTest(fast=fast):
+                    self.assertEqual(json.loads(actual), json.loads(expected))
+                    self.assertEqual(list(json.loads(actual)), list(json.loads(expected)))
+                    self.assertTrue(actual.endswith(b'\n'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+import httpx
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import create_app
+from backend.caching import CachedResource, resources
+from backend.metrics import Histogram, _registry, _supabase_target, render
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_exposition(self):
+        """
+        Tests that histograms render cumulative buckets, sum and count per label set.
+        """
+        histogram = Histogram('test_duration_seconds', 'Test.', ('route',), buckets=(0.1, 1.0))
+        try:
+            histogram.observe(0.05, '/a')
+            histogram.observe(0.5, '/a')
+            histogram.observe(5, '/a')
+            text = render()
+        finally:
+            _registry.remove(histogram)
+
+        self.assertIn('# TYPE test_duration_seconds histogram', text)
+        self.assertIn('test_duration_seconds_bucket{route="/a",le="0.1"} 1', text)
+        self.assertIn('test_duration_seconds_bucket{route="/a",le="1"} 2', text)
+        self.assertIn('test_duration_seconds_bucket{route="/a",le="+Inf"} 3', text)
+        self.assertIn('test_duration_seconds_sum{route="/a"} 5.55', text)
+        self.assertIn('test_duration_seconds_count{route="/a"} 3', text)
+
+    def test_supabase_target(self):
+        """
+        Tests that Supabase requests are labelled by table or RPC name.
+        """
+        self.assertEqual(_supabase_target(httpx.URL('https://x.supabase.co/rest/v1/page_visits?select=*')), 'page_visits')
+        self.assertEqual(_supabase_target(httpx.URL('https://x.supabase.co/rest/v1/rpc/get_admin_users')), 'rpc:get_admin_users')
+        self.assertEqual(_supabase_target(httpx.URL('https://x.supabase.co/auth/v1/token')), 'auth')
+
+    def test_cache_outcomes(self):
+        """
+        Tests that CachedResource hits and misses are exported per cache.
+        """
+        resource = CachedResource(lambda: 1, ttl=60, name='test-cache')
+        try:
+            resource.get()
+            resource.get()
+            resource.get()
+            text = render()
+        finally:
+            resources.remove(resource)
+
+        self.assertIn('cached_resource_requests_total{cache="test-cache",outcome="hit"} 2', text)
+        self.assertIn('cached_resource_requests_total{cache="test-cache",outcome="miss"} 1', text)
+
+    @patch('backend.init_db')
+    def test_endpoint_is_local_only(self, mock_init_db):
+        """
+        Tests that /metrics reports request latency to local scrapers and is hidden otherwise.
+        """
+        client = create_app().test_client()
+        client.get('/api/health')
+
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('endpoint="api_bp.health_check"', response.get_data(as_text=True))
+
+        self.assertEqual(client.get('/metrics', headers={'X-Forwarded-For': '203.0.113.5'}).status_code, 404)
+        self.assertEqual(client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.5'}).status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import create_app
+from backend.permissions import PermissionCache, permission_cache
+
+class TestPermissionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.signal_path = os.path.join(self.tmpdir.name, 'permissions.signal')
+        self.rows = {'user-1': {'is_admin': True, 'roles': ['admin']}}
+        self.loads = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def loader(self, user_id):
+        self.loads.append(user_id)
+        return dict(self.rows[user_id])
+
+    def test_cached_until_ttl_or_invalidation(self):
+        """
+        Tests that permissions are loaded once per TTL and reloaded right after invalidate().
+        """
+        cache = PermissionCache(self.loader, ttl=60)
+        self.assertTrue(cache.get('user-1')['is_admin'])
+        self.assertTrue(cache.get('user-1')['is_admin'])
+        self.assertEqual(self.loads, ['user-1'])
+
+        self.rows['user-1'] = {'is_admin': False, 'roles': []}
+        cache.invalidate('user-1')
+        self.assertFalse(cache.get('user-1')['is_admin'])
+        self.assertEqual(len(self.loads), 2)
+
+        cache.ttl = 0
+        cache.get('user-1')
+        self.assertEqual(len(self.loads), 3)
+
+    def test_signal_file_invalidates_other_workers(self):
+        """
+        Tests that invalidating in one cache clears another that shares the signal file.
+        """
+        worker_a = PermissionCache(self.loader, ttl=60, signal_path=self.signal_path, check_interval=0)
+        worker_b = PermissionCache(self.loader, ttl=60, signal_path=self.signal_path, check_interval=0)
+        worker_a.get('user-1')
+        worker_b.get('user-1')
+        self.assertEqual(len(self.loads), 2)
+
+        self.rows['user-1'] = {'is_admin': False, 'roles': []}
+        worker_a.invalidate('user-1')
+        self.assertFalse(worker_b.get('user-1')['is_admin'])
+        self.assertFalse(worker_a.get('user-1')['is_admin'])
+        self.assertEqual(len(self.loads), 4)
+
+        # A second signal is seen too, even within the same timestamp tick
+        self.rows['user-1'] = {'is_admin': True, 'roles': ['admin']}
+        worker_a.invalidate()
+        self.assertTrue(worker_b.get('user-1')['is_admin'])
+
+    def test_load_failure_returns_fallback(self):
+        """
+        Tests that a failed load returns the fallback, even when an expired copy is cached.
+        """
+        cache = PermissionCache(self.loader, ttl=0)
+        self.assertIsNone(cache.get('missing'))
+        cache.get('user-1')
+        del self.rows['user-1']
+        self.assertEqual(cache.get('user-1', fallback='denied'), 'denied')
+
+class TestAdminAuthorization(unittest.TestCase):
+    @patch('backend.init_db')
+    def setUp(self, mock_init_db):
+        """Set up a test client logged in with a session that still says is_admin."""
+        app = create_app()
+        app.config['TESTING'] = True
+        # The production cookie settings (.hasmah.xyz, Secure) would keep the session off localhost
+        app.config['SESSION_COOKIE_DOMAIN'] = None
+        app.config['SESSION_COOKIE_SECURE'] = False
+        self.client = app.test_client()
+        with self.client.session_transaction() as sess:
+            sess['user'] = {'id': 'admin-id', 'username': 'admin', 'is_admin': True, 'roles': ['admin']}
+        permission_cache.invalidate()
+
+    def tearDown(self):
+        permission_cache.invalidate()
+
+    def test_demoted_admin_is_refused(self):
+        """
+        Tests that admin checks use discord_users, not the login-time copy in the session,
+        and that the session copy is brought up to date.
+        """
+        mock_admin = MagicMock()
+        mock_admin.table.return_value.select.return_value.eq.return_value.limit.return_value.execute.return_value = \
+            MagicMock(data=[{'is_admin': False, 'roles': []}])
+        with patch('backend.database.supabase_admin', mock_admin), \
+                patch('backend.auth_utils.supabase_admin', mock_admin):
+            self.assertEqual(self.client.get('/api/admin/profiling').status_code, 403)
+            self.assertEqual(self.client.get('/api/admin/analytics').status_code, 403)
+        mock_admin.table.assert_called_once_with('discord_users')
+        with self.client.session_transaction() as sess:
+            self.assertFalse(sess['user']['is_admin'])
+            self.assertEqual(sess['user']['username'], 'admin')
+
+    def test_auth_user_reports_current_permissions(self):
+        """
+        Tests that /api/auth/user reports a demotion without an admin endpoint being hit first.
+        """
+        mock_admin = MagicMock()
+        mock_admin.table.return_value.select.return_value.eq.return_value.limit.return_value.execute.return_value = \
+            MagicMock(data=[{'is_admin': False, 'roles': []}])
+        with patch('backend.database.supabase_admin', mock_admin), patch('backend.auth.track_page_visit'):
+            user = self.client.get('/api/auth/user').get_json()['user']
+        self.assertFalse(user['is_admin'])
+
+    def test_failed_lookup_is_refused(self):
+        """
+        Tests that admin checks fail closed when discord_users cannot be read, instead of
+        trusting the session's login-time copy.
+        """
+        mock_admin = MagicMock()
+        mock_admin.table.side_effect = RuntimeError('database down')
+        with patch('backend.database.supabase_admin', mock_admin), \
+                patch('backend.auth_utils.supabase_admin', mock_admin):
+            self.assertEqual(self.client.get('/api/admin/profiling').status_code, 403)
+        with self.client.session_transaction() as sess:
+            self.assertTrue(sess['user']['is_admin'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import create_app
+from backend.config import Config
+from backend.profiler import ProfilingSwitch, SamplingProfiler, list_profiles, profile_path
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_samples_collapsed_stacks_of_another_thread(self):
+        """
+        Tests that the profiler records the target thread's stack, root frame first.
+        """
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,))
+        worker.start()
+        try:
+            profiler = SamplingProfiler(worker.ident, interval=0.001).start()
+            time.sleep(0.05)
+            profiler.stop()
+        finally:
+            stop.set()
+            worker.join()
+
+        self.assertGreater(profiler.samples, 0)
+        stack, count = profiler.collapsed().splitlines()[0].rsplit(' ', 1)
+        self.assertTrue(stack.split(';')[0].startswith('_bootstrap'))
+        self.assertIn('busy_loop (', stack)
+        self.assertGreater(int(count), 0)
+
+    def test_switch_selects_endpoints_until_it_expires(self):
+        """
+        Tests that the profiling switch selects only its endpoints and turns itself off.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            switch = ProfilingSwitch(os.path.join(tmpdir, 'switch.json'), refresh_interval=0)
+            self.assertFalse(switch.selects('api_bp.get_admin_analytics'))
+
+            switch.enable(['api_bp.get_admin_analytics'], sample_rate=1.0, duration=60)
+            # Another worker sees the same file
+            other = ProfilingSwitch(switch.path, refresh_interval=0)
+            self.assertTrue(other.selects('api_bp.get_admin_analytics'))
+            self.assertFalse(other.selects('auth_bp.get_user'))
+
+            switch.enable([], sample_rate=1.0, duration=-1)
+            self.assertIsNone(other.state())
+            switch.disable()
+            self.assertFalse(os.path.exists(switch.path))
+
+class TestRequestProfiling(unittest.TestCase):
+    @patch('backend.init_db')
+    def setUp(self, mock_init_db):
+        app = create_app()
+        app.config['TESTING'] = True
+        app.config['SESSION_COOKIE_DOMAIN'] = None
+        app.config['SESSION_COOKIE_SECURE'] = False
+        self.client = app.test_client()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output_dir = patch.object(Config, 'PROFILE_OUTPUT_DIR', self.tmpdir.name)
+        self.output_dir.start()
+
+    def tearDown(self):
+        self.output_dir.stop()
+        self.tmpdir.cleanup()
+
+    def test_header_profiles_admin_requests_only(self):
+        """
+        Tests that X-Profile writes a profile for admins and is ignored for everyone else.
+        """
+        response = self.client.get('/api/health', headers={'X-Profile': '1'})
+        self.assertNotIn('X-Profile-Id', response.headers)
+        self.assertEqual(list_profiles(), [])
+
+        with self.client.session_transaction() as sess:
+            sess['user'] = {'id': 'admin-id', 'username': 'admin', 'is_admin': True}
+        response = self.client.get('/api/health', headers={'X-Profile': '1'})
+        name = response.headers['X-Profile-Id']
+        self.assertIn('api_bp.health_check', name)
+        self.assertIsNotNone(profile_path(name))
+        self.assertEqual([profile['name'] for profile in list_profiles()], [name])
+        self.assertIsNone(profile_path('../switch.json'))
+
+if __name__ == '__main__':
+    unittest.main()
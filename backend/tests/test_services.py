@@ -0,0 +1,74 @@
+import json
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.services import IngestSupervisor, flight_plans_cache, handle_websocket_message
+
+class TestIngestSupervisor(unittest.TestCase):
+    def setUp(self):
+        flight_plans_cache.clear()
+
+    def tearDown(self):
+        flight_plans_cache.clear()
+
+    def test_start_is_idempotent(self):
+        """
+        Tests that calling start() more than once only ever starts one ingest thread.
+        """
+        supervisor = IngestSupervisor('wss://example.invalid/wss', mode='shared')
+        # A stand-in for the follower loop, which would otherwise run on the global store
+        stop = threading.Event()
+        supervisor._follower.run = lambda: stop.wait(5)
+        try:
+            self.assertTrue(supervisor.start())
+            self.assertFalse(supervisor.start())
+            self.assertEqual(supervisor.role, 'follower')
+        finally:
+            stop.set()
+            supervisor._thread.join(5)
+
+    def test_record_message_updates_stats(self):
+        """
+        Tests that received messages are counted, flight plans are cached and
+        malformed messages are skipped without raising.
+        """
+        supervisor = IngestSupervisor('wss://example.invalid/wss')
+        supervisor._record_message(json.dumps({"t": "FLIGHT_PLAN", "d": {"callsign": "AAL1", "departing": "IRFD", "arriving": "ITKO"}}))
+        supervisor._record_message(json.dumps({"t": "ACFT_DATA", "d": {}}))
+        supervisor._record_message("not json")
+        # Valid JSON that is not an object, or a flight plan that is not one
+        supervisor._record_message("[]")
+        supervisor._record_message('"x"')
+        supervisor._record_message(json.dumps({"t": "FLIGHT_PLAN", "d": ["AAL1"]}))
+
+        stats = supervisor.stats()
+        self.assertEqual(stats["messages_received"], 6)
+        self.assertEqual(stats["flight_plans_received"], 1)
+        self.assertEqual(stats["parse_errors"], 4)
+        self.assertGreater(stats["messages_per_second"], 0)
+        self.assertLess(stats["last_message_age"], 5)
+        self.assertEqual(flight_plans_cache.latest()["callsign"], "AAL1")
+
+    def test_flight_plans_are_queued_for_persistence(self):
+        """
+        Tests that ingested flight plans are queued as upsert rows keyed like the store.
+        """
+        message = json.dumps({"t": "FLIGHT_PLAN", "d": {"callsign": "AAL1", "departing": "IRFD", "arriving": "ITKO", "flightlevel": "120"}})
+        with patch('backend.database.supabase_admin', MagicMock()), \
+                patch('backend.database.flight_plan_writer') as writer:
+            handle_websocket_message(message)
+
+        table, row = writer.enqueue.call_args.args
+        self.assertEqual(table, 'flight_plans_received')
+        self.assertEqual((row["callsign"], row["departure"], row["destination"]), ("AAL1", "IRFD", "ITKO"))
+        self.assertEqual(row["flight_level"], "120")
+        self.assertEqual(row["source"], "FLIGHT_PLAN")
+
+if __name__ == '__main__':
+    unittest.main()
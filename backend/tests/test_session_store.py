@@ -0,0 +1,160 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, session
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.session_store import (
+    FileSessionBackend, ServerSideSessionInterface, SessionStore, SESSION_ID
+)
+
+def make_app(store, refresh_interval=86400, id_key=None):
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test-secret-key'
+    app.session_interface = ServerSideSessionInterface(store, refresh_interval=refresh_interval, id_key=id_key)
+
+    @app.before_request
+    def ensure_session_id():
+        # As create_app does
+        if id_key and id_key not in session:
+            session[id_key] = 'random'
+
+    @app.route('/id')
+    def visitor_id():
+        return {"id": session.get(id_key)}
+
+    @app.route('/visit')
+    def visit():
+        session['page_views'] = session.get('page_views', 0) + 1
+        return {"page_views": session['page_views']}
+
+    @app.route('/login')
+    def login():
+        session.regenerate()
+        session['user'] = {'id': 'user-1', 'roles': ['admin']}
+        session.permanent = True
+        return {}
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        return {}
+
+    return app
+
+def session_cookie(response):
+    return [header for header in response.headers.getlist('Set-Cookie') if header.startswith('session=')]
+
+class TestServerSideSessions(unittest.TestCase):
+    def test_cookie_holds_only_an_id_and_is_not_resent(self):
+        """
+        Tests that the cookie is an opaque ID set once, while session changes stay on the server.
+        """
+        client = make_app(SessionStore()).test_client()
+
+        first = client.get('/visit')
+        [cookie] = session_cookie(first)
+        sid = cookie.split(';', 1)[0].split('=', 1)[1]
+        self.assertRegex(sid, SESSION_ID)
+
+        second = client.get('/visit')
+        self.assertEqual(second.get_json()['page_views'], 2)
+        self.assertEqual(session_cookie(second), [])
+
+    def test_login_rotates_the_id_and_logout_deletes_it(self):
+        """
+        Tests that login moves the session to a new ID and logout removes it from the store.
+        """
+        store = SessionStore()
+        client = make_app(store).test_client()
+        client.get('/visit')
+        [old_sid] = list(store._entries)
+
+        response = client.get('/login')
+        [cookie] = session_cookie(response)
+        self.assertIn('Expires=', cookie)
+        [new_sid] = list(store._entries)
+        self.assertNotEqual(new_sid, old_sid)
+        self.assertEqual(client.get('/visit').get_json()['page_views'], 2)
+
+        response = client.get('/logout')
+        self.assertIn('Expires=Thu, 01 Jan 1970', session_cookie(response)[0])
+        self.assertEqual(store._entries, {})
+
+    def test_expired_sessions_start_over(self):
+        """
+        Tests that a session past its expiry is dropped and replaced with a new one.
+        """
+        store = SessionStore()
+        client = make_app(store).test_client()
+        client.get('/visit')
+        with patch('backend.session_store.time.time', return_value=time.time() + 32 * 86400):
+            response = client.get('/visit')
+        self.assertEqual(response.get_json()['page_views'], 1)
+        self.assertEqual(len(session_cookie(response)), 1)
+
+    def test_bare_sessions_are_not_stored(self):
+        """
+        Tests that a session holding only its ID key gets a cookie but no record, keeps the
+        same ID key across requests, and is stored under a fresh ID once it holds data.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SessionStore(FileSessionBackend(tmpdir))
+            client = make_app(store, id_key='session_id').test_client()
+
+            first = client.get('/id')
+            [cookie] = session_cookie(first)
+            visitor_id = first.get_json()['id']
+            self.assertNotEqual(visitor_id, 'random')
+            self.assertEqual(client.get('/id').get_json()['id'], visitor_id)
+            self.assertEqual(os.listdir(tmpdir), [])
+
+            # A cookie-less client (a crawler) gets a new ID each time, still without records
+            self.assertNotEqual(make_app(store, id_key='session_id').test_client().get('/id').get_json()['id'], visitor_id)
+
+            response = client.get('/visit')
+            [new_cookie] = session_cookie(response)
+            self.assertNotEqual(new_cookie.split(';')[0], cookie.split(';')[0])
+            self.assertEqual(len(os.listdir(tmpdir)), 1)
+            self.assertEqual(client.get('/id').get_json()['id'], visitor_id)
+
+    def test_transient_sessions_expire_sooner(self):
+        """
+        Tests that non-permanent session records use the short transient lifetime.
+        """
+        store = SessionStore()
+        client = make_app(store).test_client()
+        client.get('/visit')
+        [record] = [record for record, _ in store._entries.values()]
+        self.assertLessEqual(record["expires_at"], time.time() + 14400)
+
+        client.get('/login')
+        [record] = [record for record, _ in store._entries.values()]
+        self.assertGreater(record["expires_at"], time.time() + 86400)
+
+    def test_file_backend_is_shared_between_workers(self):
+        """
+        Tests that two worker stores over one directory see each other's writes despite their LRU tiers.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            worker_a = SessionStore(FileSessionBackend(tmpdir))
+            worker_b = SessionStore(FileSessionBackend(tmpdir))
+            client = make_app(worker_a).test_client()
+            other = make_app(worker_b)
+
+            client.get('/visit')
+            client.application = other  # the next requests land on the other worker
+            self.assertEqual(client.get('/visit').get_json()['page_views'], 2)
+            self.assertEqual(client.get('/visit').get_json()['page_views'], 3)
+            client.application = make_app(worker_a)
+            self.assertEqual(client.get('/visit').get_json()['page_views'], 4)
+            self.assertGreater(worker_b.hits, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.table_browser import decode_cursor, encode_cursor, fetch_table_page, row_estimates
+
+def make_client(rows):
+    """Returns a mock Supabase client whose table queries return `rows`."""
+    client = MagicMock()
+    query = client.from_.return_value.select.return_value
+    query.order.return_value = query
+    query.or_.return_value = query
+    query.limit.return_value.execute.return_value = MagicMock(data=rows)
+    return client, query
+
+class TestTableBrowser(unittest.TestCase):
+    def setUp(self):
+        row_estimates.invalidate()
+
+    def tearDown(self):
+        row_estimates.invalidate()
+
+    @patch('backend.database.supabase_admin')
+    def test_keyset_pages(self, mock_admin):
+        """
+        Tests that a full page returns a cursor for its last row, which the next request
+        turns into a (created_at, id) keyset filter instead of an OFFSET.
+        """
+        mock_admin.rpc.return_value.execute.return_value = MagicMock(data=[{'table_name': 'page_visits', 'estimate': 3}])
+        rows = [{'id': f'00000000-0000-4000-8000-00000000000{i}', 'created_at': f'2026-10-17T10:0{i}:00+00:00'} for i in (3, 2, 1)]
+        client, query = make_client(rows)
+
+        page = fetch_table_page(client, 'page_visits', limit=2)
+        self.assertEqual(page['data'], rows[:2])
+        self.assertEqual(page['totalCount'], 3)
+        self.assertEqual(decode_cursor(page['nextCursor']), ('2026-10-17T10:02:00+00:00', rows[1]['id']))
+        query.limit.assert_called_with(3)
+        query.or_.assert_not_called()
+
+        client, query = make_client(rows[2:])
+        page = fetch_table_page(client, 'page_visits', limit=2, cursor=encode_cursor(rows[1]))
+        self.assertIsNone(page['nextCursor'])
+        query.or_.assert_called_once_with(
+            'created_at.lt."2026-10-17T10:02:00+00:00",'
+            'and(created_at.eq."2026-10-17T10:02:00+00:00",id.lt."00000000-0000-4000-8000-000000000002")'
+        )
+
+    def test_invalid_cursor(self):
+        """
+        Tests that a malformed cursor, or one whose values are not a timestamp and an
+        integer or UUID, is rejected with a ValueError.
+        """
+        client, _ = make_client([])
+        with self.assertRaises(ValueError):
+            fetch_table_page(client, 'page_visits', limit=25, cursor='not-a-cursor')
+
+        # Values that would break out of the quoted PostgREST filter values
+        for created_at, row_id in (('2026-10-17",id.gt.0', 1), ('2026-10-17T10:00:00+00:00', '1",or(id.gt.0'),
+                                   ('2026-10-17T10:00:00+00:00', True), ('2026-10-17T10:00:00+00:00', 1.5)):
+            with self.assertRaises(ValueError):
+                decode_cursor(encode_cursor({'created_at': created_at, 'id': row_id}))
+        self.assertEqual(decode_cursor(encode_cursor({'created_at': '2026-10-17T10:00:00.123456+00:00', 'id': 42})),
+                         ('2026-10-17T10:00:00.123456+00:00', 42))
+
+if __name__ == '__main__':
+    unittest.main()
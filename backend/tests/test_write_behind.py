@@ -0,0 +1,58 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+
+# Add the parent directory to the Python path to allow for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.write_behind import BatchWriter
+
+class TestBatchWriter(unittest.TestCase):
+    def test_rows_are_inserted_in_bulk_per_table(self):
+        """
+        Tests that queued rows are written as one bulk insert per table on close.
+        """
+        client = MagicMock()
+        writer = BatchWriter(lambda: client, flush_interval=60)
+        writer.enqueue('page_visits', {'page_path': '/a'})
+        writer.enqueue('debug_logs', {'message': 'hello'})
+        writer.enqueue('page_visits', {'page_path': '/b'})
+        writer.close()
+
+        inserted = {call.args[0]: call for call in client.from_.call_args_list}
+        self.assertEqual(set(inserted), {'page_visits', 'debug_logs'})
+        client.from_.return_value.insert.assert_any_call([{'page_path': '/a'}, {'page_path': '/b'}])
+        self.assertEqual(writer.stats()['written'], 3)
+
+    def test_full_queue_drops_rows(self):
+        """
+        Tests that enqueue() gives up instead of blocking when the queue is full.
+        """
+        writer = BatchWriter(lambda: None, max_queue=1, enqueue_timeout=0, flush_interval=60)
+        writer._stopping.set()
+        writer._thread = MagicMock()  # keep the background thread from draining the queue
+        self.assertTrue(writer.enqueue('page_visits', {}))
+        self.assertFalse(writer.enqueue('page_visits', {}))
+        self.assertEqual(writer.stats()['dropped'], 1)
+
+    def test_upserts_keep_latest_row_per_key(self):
+        """
+        Tests that an on_conflict writer upserts one row per key, keeping the last one queued.
+        """
+        client = MagicMock()
+        writer = BatchWriter(lambda: client, flush_interval=60, on_conflict='callsign,departure')
+        writer.enqueue('flight_plans_received', {'callsign': 'AAL1', 'departure': 'IRFD', 'route': 'old'})
+        writer.enqueue('flight_plans_received', {'callsign': 'DAL2', 'departure': 'IRFD', 'route': 'x'})
+        writer.enqueue('flight_plans_received', {'callsign': 'AAL1', 'departure': 'IRFD', 'route': 'new'})
+        writer.close()
+
+        client.from_.return_value.insert.assert_not_called()
+        client.from_.return_value.upsert.assert_called_once_with([
+            {'callsign': 'DAL2', 'departure': 'IRFD', 'route': 'x'},
+            {'callsign': 'AAL1', 'departure': 'IRFD', 'route': 'new'},
+        ], on_conflict='callsign,departure')
+        self.assertEqual(writer.stats()['deduplicated'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Queued by close() to wake the background thread without waiting for a timeout
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    In-process write-behind queue for Supabase inserts.
+
+    Rows are buffered in a bounded queue and written by a background thread as one bulk
+    insert per table, whenever `batch_size` rows are waiting or `flush_interval` seconds
+    have passed since the oldest one was queued. When the queue is full, enqueue() waits
+    at most `enqueue_timeout` seconds before dropping the row, so callers are never held
+    up for long. Remaining rows are flushed when the process exits.
+
+    With `on_conflict` (comma-separated key columns backed by a unique index), batches are
+    written as idempotent upserts instead. Rows sharing a key within one batch are
+    collapsed to the most recently queued one, which Postgres requires for a bulk upsert.
+    """
+
+    def __init__(self, get_client, batch_size=100, flush_interval=2.0, max_queue=10000,
+                 enqueue_timeout=0.05, retries=2, on_conflict=None, name='write-behind'):
+        self.get_client = get_client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.retries = retries
+        self.on_conflict = on_conflict
+        self.name = name
+        self.written = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def enqueue(self, table, row):
+        """Queues a row for insertion into `table`. Returns False if it had to be dropped."""
+        self._ensure_started()
+        try:
+            self._queue.put((table, row), timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def _next_batch(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                break
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _write(self, batch):
+        rows_by_table = {}
+        for table, row in batch:
+            rows_by_table.setdefault(table, []).append(row)
+
+        for table, rows in rows_by_table.items():
+            if self.on_conflict:
+                rows = self._deduplicate(rows)
+            for attempt in range(self.retries + 1):
+                try:
+                    client = self.get_client()
+                    if client is None:
+                        raise RuntimeError("Supabase client is not initialized")
+                    if self.on_conflict:
+                        client.from_(table).upsert(rows, on_conflict=self.on_conflict).execute()
+                    else:
+                        client.from_(table).insert(rows).execute()
+                    self.written += len(rows)
+                    break
+                except Exception as e:
+                    if attempt == self.retries:
+                        self.failed += len(rows)
+                        # Not log_to_db: the database is what just failed
+                        logger.critical("Failed to write %d rows to %s: %s", len(rows), table, e)
+                    else:
+                        time.sleep(0.5 * 2 ** attempt)
+
+    def _deduplicate(self, rows):
+        key_columns = [column.strip() for column in self.on_conflict.split(',')]
+        latest = {}
+        for row in rows:
+            key = tuple(row.get(column) for column in key_columns)
+            latest.pop(key, None)
+            latest[key] = row
+        self.deduplicated += len(rows) - len(latest)
+        return list(latest.values())
+
+    def flush(self):
+        """Synchronously writes everything currently queued."""
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        if batch:
+            self._write(batch)
+
+    def close(self, timeout=5):
+        """Stops the background thread and flushes any rows still queued."""
+        self._stopping.set()
+        if self._thread is not None:
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
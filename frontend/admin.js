@@ -14,6 +14,7 @@ import {
     addAdminUser as apiAddAdminUser,
     removeAdminUser as apiRemoveAdminUser,
     loadDebugLogs as apiLoadDebugLogs,
+    loadAdminAnalytics as apiLoadAdminAnalytics,
     resetAnalytics as apiResetAnalytics,
     getSystemHealth
 } from './src/api.js';
@@ -28,6 +29,9 @@ let currentTable = 'page_visits';
 let currentOffset = 0;
 const pageSize = 25;
 let totalRecords = 0;
+// Keyset pagination: the cursor each visited page was loaded with, and the next page's cursor
+let pageCursors = [null];
+let nextCursor = null;
 
 function goToMainSite() {
     window.location.href = '/';
@@ -97,12 +101,9 @@ async function loadAdminData() {
   });
 }
 
-async function loadAnalytics() {
+async function loadAnalytics(refresh = false) {
   try {
-    const response = await fetch(`${API_BASE_URL}/api/admin/analytics`, {
-      credentials: 'include'
-    });
-    analytics = await response.json();
+    analytics = await apiLoadAdminAnalytics(refresh);
     const today = new Date().toISOString().split('T')[0];
     if (document.getElementById('totalVisits')) {
         document.getElementById('totalVisits').textContent = analytics.totalVisits || 0;
@@ -258,6 +259,7 @@ function clearLogDisplay() {
 async function loadTable(tableName) {
   currentTable = tableName;
   currentOffset = 0;
+  pageCursors = [null];
   document.querySelectorAll('.table-nav-btn').forEach(btn => btn.classList.remove('active'));
   event.target.classList.add('active');
   const titles = {
@@ -276,8 +278,10 @@ async function fetchTableData() {
   const tableDisplay = document.getElementById('tableDisplay');
   tableDisplay.innerHTML = '<div class="table-loading">Loading table data...</div>';
   try {
-    const data = await apiLoadTable(currentTable, pageSize, currentOffset);
-    totalRecords = data.totalCount || 0;
+    const data = await apiLoadTable(currentTable, pageSize, pageCursors[pageCursors.length - 1]);
+    nextCursor = data.nextCursor || null;
+    // totalCount is a planner estimate; never show fewer records than have been paged through
+    totalRecords = Math.max(data.totalCount || 0, currentOffset + (data.data?.length || 0));
     if (data.setupRequired) {
       tableDisplay.innerHTML = `
         <div style="padding: 40px; text-align: center; color: var(--text-muted);">
@@ -297,8 +301,8 @@ async function fetchTableData() {
       return;
     }
     const startRecord = currentOffset + 1;
-    const endRecord = Math.min(currentOffset + pageSize, totalRecords);
-    document.getElementById('tableRecordCount').textContent = `Showing ${startRecord}-${endRecord} of ${totalRecords} records`;
+    const endRecord = currentOffset + data.data.length;
+    document.getElementById('tableRecordCount').textContent = `Showing ${startRecord}-${endRecord} of ~${totalRecords} records`;
     let tableHtml;
     if (currentTable === 'discord_users') {
       tableHtml = generateCardLayoutHtml(data.data);
@@ -456,22 +460,24 @@ function updatePagination() {
   const nextBtn = document.getElementById('nextBtn');
   const pageInfo = document.getElementById('pageInfo');
   const currentPage = Math.floor(currentOffset / pageSize) + 1;
-  const totalPages = Math.ceil(totalRecords / pageSize);
-  prevBtn.disabled = currentOffset === 0;
-  nextBtn.disabled = currentOffset + pageSize >= totalRecords;
-  pageInfo.textContent = `Page ${currentPage} of ${totalPages}`;
-  pagination.style.display = totalPages > 1 ? 'flex' : 'none';
+  const totalPages = Math.max(Math.ceil(totalRecords / pageSize), currentPage + (nextCursor ? 1 : 0));
+  prevBtn.disabled = pageCursors.length === 1;
+  nextBtn.disabled = !nextCursor;
+  pageInfo.textContent = `Page ${currentPage} of ~${totalPages}`;
+  pagination.style.display = pageCursors.length > 1 || nextCursor ? 'flex' : 'none';
 }
 
 async function previousPage() {
-  if (currentOffset > 0) {
+  if (pageCursors.length > 1) {
+    pageCursors.pop();
     currentOffset = Math.max(0, currentOffset - pageSize);
     await fetchTableData();
   }
 }
 
 async function nextPage() {
-  if (currentOffset + pageSize < totalRecords) {
+  if (nextCursor) {
+    pageCursors.push(nextCursor);
     currentOffset += pageSize;
     await fetchTableData();
   }
@@ -822,6 +828,7 @@ function initializeAdminPanel() {
 
     // Analytics
     document.getElementById('resetAnalyticsBtn')?.addEventListener('click', handleResetAnalyticsClick);
+    document.getElementById('refreshAnalyticsBtn')?.addEventListener('click', () => loadAnalytics(true));
 
     // Tables
     document.querySelectorAll('.table-nav-btn').forEach(btn => {
@@ -7,6 +7,8 @@ import {
 } from './src/auth.js';
 import {
     loadFlightPlans as apiLoadFlightPlans,
+    loadFlightPlanChanges as apiLoadFlightPlanChanges,
+    subscribeToFlightPlans,
     loadPublicSettings as apiLoadPublicSettings,
     loadControllers as apiLoadControllers,
     loadAtis as apiLoadAtis,
@@ -20,6 +22,8 @@ import { showNotification, showAuthError } from './src/notifications.js';
 let selectedFlightPlan = null;
 let selectedFlightPlanCallsign = null;
 let flightPlans = [];
+let flightPlanSeq = null;
+let flightPlanEpoch = null;
 let selectedAtcCallsign = null;
 
 let adminSettings = {
@@ -179,6 +183,53 @@ async function loadFlightPlans() {
   }
 }
 
+function isSameFlightPlan(a, b) {
+  return a.callsign === b.callsign && a.departing === b.departing && a.arriving === b.arriving;
+}
+
+function applyFlightPlanUpdate(plan) {
+  flightPlans = [plan, ...flightPlans.filter(existing => !isSameFlightPlan(existing, plan))];
+  displayFlightPlans();
+}
+
+// Polls for just the plans changed since the last poll.
+async function refreshFlightPlans() {
+  try {
+    const changes = await apiLoadFlightPlanChanges(flightPlanSeq, flightPlanEpoch);
+    if (Array.isArray(changes)) {
+      flightPlans = changes;
+      flightPlanSeq = null;
+    } else {
+      if (changes.full) {
+        flightPlans = changes.upserts;
+      } else {
+        const stale = [...changes.removed, ...changes.upserts];
+        flightPlans = [...changes.upserts, ...flightPlans.filter(plan => !stale.some(other => isSameFlightPlan(plan, other)))];
+      }
+      flightPlanSeq = changes.seq;
+      flightPlanEpoch = changes.epoch;
+    }
+    displayFlightPlans();
+  } catch (err) {
+    console.error("Failed to refresh flight plans:", err);
+  }
+}
+
+// Prefer the server's live stream; fall back to delta polling if it isn't available.
+function startFlightPlanUpdates() {
+  const pollInterval = adminSettings.system?.autoRefreshInterval || 10000;
+  const source = subscribeToFlightPlans({
+    onPlan: applyFlightPlanUpdate,
+    onResync: loadFlightPlans,
+    // Picks up plans published before this connection, including while reconnecting
+    onOpen: refreshFlightPlans,
+    onUnavailable: () => setInterval(refreshFlightPlans, pollInterval)
+  });
+  if (!source) {
+    setInterval(refreshFlightPlans, pollInterval);
+  }
+}
+
 function displayFlightPlans() {
   const container = document.getElementById("flightPlans");
   if (flightPlans.length === 0) {
@@ -829,9 +880,8 @@ async function initializeApp() {
     const healthData = await getSystemHealth();
     if (healthData.environment === 'serverless') {
       showEnvironmentNotification();
-      const flightPlanInterval = adminSettings.system?.autoRefreshInterval || 10000;
-      setInterval(loadFlightPlans, flightPlanInterval);
     }
+    startFlightPlanUpdates();
     const controllerInterval = adminSettings.system?.controllerPollInterval || 300000;
     setInterval(loadControllers, controllerInterval);
     const atisInterval = adminSettings.system?.atisPollInterval || 300000;
@@ -1,8 +1,11 @@
 import { API_BASE_URL } from './utils.js';
 
-export async function loadFlightPlans() {
+// Optional filters (departure, arrival, airport, callsign, since, limit) are applied server-side.
+export async function loadFlightPlans(filters = {}) {
   try {
-    const res = await fetch(`${API_BASE_URL}/api/flight-plans`, { credentials: 'include' });
+    const params = new URLSearchParams(Object.entries(filters).filter(([, value]) => value !== undefined && value !== null && value !== ''));
+    const query = params.toString() ? `?${params}` : '';
+    const res = await fetch(`${API_BASE_URL}/api/flight-plans${query}`, { credentials: 'include' });
     if (!res.ok) throw new Error(`HTTP ${res.status}`);
     return await res.json();
   } catch (err) {
@@ -11,6 +14,36 @@ export async function loadFlightPlans() {
   }
 }
 
+// Returns only the flight plans changed since `sinceSeq` ({ epoch, seq, full, upserts, removed }).
+// Pass a null sinceSeq to get everything; may return a plain array when the server falls back to the database.
+export async function loadFlightPlanChanges(sinceSeq, epoch) {
+  const params = new URLSearchParams({ since_seq: sinceSeq ?? -1, epoch: epoch || '' });
+  const res = await fetch(`${API_BASE_URL}/api/flight-plans?${params}`, { credentials: 'include' });
+  if (!res.ok) throw new Error(`HTTP ${res.status}`);
+  return await res.json();
+}
+
+// Opens the live flight plan stream. Returns the EventSource, or null if the browser can't stream.
+// onOpen is called on every (re)connect: the stream only carries plans published while it is
+// open, so callers catch up on anything they missed before it there.
+// onUnavailable is called if the server refuses or drops the stream for good (e.g. streaming disabled).
+export function subscribeToFlightPlans({ airport, onPlan, onResync, onOpen, onUnavailable } = {}) {
+  if (typeof EventSource === 'undefined') {
+    return null;
+  }
+  const query = airport ? `?${new URLSearchParams({ airport })}` : '';
+  const source = new EventSource(`${API_BASE_URL}/api/flight-plans/stream${query}`, { withCredentials: true });
+  source.addEventListener('flight_plan', (event) => onPlan?.(JSON.parse(event.data)));
+  source.addEventListener('resync', () => onResync?.());
+  source.onopen = () => onOpen?.();
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) {
+      onUnavailable?.();
+    }
+  };
+  return source;
+}
+
 export async function loadPublicSettings() {
   try {
     const response = await fetch(`${API_BASE_URL}/api/settings`, { credentials: 'include' });
@@ -58,9 +91,10 @@ export async function loadControllers() {
 }
 
 // Implemented missing functions
-export async function loadAdminAnalytics() {
+export async function loadAdminAnalytics(refresh = false) {
     try {
-        const response = await fetch(`${API_BASE_URL}/api/admin/analytics`, { credentials: 'include' });
+        // The server caches analytics briefly; refresh=true forces a fresh snapshot
+        const response = await fetch(`${API_BASE_URL}/api/admin/analytics${refresh ? '?refresh=true' : ''}`, { credentials: 'include' });
         if (!response.ok) throw new Error('Network response was not ok');
         return await response.json();
     } catch (error) {
@@ -277,9 +311,10 @@ export async function saveAdminSettings(settings) {
     }
 }
 
-export async function loadTable(tableName, limit, offset) {
+export async function loadTable(tableName, limit, cursor = null) {
     try {
-        const response = await fetch(`${API_BASE_URL}/api/admin/tables/${tableName}?limit=${limit}&offset=${offset}`, {
+        const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+        const response = await fetch(`${API_BASE_URL}/api/admin/tables/${tableName}?limit=${limit}${cursorParam}`, {
             credentials: 'include'
         });
         if (!response.ok) throw new Error(`HTTP Error: ${response.status}`);